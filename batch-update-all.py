@@ -5,6 +5,10 @@ import os
 import re
 from pathlib import Path
 
+from rewriter import compile_rules
+from rewriter.cli import add_rules_argument, make_parser, run_options, selected_rules
+from rewriter.runner import FAILED, UPDATED, rewrite_file, run_files
+
 # 项目根目录
 PROJECT_DIR = Path("/Users/qingyu/langchain4j-intro")
 
@@ -28,8 +32,8 @@ REPLACEMENTS = [
     (r'<link rel="preconnect" href="https://fonts\.gstatic\.com"[^>]*>\s*', '', re.MULTILINE),
     (r'<link href="https://fonts\.googleapis\.com/css2\?family=Inter[^>]*>\s*', '', re.MULTILINE),
     
-    # 确保有 styles.css 引用
-    (r'<head>', r'<head>\n    <link rel="stylesheet" href="styles.css">', re.MULTILINE),
+    # 确保有 styles.css 引用（已有时不再重复插入）
+    (r'<head>(?!\s*<link rel="stylesheet" href="styles\.css">)', r'<head>\n    <link rel="stylesheet" href="styles.css">', re.MULTILINE),
     
     # ========== 布局替换 ==========
     (r'<body class="[^"]*">', r'<body>'),
@@ -56,5 +60,42 @@ REPLACEMENTS = [
     # ========== 主内容区域替换 ==========
     (r'<main class="flex-1 ml-\[280px\]">', r'<main class="main-content">'),
     (r'<div class="max-w-7xl mx-auto px-8 py-12">', r'<div class="content-wrapper">'),
+]
+
+RULES = compile_rules(REPLACEMENTS, 'REPLACEMENTS')
+
+def rewrite_content(content):
+    """对文件内容应用所有替换规则"""
+    return RULES.apply(content)
+
+def print_result(result):
+    """打印单个文件的处理结果"""
+    if result.status == UPDATED:
+        print(f"✓ 已更新: {result.path.name}")
+    elif result.status == FAILED:
+        print(f"✗ 处理失败: {result.path.name} - {result.error}")
+    else:
+        print(f"ℹ 无需更新: {result.path.name}")
+
+def process_file(file_path):
+    """处理单个HTML文件"""
+    print_result(rewrite_file(file_path, rewrite_content))
+
+def main():
+    """主函数"""
+    args = add_rules_argument(make_parser('全面批量更新所有HTML文件')).parse_args()
+    
+    print("开始全面批量更新HTML文件...")
+    print("=" * 60)
     
-    # ========== 常用工具
\ No newline at end of file
+    file_paths = [PROJECT_DIR / filename for filename in get_all_html_files()]
+    rules = selected_rules(args, RULES)
+    options = run_options(args, PROJECT_DIR, 'batch-update-all', rules)
+    for result in run_files(file_paths, rules, **options):
+        print_result(result)
+    
+    print("=" * 60)
+    print("批量更新完成！")
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,13 @@
 """批量更新所有HTML文件的简化版本"""
 
 import os
+import traceback
 from pathlib import Path
 
+from rewriter import compile_rules, fixpoint, literal
+from rewriter.cli import add_rules_argument, make_parser, run_options, selected_rules
+from rewriter.runner import FAILED, UPDATED, rewrite_file, run_files
+
 # 项目根目录
 PROJECT_DIR = Path("/Users/qingyu/langchain4j-intro")
 
@@ -42,135 +47,118 @@ HTML_FILES = [
     "examples.html"
 ]
 
+def remove_google_fonts(content):
+    """移除 Google Fonts 引用（保留styles.css）"""
+    if '<link rel="preconnect" href="https://fonts.googleapis.com">' in content:
+        lines = content.split('\n')
+        new_lines = []
+        skip = False
+        for line in lines:
+            if '<link rel="preconnect" href="https://fonts.googleapis.com">' in line:
+                skip = True
+            elif skip and 'fonts.gstatic.com' in line:
+                continue
+            elif skip and 'https://fonts.googleapis.com/css2?family=Inter' in line:
+                skip = False
+                continue
+            else:
+                new_lines.append(line)
+        content = '\n'.join(new_lines)
+    return content
+
+_TAILWIND = compile_rules([
+    (r'<script src="https://cdn\.tailwindcss\.com"></script>\s*', ''),
+    (r'<script>\s*tailwind\.config\s*=\s*\{[\s\S]*?\}\s*</script>\s*', ''),
+], 'TAILWIND')
+
+def remove_tailwind(content):
+    """移除Tailwind CDN"""
+    if 'cdn.tailwindcss.com' in content:
+        content = _TAILWIND.apply(content)
+    return content
+
+# 替换步骤，按顺序执行（字符串替换语义）
+STEPS = [
+    # 1. 移除 Google Fonts 引用（保留styles.css）
+    remove_google_fonts,
+    # 2. 页面容器
+    literal('<div class="flex min-h-screen">', '<div class="page-container">'),
+    # 3. 侧边栏
+    literal(
+        '<aside class="w-[280px] fixed h-screen bg-white border-r border-gray-200 overflow-y-auto pb-8">',
+        '<aside class="sidebar">'
+    ),
+    # 4. 侧边栏内容
+    literal('<div class="p-6">', '<div class="sidebar-content">'),
+    # 5. Logo区域
+    literal('<div class="flex items-center gap-3 mb-8">', '<div class="sidebar-logo">'),
+    # 6. Logo图标
+    literal(
+        '<div class="w-10 h-10 bg-indigo-600 rounded-lg flex items-center justify-center">',
+        '<div class="sidebar-logo-icon">'
+    ),
+    # 7. 导航分组标题
+    literal(
+        '<h3 class="text-xs font-semibold text-gray-400 uppercase tracking-wider mb-3">',
+        '<h3 class="sidebar-nav-title">'
+    ),
+    # 8. 导航分组：先处理带标题的情况，替换到不再出现为止
+    fixpoint(*literal(
+        '<div>\n        <h3 class="sidebar-nav-title">',
+        '<div class="sidebar-nav-group">\n        <h3 class="sidebar-nav-title">'
+    )),
+    # 9. 导航列表
+    literal('<ul class="space-y-1">', '<ul class="sidebar-nav-list">'),
+    # 10. 移除注释的CSS类
+    literal(
+        '<!-- class="block px-4 py-2.5 text-sm bg-indigo-50 text-indigo-700 font-medium rounded-md transition-all text-center" -->',
+        ''
+    ),
+    # 11. 主内容区域
+    literal('<main class="flex-1 ml-[280px]">', '<main class="main-content">'),
+    # 12. 内容包装器
+    literal('<div class="max-w-7xl mx-auto px-8 py-12">', '<div class="content-wrapper">'),
+    # 13. 移除Tailwind CDN
+    remove_tailwind,
+    # 14. 处理body标签
+    literal('<body class="bg-white text-gray-800 antialiased">', '<body>'),
+]
+
+RULES = compile_rules(STEPS, 'STEPS')
+
+def rewrite_content(content):
+    """对文件内容应用所有替换规则"""
+    return RULES.apply(content)
+
+def print_result(result):
+    """打印单个文件的处理结果"""
+    if result.status == UPDATED:
+        print(f"✓ 已更新: {result.path.name}")
+    elif isinstance(result.error, FileNotFoundError):
+        print(f"✗ 文件不存在: {result.path.name}")
+    elif result.status == FAILED:
+        print(f"✗ 处理失败: {result.path.name} - {result.error}")
+        traceback.print_exception(result.error)
+    else:
+        print(f"ℹ 无需更新: {result.path.name}")
+
 def process_file(file_path):
     """处理单个HTML文件 - 使用简单的字符串替换"""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        original_content = content
-        
-        # 1. 移除 Google Fonts 引用（保留styles.css）
-        if '<link rel="preconnect" href="https://fonts.googleapis.com">' in content:
-            lines = content.split('\n')
-            new_lines = []
-            skip = False
-            for line in lines:
-                if '<link rel="preconnect" href="https://fonts.googleapis.com">' in line:
-                    skip = True
-                elif skip and 'fonts.gstatic.com' in line:
-                    continue
-                elif skip and 'https://fonts.googleapis.com/css2?family=Inter' in line:
-                    skip = False
-                    continue
-                else:
-                    new_lines.append(line)
-            content = '\n'.join(new_lines)
-        
-        # 2. 页面容器
-        content = content.replace(
-            '<div class="flex min-h-screen">',
-            '<div class="page-container">'
-        )
-        
-        # 3. 侧边栏
-        content = content.replace(
-            '<aside class="w-[280px] fixed h-screen bg-white border-r border-gray-200 overflow-y-auto pb-8">',
-            '<aside class="sidebar">'
-        )
-        
-        # 4. 侧边栏内容
-        content = content.replace(
-            '<div class="p-6">',
-            '<div class="sidebar-content">'
-        )
-        
-        # 5. Logo区域
-        content = content.replace(
-            '<div class="flex items-center gap-3 mb-8">',
-            '<div class="sidebar-logo">'
-        )
-        
-        # 6. Logo图标
-        content = content.replace(
-            '<div class="w-10 h-10 bg-indigo-600 rounded-lg flex items-center justify-center">',
-            '<div class="sidebar-logo-icon">'
-        )
-        
-        # 7. 导航分组标题
-        content = content.replace(
-            '<h3 class="text-xs font-semibold text-gray-400 uppercase tracking-wider mb-3">',
-            '<h3 class="sidebar-nav-title">'
-        )
-        
-        # 8. 导航分组
-        # 先处理带标题的情况
-        while '<div>\n        <h3 class="sidebar-nav-title">' in content:
-            content = content.replace(
-                '<div>\n        <h3 class="sidebar-nav-title">',
-                '<div class="sidebar-nav-group">\n        <h3 class="sidebar-nav-title">'
-            )
-        
-        # 9. 导航列表
-        content = content.replace(
-            '<ul class="space-y-1">',
-            '<ul class="sidebar-nav-list">'
-        )
-        
-        # 10. 移除注释的CSS类
-        content = content.replace(
-            '<!-- class="block px-4 py-2.5 text-sm bg-indigo-50 text-indigo-700 font-medium rounded-md transition-all text-center" -->',
-            ''
-        )
-        
-        # 11. 主内容区域
-        content = content.replace(
-            '<main class="flex-1 ml-[280px]">',
-            '<main class="main-content">'
-        )
-        
-        # 12. 内容包装器
-        content = content.replace(
-            '<div class="max-w-7xl mx-auto px-8 py-12">',
-            '<div class="content-wrapper">'
-        )
-        
-        # 13. 移除Tailwind CDN
-        if 'cdn.tailwindcss.com' in content:
-            import re
-            content = re.sub(r'<script src="https://cdn\.tailwindcss\.com"></script>\s*', '', content)
-            content = re.sub(r'<script>\s*tailwind\.config\s*=\s*\{[\s\S]*?\}\s*</script>\s*', '', content)
-        
-        # 14. 处理body标签
-        content = content.replace(
-            '<body class="bg-white text-gray-800 antialiased">',
-            '<body>'
-        )
-        
-        if content != original_content:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            print(f"✓ 已更新: {file_path.name}")
-        else:
-            print(f"ℹ 无需更新: {file_path.name}")
-            
-    except Exception as e:
-        print(f"✗ 处理失败: {file_path.name} - {e}")
-        import traceback
-        traceback.print_exc()
+    print_result(rewrite_file(file_path, rewrite_content))
 
 def main():
     """主函数"""
+    args = add_rules_argument(make_parser('批量更新HTML文件（字符串替换版）')).parse_args()
+    
     print("开始批量更新HTML文件...")
     print("=" * 60)
     
     # 处理所有文件
-    for filename in HTML_FILES:
-        file_path = PROJECT_DIR / filename
-        if file_path.exists():
-            process_file(file_path)
-        else:
-            print(f"✗ 文件不存在: {filename}")
+    file_paths = [PROJECT_DIR / filename for filename in HTML_FILES]
+    rules = selected_rules(args, RULES)
+    options = run_options(args, PROJECT_DIR, 'batch-update-simple', rules)
+    for result in run_files(file_paths, rules, **options):
+        print_result(result)
     
     print("=" * 60)
     print("批量更新完成！")
@@ -5,6 +5,10 @@ import os
 import re
 from pathlib import Path
 
+from rewriter import compile_rules
+from rewriter.cli import add_rules_argument, make_parser, run_options, selected_rules
+from rewriter.runner import FAILED, UPDATED, rewrite_file, run_files
+
 # 项目根目录
 PROJECT_DIR = Path("/Users/qingyu/langchain4j-intro")
 
@@ -92,39 +96,49 @@ REPLACEMENTS = [
     (r'''<div class="max-w-7xl mx-auto px-8 py-12">''', '''<div class="content-wrapper">''')
 ]
 
+# Tailwind CDN 残留引用
+TAILWIND_RULES = [
+    (r'<script src="https://cdn\.tailwindcss\.com"></script>\s*', ''),
+    (r'<script>\s*tailwind\.config\s*=\s*\{[\s\S]*?\}\s*</script>\s*', ''),
+]
+
+_TAILWIND = compile_rules(TAILWIND_RULES, 'TAILWIND_RULES')
+
+def remove_tailwind(content):
+    """确保移除了多余的Tailwind CDN引用"""
+    if 'cdn.tailwindcss.com' in content:
+        content = _TAILWIND.apply(content)
+    return content
+
+# 完整规则：替换表 + Tailwind 清理 + <body class="..."> 替换为 <body>
+RULES = compile_rules(REPLACEMENTS + [
+    remove_tailwind,
+    (r'<body class="[^"]*">', '<body>'),
+], 'RULES')
+
+def rewrite_content(content):
+    """对文件内容应用所有替换规则"""
+    return RULES.apply(content)
+
+def print_result(result):
+    """打印单个文件的处理结果"""
+    if result.status == UPDATED:
+        print(f"✓ 已更新: {result.path.name}")
+    elif isinstance(result.error, FileNotFoundError):
+        print(f"✗ 文件不存在: {result.path.name}")
+    elif result.status == FAILED:
+        print(f"✗ 处理失败: {result.path.name} - {result.error}")
+    else:
+        print(f"ℹ 无需更新: {result.path.name}")
+
 def process_file(file_path):
     """处理单个HTML文件"""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        original_content = content
-        
-        # 应用所有替换规则
-        for pattern, replacement, *flags in REPLACEMENTS:
-            flags_val = flags[0] if flags else 0
-            content = re.sub(pattern, replacement, content, flags=flags_val)
-        
-        # 确保移除了多余的Tailwind CDN引用
-        if 'cdn.tailwindcss.com' in content:
-            content = re.sub(r'<script src="https://cdn\.tailwindcss\.com"></script>\s*', '', content)
-            content = re.sub(r'<script>\s*tailwind\.config\s*=\s*\{[\s\S]*?\}\s*</script>\s*', '', content)
-        
-        # 替换<body class="...">为<body>
-        content = re.sub(r'<body class="[^"]*">', '<body>', content)
-        
-        if content != original_content:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            print(f"✓ 已更新: {file_path.name}")
-        else:
-            print(f"ℹ 无需更新: {file_path.name}")
-            
-    except Exception as e:
-        print(f"✗ 处理失败: {file_path.name} - {e}")
+    print_result(rewrite_file(file_path, rewrite_content))
 
 def main():
     """主函数"""
+    args = add_rules_argument(make_parser('批量更新HTML文件，将Tailwind类替换为语义化CSS类')).parse_args()
+    
     print("开始批量更新HTML文件...")
     print("=" * 60)
     
@@ -133,12 +147,11 @@ def main():
         print("⚠ 警告: styles.css 文件不存在！")
     
     # 处理所有文件
-    for filename in HTML_FILES:
-        file_path = PROJECT_DIR / filename
-        if file_path.exists():
-            process_file(file_path)
-        else:
-            print(f"✗ 文件不存在: {filename}")
+    file_paths = [PROJECT_DIR / filename for filename in HTML_FILES]
+    rules = selected_rules(args, RULES)
+    options = run_options(args, PROJECT_DIR, 'batch-update', rules)
+    for result in run_files(file_paths, rules, **options):
+        print_result(result)
     
     print("=" * 60)
     print("批量更新完成！")
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+HTML 重写脚本基准测试
+用真实页面骨架生成 10 / 1000 / 50000 页的合成语料，测量各脚本核心函数的吞吐量和峰值内存
+"""
+
+import argparse
+import sys
+
+from rewriter import bench
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='HTML 重写脚本基准测试')
+    parser.add_argument(
+        '--sizes', default=','.join(map(str, bench.DEFAULT_SIZES)),
+        help='语料规模（页数），逗号分隔（默认 10,1000,50000）'
+    )
+    parser.add_argument('--baseline', default='bench-baseline.json', help='基线文件路径')
+    parser.add_argument('--save-baseline', action='store_true', help='把本次结果保存为新的基线')
+    parser.add_argument(
+        '--threshold', type=float, default=bench.DEFAULT_THRESHOLD,
+        help='吞吐量低于基线超过该比例时视为回退（默认 0.10）'
+    )
+    parser.add_argument('--seed', type=int, default=0, help='语料生成随机种子')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    baseline = bench.load_baseline(args.baseline)
+
+    print(f"开始基准测试: {len(bench.CASES)} 个用例 × 规模 {sizes}")
+    print("=" * 60)
+    results = bench.run_all(sizes, seed=args.seed)
+    bench.print_results(results, baseline)
+    print("=" * 60)
+
+    if args.save_baseline:
+        bench.save_baseline(args.baseline, results)
+        print(f"基线已保存: {args.baseline}")
+        return 0
+
+    regressions = bench.compare(results, baseline, args.threshold)
+    for result, base in regressions:
+        print(f"⚠ 性能回退: {result['case']} @ {result['pages']} 页 "
+              f"{base['mb_per_s']:.2f} -> {result['mb_per_s']:.2f} MB/s")
+    if regressions:
+        return 1
+    if baseline:
+        print("✓ 未发现超过阈值的性能回退")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
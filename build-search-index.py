@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+生成静态全文搜索索引
+从所有HTML页面提取标题、正文和代码，按词前缀分片写出倒排索引；只重新解析修改过的页面
+"""
+
+import argparse
+import glob
+import os
+import sys
+
+from rewriter.searchindex import SearchIndex, search
+
+# 项目根目录
+PROJECT_DIR = '/Users/qingyu/langchain4j-intro'
+
+# 索引输出目录（相对于项目根目录）
+INDEX_DIR = 'search-index'
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='生成静态全文搜索索引')
+    parser.add_argument('--output', default=INDEX_DIR, help=f'索引输出目录，相对于项目根目录（默认 {INDEX_DIR}）')
+    parser.add_argument('--full', action='store_true', help='忽略增量状态，重新解析所有页面')
+    parser.add_argument('--query', metavar='TEXT', help='不更新索引，按浏览器端的方式查询已有索引')
+    args = parser.parse_args()
+
+    directory = os.path.join(PROJECT_DIR, args.output)
+    if args.query is not None:
+        results = search(directory, args.query)
+        for score, link, title, heading in results:
+            print(f"{score:>5}  {link}  {title} / {heading}")
+        if not results:
+            print("ℹ 没有匹配的结果")
+        return 0
+
+    print("开始生成搜索索引...")
+    print("=" * 60)
+    os.makedirs(directory, exist_ok=True)
+    index = SearchIndex(directory, full=args.full)
+    stats = index.update(glob.glob(os.path.join(PROJECT_DIR, '*.html')))
+    for name in stats['indexed']:
+        print(f"✓ 已索引: {name}")
+    for name in stats['removed']:
+        print(f"✓ 已移除: {name}")
+    for name in stats['skipped']:
+        print(f"ℹ 跳过 (没有 <main>): {name}")
+    print("=" * 60)
+    print(f"重新解析 {len(stats['indexed'])} 个页面，沿用 {stats['reused']} 个；"
+          f"写入 {stats['shards_written']} 个分片，删除 {stats['shards_removed']} 个")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
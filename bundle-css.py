@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+CSS 打包
+把 css/main.css 的 @import 链内联为单个压缩文件（附 Source Map），
+并把 update-css-refs.py 插入的 <link> 改为指向打包文件
+"""
+
+import os
+import glob
+import traceback
+
+from rewriter import compile_rules, literal
+from rewriter.cli import make_parser, run_options
+from rewriter.cssbundle import BUNDLE_NAME, build
+from rewriter.runner import FAILED, UPDATED, run_files
+
+# 项目根目录
+PROJECT_DIR = '/Users/qingyu/langchain4j-intro'
+
+ENTRY = 'css/main.css'
+OUTPUT = 'css/' + BUNDLE_NAME
+
+def link_rules(entry, output):
+    """把指向入口样式表的 <link> 改为指向打包文件（路径相对于项目根目录）"""
+    return compile_rules([
+        literal(f'<link rel="stylesheet" href="{entry}">', f'<link rel="stylesheet" href="{output}">'),
+    ], 'BUNDLE_LINK')
+
+def print_result(result):
+    """打印单个文件的处理结果，返回是否有更新"""
+    name = os.path.basename(result.path)
+    if result.status == UPDATED:
+        print(f"✓ 已更新: {name}")
+        return True
+    if result.status == FAILED:
+        print(f"✗ 处理失败: {name} - {result.error}")
+        traceback.print_exception(result.error)
+    else:
+        print(f"ℹ 无需更新: {name}")
+    return False
+
+def main():
+    """主函数"""
+    parser = make_parser('打包模块化CSS并更新HTML中的样式表引用')
+    parser.add_argument('--entry', default=ENTRY, help=f'入口样式表，相对于项目根目录（默认 {ENTRY}）')
+    parser.add_argument('--output', default=OUTPUT, help=f'打包文件，相对于项目根目录（默认 {OUTPUT}）')
+    parser.add_argument('--no-html', action='store_true', help='只生成打包文件，不修改HTML')
+    args = parser.parse_args()
+
+    print("开始打包CSS...")
+    print("=" * 60)
+    stats = build(os.path.join(PROJECT_DIR, args.entry), os.path.join(PROJECT_DIR, args.output))
+    for path in stats['sources']:
+        print(f"  {os.path.relpath(path, PROJECT_DIR)}")
+    print(f"✓ {len(stats['sources'])} 个样式表 -> {args.output}: "
+          f"{stats['input_bytes']} -> {stats['output_bytes']} 字节，合并重复声明 {stats['collapsed']} 条")
+    if not stats['written']:
+        print("ℹ 打包文件无变化")
+
+    if not args.no_html:
+        print("=" * 60)
+        rules = link_rules(args.entry, args.output)
+        html_files = glob.glob(os.path.join(PROJECT_DIR, '*.html'))
+        updated_count = 0
+        options = run_options(args, PROJECT_DIR, 'bundle-css', rules)
+        for result in run_files(html_files, rules, **options):
+            if print_result(result):
+                updated_count += 1
+        print(f"\n总计更新 {updated_count} 个文件")
+
+    print("=" * 60)
+    print("打包完成！")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+TSX 页面 codemod
+每个页面只读取一次，依次执行 CODEMODS 中登记的全部迁移并统一整理 import；
+新的迁移加到 CODEMODS 里即可，不需要再写一个脚本。
+配合 -j 并行处理，--incremental 按 (文件哈希, codemod 集合指纹) 跳过已处理且未修改的页面
+"""
+
+import traceback
+from pathlib import Path
+
+from rewriter.cli import make_parser, run_options
+from rewriter.codemod import CodemodSet, rename_component
+from rewriter.runner import FAILED, UPDATED, run_files
+
+# 项目根目录
+PROJECT_DIR = Path("/Users/qingyu/langchain4j-intro")
+
+PAGES_DIR = PROJECT_DIR / "web" / "src" / "pages"
+
+# 登记的 codemod，按顺序执行
+CODEMODS = [
+    # 代码块统一改用带复制按钮的组件（原 web/replace-codeblocks.py）
+    rename_component('CodeBlock', 'CodeBlockWithCopy', '../components/ui', name='codeblock-copy'),
+]
+
+def select_codemods(names):
+    """按名称选出 codemod，names 为空时返回全部"""
+    if not names:
+        return list(CODEMODS)
+    known = {codemod.name: codemod for codemod in CODEMODS}
+    unknown = [name for name in names if name not in known]
+    if unknown:
+        raise SystemExit(f"✗ 未知的 codemod: {', '.join(unknown)}（可用: {', '.join(known)}）")
+    return [known[name] for name in names]
+
+def print_result(result):
+    """打印单个文件的处理结果，返回是否有更新"""
+    if result.status == UPDATED:
+        print(f"✓ 已更新: {result.path.name}")
+        return True
+    if result.status == FAILED:
+        print(f"✗ 处理失败: {result.path.name} - {result.error}")
+        traceback.print_exception(result.error)
+    return False
+
+def run(pages_dir, codemods, args, root, tool):
+    """对 pages_dir 下的全部 .tsx 执行 codemods，返回 (文件数, 更新数)"""
+    transform = CodemodSet(codemods, 'CODEMODS')
+    paths = sorted(Path(pages_dir).glob('*.tsx'))
+    updated_count = 0
+    for result in run_files(paths, transform, **run_options(args, root, tool, transform)):
+        if print_result(result):
+            updated_count += 1
+    return len(paths), updated_count
+
+def main():
+    """主函数"""
+    parser = make_parser('在 TSX 页面上一次执行全部已登记的 codemod')
+    parser.add_argument('--pages', default=PAGES_DIR, type=Path, help=f'页面目录（默认 {PAGES_DIR}）')
+    parser.add_argument('--only', action='append', metavar='NAME', help='只执行指定的 codemod（可重复）')
+    parser.add_argument('--list', action='store_true', help='列出已登记的 codemod')
+    args = parser.parse_args()
+
+    if args.list:
+        for codemod in CODEMODS:
+            print(f"{codemod.name}")
+        return
+    codemods = select_codemods(args.only)
+    if not args.pages.is_dir():
+        raise SystemExit(f"✗ 找不到目录 {args.pages}")
+
+    print(f"codemod: {', '.join(codemod.name for codemod in codemods)}")
+    print("=" * 60)
+    total, updated_count = run(args.pages, codemods, args, PROJECT_DIR, 'codemod-pages')
+    print("=" * 60)
+    print(f"共 {total} 个页面，更新 {updated_count} 个文件")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+开发预览服务器
+以项目目录为根提供页面，返回前在内存中按规则链重写 HTML（不修改磁盘上的文件），
+修改页面后刷新浏览器即可预览重写结果
+"""
+
+import argparse
+
+from rewriter.chain import DEFAULT_CHAIN, RuleChain, parse_spec
+from rewriter.devserver import make_server
+
+# 项目根目录
+PROJECT_DIR = '/Users/qingyu/langchain4j-intro'
+
+def main():
+    """主函数"""
+    default_chain = ' '.join(f'{script}:{name}' for script, name in DEFAULT_CHAIN)
+    parser = argparse.ArgumentParser(description='在内存中应用重写规则的开发预览服务器')
+    parser.add_argument('--bind', default='127.0.0.1', help='监听地址（默认 127.0.0.1）')
+    parser.add_argument('--port', type=int, default=8000, help='监听端口（默认 8000）')
+    parser.add_argument('--root', default=PROJECT_DIR, help=f'站点根目录（默认 {PROJECT_DIR}）')
+    parser.add_argument('--rules', action='append', type=parse_spec, metavar='SCRIPT:NAME',
+                        help=f'规则链中的一项，按给出的顺序执行（可重复；默认 {default_chain}）')
+    args = parser.parse_args()
+
+    chain = RuleChain(args.rules or DEFAULT_CHAIN)
+    server = make_server(args.root, chain, args.bind, args.port)
+    print(f"规则链: {' -> '.join(f'{script}:{name}' for script, name in chain.specs)}")
+    print(f"预览地址: http://{args.bind}:{args.port}/  （Ctrl+C 退出）")
+    print("=" * 60)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n已停止")
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+样式表内容指纹
+把 css/*.css 复制为带内容哈希的文件名，并把页面中的样式表引用改为指纹文件名；
+哈希不变时不重写任何文件，样式表即可配置为 Cache-Control: immutable
+"""
+
+import os
+import glob
+import traceback
+
+from rewriter.assets import KEEP_GENERATIONS, MANIFEST_NAME, fingerprint_assets, href_rules
+from rewriter.cli import make_parser, run_options
+from rewriter.runner import FAILED, UPDATED, run_files
+
+# 项目根目录
+PROJECT_DIR = '/Users/qingyu/langchain4j-intro'
+
+CSS_DIR = 'css'
+
+def print_result(result):
+    """打印单个文件的处理结果，返回是否有更新"""
+    name = os.path.basename(result.path)
+    if result.status == UPDATED:
+        print(f"✓ 已更新: {name}")
+        return True
+    if result.status == FAILED:
+        print(f"✗ 处理失败: {name} - {result.error}")
+        traceback.print_exception(result.error)
+    else:
+        print(f"ℹ 无需更新: {name}")
+    return False
+
+def main():
+    """主函数"""
+    parser = make_parser('为样式表生成内容指纹文件名并更新HTML中的引用')
+    parser.add_argument('--no-html', action='store_true', help='只生成指纹文件，不修改HTML')
+    parser.add_argument('--keep-generations', type=int, default=KEEP_GENERATIONS, metavar='N',
+                        help=f'保留最近 N 代旧指纹文件，供仍引用旧文件名的页面使用（默认 {KEEP_GENERATIONS}）')
+    args = parser.parse_args()
+
+    print("开始生成样式表指纹...")
+    print("=" * 60)
+    stats = fingerprint_assets(os.path.join(PROJECT_DIR, CSS_DIR), max(args.keep_generations, 0))
+    for name, target in sorted(stats['assets'].items()):
+        mark = "✓" if target in stats['written'] else "ℹ"
+        print(f"{mark} {CSS_DIR}/{name} -> {CSS_DIR}/{target}")
+    for target in stats['removed']:
+        print(f"✓ 已删除旧指纹文件: {CSS_DIR}/{target}")
+    print(f"对应关系: {CSS_DIR}/{MANIFEST_NAME}")
+
+    if not args.no_html:
+        print("=" * 60)
+        rules = href_rules(stats['assets'], CSS_DIR + '/')
+        html_files = glob.glob(os.path.join(PROJECT_DIR, '*.html'))
+        updated_count = 0
+        options = run_options(args, PROJECT_DIR, 'fingerprint-css', rules)
+        for result in run_files(html_files, rules, **options):
+            if print_result(result):
+                updated_count += 1
+        print(f"\n总计更新 {updated_count} 个文件")
+
+    print("=" * 60)
+    print("完成！")
+
+if __name__ == '__main__':
+    main()
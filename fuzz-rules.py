@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+规则回溯风险检测
+用对抗输入对各脚本的每条正则规则计时，标记随输入规模超线性增长的规则
+"""
+
+import argparse
+import sys
+
+from rewriter import fuzz
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='规则回溯风险检测')
+    parser.add_argument(
+        '--sizes', default=','.join(map(str, fuzz.DEFAULT_SIZES)),
+        help='对抗输入长度（字符），逗号分隔，按从小到大排列'
+    )
+    parser.add_argument(
+        '--budget', type=float, default=fuzz.DEFAULT_BUDGET,
+        help=f'单次匹配的时间预算（秒），超出即视为超线性（默认 {fuzz.DEFAULT_BUDGET:g}）'
+    )
+    parser.add_argument(
+        '--slope', type=float, default=fuzz.DEFAULT_SLOPE,
+        help=f'log-log 斜率达到该值时视为超线性（默认 {fuzz.DEFAULT_SLOPE:g}）'
+    )
+    parser.add_argument('-v', '--verbose', action='store_true', help='同时列出未被标记的规则')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    rules = fuzz.collect_rules()
+    print(f"开始检测: {len(rules)} 条规则 × 规模 {sizes}")
+    print("=" * 60)
+    results = fuzz.fuzz_all(sizes=sizes, budget=args.budget)
+    fuzz.print_results(results, args.slope, args.verbose)
+    print("=" * 60)
+
+    flagged = [source for source, _, entry in results if fuzz.is_superlinear(entry, args.slope)]
+    if flagged:
+        print(f"⚠ 发现 {len(flagged)} 条超线性规则")
+        return 1
+    print("✓ 未发现超线性规则")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+构建期代码高亮
+把 <pre><code> 中手写的高亮 span 替换为按 Java / YAML / XML 分词生成的紧凑标记，
+结果按代码块内容哈希缓存，只有修改过的代码块需要重新分词
+"""
+
+import os
+import glob
+import traceback
+
+from rewriter.cli import make_parser, run_options
+from rewriter.highlight import CACHE_NAME, Highlighter, load_cache, save_cache
+from rewriter.runner import FAILED, UPDATED, run_files
+
+# 项目根目录
+PROJECT_DIR = '/Users/qingyu/langchain4j-intro'
+
+def print_result(result):
+    """打印单个文件的处理结果，返回是否有更新"""
+    name = os.path.basename(result.path)
+    if result.status == UPDATED:
+        print(f"✓ 已更新: {name}")
+        return True
+    if result.status == FAILED:
+        print(f"✗ 处理失败: {name} - {result.error}")
+        traceback.print_exception(result.error)
+    else:
+        print(f"ℹ 无需更新: {name}")
+    return False
+
+def main():
+    """主函数"""
+    parser = make_parser('构建期代码高亮')
+    parser.add_argument('--cache', metavar='PATH', help=f'高亮缓存路径（默认为项目目录下的 {CACHE_NAME}）')
+    args = parser.parse_args()
+
+    cache_path = args.cache or os.path.join(PROJECT_DIR, CACHE_NAME)
+    highlighter = Highlighter(load_cache(cache_path))
+    html_files = glob.glob(os.path.join(PROJECT_DIR, '*.html'))
+
+    print("开始生成代码高亮...")
+    print("=" * 60)
+
+    updated_count = 0
+    failed = False
+    options = run_options(args, PROJECT_DIR, 'highlight-code', highlighter)
+    for result in run_files(html_files, highlighter, **options):
+        if print_result(result):
+            updated_count += 1
+        failed = failed or result.status == FAILED
+
+    # 只有实际处理了全部页面时才清理不再使用的缓存条目；
+    # 增量模式、分片、类名索引跳过的页面以及处理失败的页面不会登记用到的代码块，需保留
+    complete = not failed and all(options[key] is None for key in ('manifest', 'shard', 'index'))
+    save_cache(cache_path, highlighter.cache, highlighter.used if complete else None)
+    print("=" * 60)
+    print(f"总计更新 {updated_count} 个文件；代码块缓存命中 {highlighter.hits} 个，重新高亮 {highlighter.misses} 个")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+首屏关键 CSS
+把每个页面首屏（侧边栏、content-wrapper、page-intro、目录）用到的样式规则内联到 <head>，
+完整样式表改为异步加载，并按预算检查各页面关键 CSS 的大小
+"""
+
+import os
+import sys
+import glob
+import traceback
+
+from rewriter.cli import make_parser, run_options
+from rewriter.critical import CriticalInliner, inlined_css
+from rewriter.runner import FAILED, UPDATED, read_text, run_files
+
+# 项目根目录
+PROJECT_DIR = '/Users/qingyu/langchain4j-intro'
+
+# 关键 CSS 预算（字节）：与首屏 HTML 一起应能放进首个 TCP 拥塞窗口（约 14 KB）
+BUDGET = 14 * 1024
+
+def print_result(result):
+    """打印单个文件的处理结果，返回是否有更新"""
+    name = os.path.basename(result.path)
+    if result.status == UPDATED:
+        print(f"✓ 已更新: {name}")
+        return True
+    if result.status == FAILED:
+        print(f"✗ 处理失败: {name} - {result.error}")
+        traceback.print_exception(result.error)
+    else:
+        print(f"ℹ 无需更新: {name}")
+    return False
+
+def main():
+    """主函数"""
+    parser = make_parser('内联首屏关键CSS并异步加载完整样式表')
+    parser.add_argument('--budget', type=int, default=BUDGET, help=f'单页关键CSS预算，字节（默认 {BUDGET}）')
+    args = parser.parse_args()
+
+    print("开始内联关键CSS...")
+    print("=" * 60)
+
+    inliner = CriticalInliner(PROJECT_DIR)
+    html_files = sorted(glob.glob(os.path.join(PROJECT_DIR, '*.html')))
+    updated_count = 0
+    options = run_options(args, PROJECT_DIR, 'inline-critical-css', inliner)
+    for result in run_files(html_files, inliner, **options):
+        if print_result(result):
+            updated_count += 1
+    print(f"\n总计更新 {updated_count} 个文件")
+
+    print("=" * 60)
+    print("关键CSS大小:")
+    over_budget = 0
+    for path in html_files:
+        css = inlined_css(read_text(path))
+        if css is None:
+            continue
+        size = len(css.encode('utf-8'))
+        if size > args.budget:
+            over_budget += 1
+            print(f"⚠ {os.path.basename(path)}: {size} 字节（超出预算 {size - args.budget} 字节）")
+        else:
+            print(f"  {os.path.basename(path)}: {size} 字节")
+
+    print("=" * 60)
+    if over_budget:
+        print(f"✗ {over_budget} 个页面超出预算 {args.budget} 字节")
+        sys.exit(1)
+    print("完成！")
+
+if __name__ == '__main__':
+    main()
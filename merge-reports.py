@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+合并分片运行报告
+各机器用 --shard I/N 运行同一个脚本后，把各片的 rewrite-report.*.json 收集到一处合并，
+打印与单机运行相同的汇总，例如：
+    python3 merge-reports.py rewrite-report.refactor-css.*-of-4.json -o rewrite-report.refactor-css.json
+"""
+
+import argparse
+import json
+
+from rewriter.runner import CACHED, FAILED, SKIPPED, UNCHANGED, UPDATED
+from rewriter.shard import load_reports, merge_reports
+
+def print_rules(rules, limit):
+    """按命中次数列出规则，并列出在所有分片中都未命中的规则"""
+    ranked = sorted(rules.items(), key=lambda item: item[1]['matches'], reverse=True)
+    print(f"{'规则':<28}{'命中':>8}{'文件':>6}{'耗时(ms)':>10}  模式")
+    for key, entry in ranked[:limit]:
+        if not entry['matches']:
+            break
+        pattern = entry['pattern'].replace('\n', '\\n')
+        if len(pattern) > 48:
+            pattern = pattern[:45] + '...'
+        print(f"{key:<28}{entry['matches']:>8}{entry['files']:>6}{entry['time'] * 1000:>10.2f}  {pattern}")
+    dead = [key for key, entry in ranked if not entry['matches']]
+    if dead:
+        print(f"未命中任何文件的规则 ({len(dead)}): {', '.join(dead)}")
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='合并各分片的运行报告并打印汇总')
+    parser.add_argument('reports', nargs='+', help='各分片的运行报告（JSON）')
+    parser.add_argument('-o', '--output', metavar='PATH', help='写出合并后的报告')
+    parser.add_argument('-n', type=int, default=20, help='列出命中最多的规则条数（默认 20）')
+    parser.add_argument('--strict', action='store_true', help='分片缺失、重复或不一致时以非零状态退出')
+    args = parser.parse_args()
+
+    try:
+        reports, problems = load_reports(args.reports)
+    except (OSError, ValueError, KeyError) as e:
+        raise SystemExit(f"✗ 无法读取报告: {e}")
+    for problem in problems:
+        print(f"⚠ {problem}")
+    merged = merge_reports(reports)
+
+    shards = ', '.join(f'{shard[0]}/{shard[1]}' if shard else '全部' for shard in merged['shards'])
+    print(f"工具: {', '.join(merged['tools'])}")
+    print(f"分片: {shards}（最慢一片耗时 {merged['elapsed']:.1f} 秒）")
+    print("=" * 60)
+    for key, entry in sorted(merged['files'].items()):
+        if entry['status'] == FAILED:
+            print(f"✗ 处理失败: {key} - {entry.get('error', '')}")
+    counts = merged['counts']
+    rewrite_time = sum(entry.get('time', 0) for entry in merged['files'].values())
+    print(f"共 {len(merged['files'])} 个文件：更新 {counts.get(UPDATED, 0)} 个，"
+          f"无需更新 {counts.get(UNCHANGED, 0) + counts.get(CACHED, 0)} 个，"
+          f"跳过 {counts.get(SKIPPED, 0)} 个，失败 {counts.get(FAILED, 0)} 个；"
+          f"重写总耗时 {rewrite_time * 1000:.1f} ms")
+    print(f"总计更新 {counts.get(UPDATED, 0)} 个文件")
+    if merged['rules']:
+        print()
+        print_rules(merged['rules'], args.n)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(merged, f, ensure_ascii=False, indent=1)
+        print(f"合并报告已写入: {args.output}")
+    if problems and args.strict:
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
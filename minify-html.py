@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+HTML 压缩
+在其他重写脚本之后运行：安全压缩每个页面（<pre> 等内容原样保留），写到发布目录（默认 dist/），
+并生成最高压缩级别的 .html.gz 预压缩文件，供 nginx gzip_static 直接发送。
+源页面保持原样，之后的重写规则和导航栏拼接看到的仍是未压缩的页面；
+--in-place 时才原地压缩源页面（写回前保存快照，可用 rollback.py 回滚）
+"""
+
+import argparse
+import os
+import traceback
+from pathlib import Path
+
+from rewriter.minify import gzip_bytes, minify_html
+from rewriter.runner import FAILED, UPDATED, read_text, run_files, write_text
+from rewriter.snapshot import open_snapshot
+
+# 项目根目录
+PROJECT_DIR = Path("/Users/qingyu/langchain4j-intro")
+
+# 默认输出目录（相对于项目根目录）
+DIST_DIR = "dist"
+
+def _read_bytes(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+def _write_artifact(path, data):
+    """写出生成的文件（不是源页面，不进快照）"""
+    tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def write_gzip(target, data):
+    """生成 target 的 .gz 预压缩文件，内容不变时不重写；返回 (gzip 字节数, 是否写入)"""
+    gz_data = gzip_bytes(data)
+    gz_path = target.with_name(target.name + '.gz')
+    if _read_bytes(gz_path) == gz_data:
+        return len(gz_data), False
+    _write_artifact(gz_path, gz_data)
+    return len(gz_data), True
+
+def minify_page(path, output_dir, gzip=True):
+    """
+    把单个页面压缩到 output_dir，内容不变的文件不重写
+    返回 (原字节数, 压缩后字节数, gzip 字节数或 None, 是否写入)
+    """
+    content = read_text(path)
+    minified = minify_html(content)
+    data = minified.encode('utf-8')
+    target = output_dir / path.name
+    written = False
+    if _read_bytes(target) != data:
+        write_text(target, minified)
+        written = True
+    gz_size = None
+    if gzip:
+        gz_size, gz_written = write_gzip(target, data)
+        written = written or gz_written
+    return len(content.encode('utf-8')), len(data), gz_size, written
+
+def minify_in_place(pages, args):
+    """
+    原地压缩源页面：经 run_files 写回并保存快照
+    逐个产出 (路径, 原字节数, 压缩后字节数, gzip 字节数或 None, 是否写入)，失败时抛出异常
+    """
+    sizes = {path: path.stat().st_size for path in pages}
+    snapshot = open_snapshot(args, PROJECT_DIR, 'minify-html')
+    for result in run_files(pages, minify_html, snapshot=snapshot):
+        path = Path(result.path)
+        if result.status == FAILED:
+            yield path, result.error
+            continue
+        data = path.read_bytes()
+        written = result.status == UPDATED
+        gz_size = None
+        if not args.no_gzip:
+            gz_size, gz_written = write_gzip(path, data)
+            written = written or gz_written
+        yield path, (sizes[path], len(data), gz_size, written)
+
+def minify_to(pages, output_dir, args):
+    """把页面压缩到输出目录，产出值同 minify_in_place"""
+    for path in pages:
+        try:
+            yield path, minify_page(path, output_dir, not args.no_gzip)
+        except Exception as e:
+            yield path, e
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='压缩HTML页面并生成gzip预压缩文件')
+    parser.add_argument('--output', metavar='DIR', help=f'输出目录（默认项目目录下的 {DIST_DIR}/）')
+    parser.add_argument('--in-place', action='store_true', help='原地压缩源页面（写回前保存快照，可用 rollback.py 回滚）')
+    parser.add_argument('--no-gzip', action='store_true', help='不生成 .html.gz 预压缩文件')
+    parser.add_argument('--no-snapshot', action='store_true', help='--in-place 时不保存源页面的快照')
+    args = parser.parse_args()
+
+    pages = sorted(PROJECT_DIR.glob("*.html"))
+    if args.in_place:
+        if args.output:
+            parser.error('--in-place 与 --output 不能同时使用')
+        results = minify_in_place(pages, args)
+    else:
+        output_dir = Path(args.output) if args.output else PROJECT_DIR / DIST_DIR
+        if output_dir.resolve() == PROJECT_DIR.resolve():
+            parser.error('输出目录就是项目目录，原地压缩源页面请使用 --in-place')
+        output_dir.mkdir(parents=True, exist_ok=True)
+        results = minify_to(pages, output_dir, args)
+
+    print("开始压缩HTML...")
+    print("=" * 60)
+
+    total_before = total_after = total_gz = 0
+    updated_count = 0
+    for path, outcome in results:
+        if isinstance(outcome, Exception):
+            print(f"✗ 处理失败: {path.name} - {outcome}")
+            traceback.print_exception(type(outcome), outcome, outcome.__traceback__)
+            continue
+        before, after, gz_size, written = outcome
+        total_before += before
+        total_after += after
+        total_gz += gz_size or 0
+        sizes = f"{before} -> {after} 字节" + (f"，gzip {gz_size} 字节" if gz_size is not None else "")
+        if written:
+            updated_count += 1
+            print(f"✓ 已更新: {path.name}: {sizes}")
+        else:
+            print(f"ℹ 无需更新: {path.name}: {sizes}")
+
+    print("=" * 60)
+    print(f"总计更新 {updated_count} 个文件")
+    if total_before:
+        print(f"合计: {total_before} -> {total_after} 字节（{total_after / total_before:.1%}）"
+              + (f"，gzip {total_gz} 字节（{total_gz / total_before:.1%}）" if not args.no_gzip else ""))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+清理未使用的 CSS
+扫描所有页面和 web/src/pages/*.tsx 用到的类、id 和标签，
+重新打包 css/main.css 并删除打包文件中已无法匹配任何元素的规则，报告每个模块删除的规则数；
+css/ 下的源样式表不修改。标签选择器（基础样式）默认保留，--purge-elements 时一并清理。
+页面需已由 bundle-css.py 改为引用打包文件；之后再运行 bundle-css.py 会生成未清理的打包文件。
+
+--in-place 时改为直接清理 css/ 各模块（写回前保存快照，可用 rollback.py 回滚）
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from rewriter.assets import generated_files
+from rewriter.cssbundle import BUNDLE_NAME, build
+from rewriter.purge import SAFELIST, UsedNames, purge_css
+from rewriter.runner import FAILED, UPDATED, read_text, run_files
+from rewriter.snapshot import open_snapshot
+
+# 项目根目录
+PROJECT_DIR = Path("/Users/qingyu/langchain4j-intro")
+
+CSS_DIR = PROJECT_DIR / "css"
+TSX_GLOB = "web/src/pages/*.tsx"
+ENTRY = "css/main.css"
+OUTPUT = "css/" + BUNDLE_NAME
+
+def css_modules():
+    """css/ 下的源样式表（不含打包文件和当前及保留的各代指纹副本）"""
+    generated = generated_files(CSS_DIR)
+    return [path for path in sorted(CSS_DIR.glob("*.css"))
+            if path.name != BUNDLE_NAME and path.name not in generated]
+
+class ModulePurger:
+    """逐个清理源样式表（单进程顺序处理），stats 为最近一个文件的统计"""
+
+    def __init__(self, used):
+        self.__name__ = 'purge-css'
+        self.used = used
+        self.stats = None
+
+    def __call__(self, content):
+        purged, self.stats = purge_css(content, used=self.used)
+        return purged
+
+def purge_bundle_file(args, used):
+    """重新打包并清理，只写出打包文件；返回 (清理前字节数, 清理后字节数)"""
+    stats = build(str(PROJECT_DIR / args.entry), str(PROJECT_DIR / args.output), used, not args.dry_run)
+    purged = stats['purged']
+    for index, path in enumerate(stats['sources']):
+        counts = purged['sources'].get(index)
+        name = Path(path).name
+        if not counts or not (counts['rules'] or counts['selectors']):
+            print(f"ℹ 无需清理: {name}")
+            continue
+        print(f"✓ {name}: 删除 {counts['rules']} 条规则、{counts['selectors']} 个选择器")
+    state = '未写出' if args.dry_run else '已写入' if stats['written'] else '无变化'
+    print(f"ℹ 打包文件{state}: {args.output}（源样式表未修改）")
+    return purged['bytes'], stats['output_bytes']
+
+def purge_modules(args, used):
+    """直接清理 css/ 各模块；返回 (清理前字节数, 清理后字节数)"""
+    purger = ModulePurger(used)
+    snapshot = None if args.dry_run else open_snapshot(args, PROJECT_DIR, 'purge-css')
+    total_before = total_after = 0
+    for path in css_modules():
+        if args.dry_run:
+            content = read_text(path)
+            purged = purger(content)
+            before, after = len(content.encode('utf-8')), len(purged.encode('utf-8'))
+            changed = purged != content
+        else:
+            before = path.stat().st_size
+            result = next(run_files([path], purger, snapshot=snapshot))
+            if result.status == FAILED:
+                print(f"✗ 处理失败: {path.name} - {result.error}")
+                continue
+            after = path.stat().st_size
+            changed = result.status == UPDATED
+        total_before += before
+        total_after += after
+        if not changed:
+            print(f"ℹ 无需更新: {path.name}")
+            continue
+        stats = purger.stats
+        print(f"✓ {'可清理' if args.dry_run else '已清理'}: {path.name}: 删除 {stats['rules']} 条规则、"
+              f"{stats['selectors']} 个选择器，{before} -> {after} 字节（节省 {before - after} 字节）")
+    return total_before, total_after
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='删除打包CSS中未被页面使用的规则')
+    parser.add_argument('--safelist', action='append', default=[], metavar='NAME',
+                        help='额外保留的类、id 或标签，支持 * 通配（可重复）')
+    parser.add_argument('--entry', default=ENTRY, help=f'入口样式表，相对于项目根目录（默认 {ENTRY}）')
+    parser.add_argument('--output', default=OUTPUT, help=f'打包文件，相对于项目根目录（默认 {OUTPUT}）')
+    parser.add_argument('--purge-elements', action='store_true',
+                        help='同时清理页面中没有出现的标签的选择器（默认保留 img、hr 等基础样式）')
+    parser.add_argument('--in-place', action='store_true', help='直接修改 css/ 下的源样式表，而不是写出打包文件')
+    parser.add_argument('--dry-run', action='store_true', help='只报告，不写出打包文件或修改样式表')
+    parser.add_argument('--no-snapshot', action='store_true', help='--in-place 时不保存源样式表的快照')
+    args = parser.parse_args()
+
+    print("开始清理未使用的CSS...")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    used = UsedNames(SAFELIST + args.safelist, keep_elements=not args.purge_elements)
+    pages = sorted(PROJECT_DIR.glob("*.html"))
+    sources = sorted(PROJECT_DIR.glob(TSX_GLOB))
+    for path in pages:
+        used.add_html(read_text(path))
+    for path in sources:
+        used.add_tsx(read_text(path))
+    print(f"ℹ 扫描 {len(pages)} 个页面、{len(sources)} 个 TSX 文件: "
+          f"{len(used.classes)} 个类、{len(used.ids)} 个 id、{len(used.tags)} 种标签"
+          f"（{time.perf_counter() - start:.3f} 秒）")
+    print("=" * 60)
+
+    if args.in_place:
+        total_before, total_after = purge_modules(args, used)
+    else:
+        total_before, total_after = purge_bundle_file(args, used)
+
+    print("=" * 60)
+    print(f"合计节省 {total_before - total_after} 字节（{total_before} -> {total_after}）")
+    print(f"总耗时 {time.perf_counter() - start:.3f} 秒")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+class 属性查询
+查询前按文件增量更新语料目录下的 class 属性索引（只重新解析修改过的页面），例如：
+    python3 query-classes.py files "text-gray-700 space-y-1"            # 整个 class 值相同的位置
+    python3 query-classes.py files --tokens "text-gray-700 space-y-1"   # 同时含有这些类名的位置
+    python3 query-classes.py top -n 50 --unmapped                       # 没有规则处理的 Tailwind class
+"""
+
+import argparse
+import os
+from pathlib import Path
+
+from rewriter.classindex import INDEX_NAME, ClassIndex, requirements, satisfies
+from rewriter.critical import selector_requires, split_selectors
+from rewriter.cssbundle import Block, Bundle
+from rewriter.engine import RuleSet
+from rewriter.fuzz import SCRIPTS
+from rewriter.loader import load_script
+
+# 项目根目录
+PROJECT_DIR = Path("/Users/qingyu/langchain4j-intro")
+
+CSS_ENTRY = PROJECT_DIR / "css" / "main.css"
+
+def rule_requirements():
+    """各重写脚本中规则能给出的 class 条件；空前缀（如 <body class="[^"]*">）不针对具体的 class，不计入"""
+    found = []
+    for script in SCRIPTS:
+        module = load_script(script)
+        for value in vars(module).values():
+            if isinstance(value, RuleSet):
+                found.extend(requirement for requirement in requirements(value, strict=False)
+                             if requirement[:2] != ('prefix', ''))
+    return list(dict.fromkeys(found))
+
+def defined_classes():
+    """项目样式表中定义了样式的类名"""
+    classes = set()
+
+    def walk(nodes):
+        for node in nodes:
+            if not isinstance(node, Block):
+                continue
+            if node.prelude.startswith('@'):
+                walk(node.children)
+                continue
+            for selector in split_selectors(node.prelude):
+                classes.update(selector_requires(selector)[1])
+
+    if CSS_ENTRY.exists():
+        walk(Bundle(CSS_ENTRY).nodes)
+    return classes
+
+def show_files(index, value, tokens):
+    rows = index.find(value, tokens)
+    files = {}
+    for path, line, tag, found in rows:
+        files.setdefault(path, []).append((line, tag, found))
+    for path, hits in files.items():
+        print(f"{os.path.relpath(path, PROJECT_DIR)}: {len(hits)} 处")
+        for line, tag, found in hits:
+            where = f"<{tag}>" if tag else "（文本）"
+            print(f"  {line}: {where} {found}" if tokens else f"  {line}: {where}")
+    print(f"共 {len(rows)} 处，{len(files)} 个文件")
+
+def show_top(index, limit, unmapped):
+    rows = index.top_values(None if unmapped else limit)
+    if unmapped:
+        mapped = rule_requirements()
+        defined = defined_classes()
+        rows = [row for row in rows
+                if not any(satisfies(requirement, row[0], row[1]) for requirement in mapped)
+                and any(name not in defined for name in row[0].split())][:limit]
+    for value, tag, count, files in rows:
+        print(f"{count:6d} 次 {files:3d} 个文件  <{tag}> {value}")
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='查询语料中 class 属性的分布')
+    parser.add_argument('--db', metavar='PATH', help=f'索引数据库路径（默认为项目目录下的 {INDEX_NAME}）')
+    commands = parser.add_subparsers(dest='command', required=True)
+    files_parser = commands.add_parser('files', help='列出含有某个 class 值的文件和行号')
+    files_parser.add_argument('value', help='class 属性值')
+    files_parser.add_argument('--tokens', action='store_true', help='按类名匹配：属性中含有全部这些类名即可')
+    top_parser = commands.add_parser('top', help='出现次数最多的 class 值')
+    top_parser.add_argument('-n', type=int, default=50, help='显示条数（默认 50）')
+    top_parser.add_argument('--unmapped', action='store_true',
+                            help='只显示没有任何重写规则处理、且含有样式表未定义的类名（仍依赖 Tailwind）的值')
+    args = parser.parse_args()
+
+    index = ClassIndex(args.db or PROJECT_DIR / INDEX_NAME)
+    stats = index.update(sorted(PROJECT_DIR.glob("*.html")), prune=True)
+    if stats['indexed'] or stats['removed']:
+        print(f"ℹ 索引已更新: 解析 {stats['indexed']} 个文件，删除 {stats['removed']} 个文件")
+
+    if args.command == 'files':
+        show_files(index, args.value, args.tokens)
+    else:
+        show_top(index, args.n, args.unmapped)
+    index.close()
+
+if __name__ == '__main__':
+    main()
@@ -5,139 +5,154 @@
 """
 
 import os
-import re
 import glob
 
-def refactor_sidebar_styles(content):
-    """重构侧边栏样式"""
+from rewriter import compile_rules, rename_classes
+from rewriter.cli import add_rules_argument, check_cases, make_parser, run_options, selected_rules
+from rewriter.runner import FAILED, UPDATED, rewrite_file, run_files
+
+# 项目根目录
+PROJECT_DIR = '/Users/qingyu/langchain4j-intro'
+
+# class 重命名表：(标签, 原 class, 新 class)，每个 class 属性只切分一次并查表
+
+# 侧边栏样式
+SIDEBAR_CLASSES = [
     # 替换 sidebar logo SVG 样式
-    content = re.sub(
-        r'<svg class="w-6 h-6 text-white"',
-        '<svg class="sidebar-logo-svg"',
-        content
-    )
-    
+    ('svg', 'w-6 h-6 text-white', 'sidebar-logo-svg'),
+]
+
+# 侧边栏中依赖文本内容的替换
+SIDEBAR_RULES = [
     # 替换 sidebar logo 标题样式
-    content = re.sub(
-        r'<h1 class="font-bold text-gray-900">LangChain4j</h1>',
-        '<h1 class="sidebar-logo-title">LangChain4j</h1>',
-        content
-    )
-    
+    (r'<h1 class="font-bold text-gray-900">LangChain4j</h1>', '<h1 class="sidebar-logo-title">LangChain4j</h1>'),
     # 替换 sidebar logo 副标题样式
-    content = re.sub(
-        r'<p class="text-xs text-gray-500">入门指南</p>',
-        '<p class="sidebar-logo-subtitle">入门指南</p>',
-        content
-    )
-    
-    return content
+    (r'<p class="text-xs text-gray-500">入门指南</p>', '<p class="sidebar-logo-subtitle">入门指南</p>'),
+]
+
+# 按钮样式
+BUTTON_CLASSES = [
+    # 替换按钮组样式
+    ('div', 'flex gap-4 mb-10', 'btn-group'),
+]
+
+# 代码预览样式
+CODE_PREVIEW_CLASSES = [
+    ('div', 'code-block', 'code-preview'),
+    ('div', 'code-header', 'code-preview-header'),
+    ('div', 'code-dots', 'code-preview-dots'),
+    ('div', 'code-dot red', 'code-preview-dot code-preview-dot-red'),
+    ('div', 'code-dot yellow', 'code-preview-dot code-preview-dot-yellow'),
+    ('div', 'code-dot green', 'code-preview-dot code-preview-dot-green'),
+    ('span', 'code-filename', 'code-preview-filename'),
+    ('div', 'code-body', 'code-preview-content'),
+]
+
+# 代码高亮颜色类
+CODE_HIGHLIGHT_CLASSES = [
+    ('span', 'text-purple-400', 'code-keyword'),
+    ('span', 'text-yellow-300', 'code-class'),
+    ('span', 'text-blue-400', 'code-function'),
+    ('span', 'text-green-400', 'code-string'),
+]
+
+_SIDEBAR = compile_rules(
+    [rename_classes(SIDEBAR_CLASSES, name='SIDEBAR_CLASSES')] + SIDEBAR_RULES,
+    'SIDEBAR_RULES'
+)
+_BUTTON = compile_rules([rename_classes(BUTTON_CLASSES, name='BUTTON_CLASSES')], 'BUTTON_RULES')
+_CODE_PREVIEW = compile_rules(
+    [rename_classes(CODE_PREVIEW_CLASSES, name='CODE_PREVIEW_CLASSES')],
+    'CODE_PREVIEW_RULES'
+)
+_CODE_HIGHLIGHT = compile_rules(
+    [rename_classes(CODE_HIGHLIGHT_CLASSES, name='CODE_HIGHLIGHT_CLASSES')],
+    'CODE_HIGHLIGHT_RULES'
+)
+
+# 所有重构规则合并：一张 class 重命名表 + 依赖文本内容的替换，单遍完成
+ALL_CLASSES = SIDEBAR_CLASSES + BUTTON_CLASSES + CODE_PREVIEW_CLASSES + CODE_HIGHLIGHT_CLASSES
+ALL_RULES = compile_rules(
+    [rename_classes(ALL_CLASSES, name='ALL_CLASSES')] + SIDEBAR_RULES,
+    'ALL_RULES'
+)
+
+# 匹配语义用例 (输入, 期望输出)，--check 时检查，语义见 rewriter/classes.py
+MATCHING_CASES = [
+    # class 前后可有其他属性，标签名不区分大小写，属性间可以换行
+    ('<div id="x" class="code-block">', '<div id="x" class="code-preview">'),
+    ('<div class="code-block" data-lang="java">', '<div class="code-preview" data-lang="java">'),
+    ('<DIV class="code-block">', '<DIV class="code-preview">'),
+    ('<div\nclass="code-block">', '<div\nclass="code-preview">'),
+    ('<svg class="w-6 h-6 text-white" fill="none">', '<svg class="sidebar-logo-svg" fill="none">'),
+    # 标签不符、值不完全相同、单引号不匹配
+    ('<span class="code-block">', '<span class="code-block">'),
+    ('<div class="code-block extra">', '<div class="code-block extra">'),
+    ('<div class="code-block ">', '<div class="code-block ">'),
+    ("<div class='code-block'>", "<div class='code-block'>"),
+    # 不在真实标签内或不是 class 属性
+    ('&lt;div class="code-block"&gt;', '&lt;div class="code-block"&gt;'),
+    ('<div data-class="code-block">', '<div data-class="code-block">'),
+    ('<div title="a > b" class="code-block">', '<div title="a > b" class="code-block">'),
+    # 依赖文本内容的规则仍按字面量匹配
+    ('<h1 class="font-bold text-gray-900">LangChain4j</h1>', '<h1 class="sidebar-logo-title">LangChain4j</h1>'),
+    ('<h1 id="t" class="font-bold text-gray-900">LangChain4j</h1>',
+     '<h1 id="t" class="font-bold text-gray-900">LangChain4j</h1>'),
+]
+
+def refactor_sidebar_styles(content):
+    """重构侧边栏样式"""
+    return _SIDEBAR.apply(content)
 
 def refactor_button_styles(content):
     """重构按钮样式"""
-    # 替换按钮组样式
-    content = re.sub(
-        r'<div class="flex gap-4 mb-10">',
-        '<div class="btn-group">',
-        content
-    )
-    return content
+    return _BUTTON.apply(content)
 
 def refactor_code_preview_styles(content):
     """重构代码预览样式"""
-    # 替换代码块样式
-    content = re.sub(
-        r'<div class="code-block">',
-        '<div class="code-preview">',
-        content
-    )
-    
-    content = re.sub(
-        r'<div class="code-header">',
-        '<div class="code-preview-header">',
-        content
-    )
-    
-    content = re.sub(
-        r'<div class="code-dots">',
-        '<div class="code-preview-dots">',
-        content
-    )
-    
-    content = re.sub(
-        r'<div class="code-dot red"></div>',
-        '<div class="code-preview-dot code-preview-dot-red"></div>',
-        content
-    )
-    
-    content = re.sub(
-        r'<div class="code-dot yellow"></div>',
-        '<div class="code-preview-dot code-preview-dot-yellow"></div>',
-        content
-    )
-    
-    content = re.sub(
-        r'<div class="code-dot green"></div>',
-        '<div class="code-preview-dot code-preview-dot-green"></div>',
-        content
-    )
-    
-    content = re.sub(
-        r'<span class="code-filename">',
-        '<span class="code-preview-filename">',
-        content
-    )
-    
-    content = re.sub(
-        r'<div class="code-body">',
-        '<div class="code-preview-content">',
-        content
-    )
-    
-    return content
+    return _CODE_PREVIEW.apply(content)
 
 def refactor_code_highlight_styles(content):
     """重构代码高亮样式"""
-    # 替换代码高亮颜色类
-    content = re.sub(r'<span class="text-purple-400">', '<span class="code-keyword">', content)
-    content = re.sub(r'<span class="text-yellow-300">', '<span class="code-class">', content)
-    content = re.sub(r'<span class="text-blue-400">', '<span class="code-function">', content)
-    content = re.sub(r'<span class="text-green-400">', '<span class="code-string">', content)
-    
-    return content
+    return _CODE_HIGHLIGHT.apply(content)
 
-def refactor_file(file_path):
-    """重构单个文件"""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    original_content = content
-    
-    # 应用所有重构规则
-    content = refactor_sidebar_styles(content)
-    content = refactor_button_styles(content)
-    content = refactor_code_preview_styles(content)
-    content = refactor_code_highlight_styles(content)
-    
-    if content != original_content:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
-        print(f"已更新: {file_path}")
+def refactor_content(content):
+    """对文件内容应用所有重构规则"""
+    return ALL_RULES.apply(content)
+
+def print_result(result):
+    """打印单个文件的处理结果，返回是否有更新"""
+    if result.status == UPDATED:
+        print(f"已更新: {result.path}")
         return True
+    if result.status == FAILED:
+        print(f"处理失败: {result.path} - {result.error}")
     else:
-        print(f"无需更新: {file_path}")
-        return False
+        print(f"无需更新: {result.path}")
+    return False
+
+def refactor_file(file_path):
+    """重构单个文件"""
+    return print_result(rewrite_file(file_path, refactor_content))
 
 def main():
     """主函数"""
-    html_files = glob.glob('/Users/qingyu/langchain4j-intro/*.html')
+    parser = add_rules_argument(make_parser('批量重构HTML文件的CSS样式'))
+    parser.add_argument('--check', action='store_true', help='只检查 class 重命名的匹配语义用例，不处理文件')
+    args = parser.parse_args()
+    rules = selected_rules(args, ALL_RULES)
+    if args.check:
+        raise SystemExit(0 if check_cases(rules, MATCHING_CASES) else 1)
+    
+    html_files = glob.glob(os.path.join(PROJECT_DIR, '*.html'))
     
     # 排除模板文件
     html_files = [f for f in html_files if 'TEMPLATE' not in f and 'FIXED' not in f]
     
     updated_count = 0
-    for file_path in html_files:
-        if refactor_file(file_path):
+    options = run_options(args, PROJECT_DIR, 'refactor-css', rules)
+    for result in run_files(html_files, rules, **options):
+        if print_result(result):
             updated_count += 1
     
     print(f"\n总计更新 {updated_count} 个文件")
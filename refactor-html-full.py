@@ -5,231 +5,196 @@
 """
 
 import os
-import re
 import glob
 
-def refactor_all_styles(content):
-    """应用所有重构规则"""
-    
+from rewriter import compile_rules, rename_classes
+from rewriter.cli import add_rules_argument, check_cases, make_parser, run_options, selected_rules
+from rewriter.runner import FAILED, UPDATED, rewrite_file, run_files
+
+# 项目根目录
+PROJECT_DIR = '/Users/qingyu/langchain4j-intro'
+
+# class 重命名表：(标签, 原 class, 新 class)
+# 每个 class 属性只切分一次并查表，与 class 在标签中的位置、其他属性无关
+STYLE_CLASSES = [
     # ============================================
     # 1. 侧边栏样式
     # ============================================
-    content = re.sub(
-        r'<svg class="w-6 h-6 text-white"',
-        '<svg class="sidebar-logo-svg"',
-        content
-    )
-    content = re.sub(
-        r'<h1 class="font-bold text-gray-900">LangChain4j</h1>',
-        '<h1 class="sidebar-logo-title">LangChain4j</h1>',
-        content
-    )
-    content = re.sub(
-        r'<p class="text-xs text-gray-500">入门指南</p>',
-        '<p class="sidebar-logo-subtitle">入门指南</p>',
-        content
-    )
-    
+    ('svg', 'w-6 h-6 text-white', 'sidebar-logo-svg'),
+
     # ============================================
     # 2. 页面头部样式
     # ============================================
-    content = re.sub(
-        r'<p class="text-xl text-gray-600 mb-8"',
-        '<p class="page-intro"',
-        content
-    )
-    content = re.sub(
-        r'<p class="text-xl text-gray-700 mb-6"',
-        '<p class="section-intro"',
-        content
-    )
-    
+    ('p', 'text-xl text-gray-600 mb-8', 'page-intro'),
+    ('p', 'text-xl text-gray-700 mb-6', 'section-intro'),
+
     # ============================================
     # 3. 按钮样式
     # ============================================
-    content = re.sub(
-        r'<div class="flex gap-4 mb-10">',
-        '<div class="btn-group">',
-        content
-    )
-    
+    ('div', 'flex gap-4 mb-10', 'btn-group'),
+
     # ============================================
     # 4. 代码预览样式
     # ============================================
-    content = re.sub(r'<div class="code-block">', '<div class="code-preview">', content)
-    content = re.sub(r'<div class="code-header">', '<div class="code-preview-header">', content)
-    content = re.sub(r'<div class="code-dots">', '<div class="code-preview-dots">', content)
-    content = re.sub(r'<div class="code-dot red"></div>', '<div class="code-preview-dot code-preview-dot-red"></div>', content)
-    content = re.sub(r'<div class="code-dot yellow"></div>', '<div class="code-preview-dot code-preview-dot-yellow"></div>', content)
-    content = re.sub(r'<div class="code-dot green"></div>', '<div class="code-preview-dot code-preview-dot-green"></div>', content)
-    content = re.sub(r'<span class="code-filename">', '<span class="code-preview-filename">', content)
-    content = re.sub(r'<div class="code-body">', '<div class="code-preview-content">', content)
-    
+    ('div', 'code-block', 'code-preview'),
+    ('div', 'code-header', 'code-preview-header'),
+    ('div', 'code-dots', 'code-preview-dots'),
+    ('div', 'code-dot red', 'code-preview-dot code-preview-dot-red'),
+    ('div', 'code-dot yellow', 'code-preview-dot code-preview-dot-yellow'),
+    ('div', 'code-dot green', 'code-preview-dot code-preview-dot-green'),
+    ('span', 'code-filename', 'code-preview-filename'),
+    ('div', 'code-body', 'code-preview-content'),
+
     # ============================================
     # 5. 代码高亮样式
     # ============================================
-    content = re.sub(r'<span class="text-purple-400">', '<span class="code-keyword">', content)
-    content = re.sub(r'<span class="text-yellow-300">', '<span class="code-class">', content)
-    content = re.sub(r'<span class="text-blue-400">', '<span class="code-function">', content)
-    content = re.sub(r'<span class="text-green-400">', '<span class="code-string">', content)
-    content = re.sub(r'<span class="text-green-300">', '<span class="code-string">', content)
-    
+    ('span', 'text-purple-400', 'code-keyword'),
+    ('span', 'text-yellow-300', 'code-class'),
+    ('span', 'text-blue-400', 'code-function'),
+    ('span', 'text-green-400', 'code-string'),
+    ('span', 'text-green-300', 'code-string'),
+
     # ============================================
     # 6. 目录导航样式
     # ============================================
-    content = re.sub(
-        r'<ol class="space-y-2 text-sm text-gray-700">',
-        '<ol class="toc-list">',
-        content
-    )
-    content = re.sub(
-        r'<li class="flex items-start gap-2"><span class="text-indigo-600 font-medium">(\d+)\.</span>',
-        r'<li class="toc-item"><span class="toc-number">\1.</span>',
-        content
-    )
-    content = re.sub(
-        r'<a href="([^"]+)" class="hover:text-indigo-600 transition-colors">([^<]+)</a>',
-        r'<a href="\1" class="toc-link">\2</a>',
-        content
-    )
-    
+    ('ol', 'space-y-2 text-sm text-gray-700', 'toc-list'),
+
     # ============================================
     # 7. 卡片标题样式
     # ============================================
-    content = re.sub(
-        r'<h4 class="card-title card-title-blue">',
-        '<h4 class="card-title-blue">',
-        content
-    )
-    content = re.sub(
-        r'<h4 class="card-title card-title-green">',
-        '<h4 class="card-title-green">',
-        content
-    )
-    content = re.sub(
-        r'<h4 class="card-title card-title-purple">',
-        '<h4 class="card-title-purple">',
-        content
-    )
-    content = re.sub(
-        r'<h4 class="card-title card-title-orange">',
-        '<h4 class="card-title-orange">',
-        content
-    )
-    
+    ('h4', 'card-title card-title-blue', 'card-title-blue'),
+    ('h4', 'card-title card-title-green', 'card-title-green'),
+    ('h4', 'card-title card-title-purple', 'card-title-purple'),
+    ('h4', 'card-title card-title-orange', 'card-title-orange'),
+
     # ============================================
     # 8. 列表样式
     # ============================================
-    content = re.sub(
-        r'<ul class="text-blue-700 space-y-1">',
-        '<ul class="list-styled list-blue">',
-        content
-    )
-    content = re.sub(
-        r'<ul class="text-green-700 space-y-1">',
-        '<ul class="list-styled list-green">',
-        content
-    )
-    content = re.sub(
-        r'<ul class="text-gray-700 space-y-1">',
-        '<ul class="list-styled list-gray">',
-        content
-    )
-    
+    ('ul', 'text-blue-700 space-y-1', 'list-styled list-blue'),
+    ('ul', 'text-green-700 space-y-1', 'list-styled list-green'),
+    ('ul', 'text-gray-700 space-y-1', 'list-styled list-gray'),
+
     # ============================================
     # 9. 标题样式
     # ============================================
-    content = re.sub(
-        r'<h3 class="text-xl font-semibold text-gray-900 mb-4">',
-        '<h3 class="subsection-title">',
-        content
-    )
-    content = re.sub(
-        r'<h3 class="text-lg font-semibold text-gray-900 mb-3">',
-        '<h3 class="subsection-title-sm">',
-        content
-    )
-    
+    ('h3', 'text-xl font-semibold text-gray-900 mb-4', 'subsection-title'),
+    ('h3', 'text-lg font-semibold text-gray-900 mb-3', 'subsection-title-sm'),
+
     # ============================================
     # 10. 段落样式
     # ============================================
-    content = re.sub(
-        r'<p class="text-gray-700 mb-6">',
-        '<p class="paragraph">',
-        content
-    )
-    content = re.sub(
-        r'<p class="text-gray-600 mb-4">',
-        '<p class="paragraph-secondary">',
-        content
-    )
-    
+    ('p', 'text-gray-700 mb-6', 'paragraph'),
+    ('p', 'text-gray-600 mb-4', 'paragraph-secondary'),
+
     # ============================================
-    # 11. 代码块文件名样式
+    # 11. 代码块容器样式
     # ============================================
-    content = re.sub(
-        r'<div class="absolute top-0 right-0 px-3 py-1 bg-gray-800 text-gray-400 text-xs font-medium rounded-bl-md">([^<]+)</div>',
-        r'<div class="code-filename-badge">\1</div>',
-        content
-    )
-    content = re.sub(
-        r'<div class="relative mb-6">',
-        '<div class="code-wrapper">',
-        content
-    )
-    
+    ('div', 'relative mb-6', 'code-wrapper'),
+
     # ============================================
     # 12. 网格布局样式
     # ============================================
-    content = re.sub(
-        r'<div class="grid grid-cols-1 md:grid-cols-2 gap-6 mb-6">',
-        '<div class="grid-2col">',
-        content
-    )
-    content = re.sub(
-        r'<div class="grid grid-cols-1 md:grid-cols-3 gap-6 mb-6">',
-        '<div class="grid-3col">',
-        content
-    )
-    
-    # ============================================
-    # 13. 链接样式
-    # ============================================
-    content = re.sub(
+    ('div', 'grid grid-cols-1 md:grid-cols-2 gap-6 mb-6', 'grid-2col'),
+    ('div', 'grid grid-cols-1 md:grid-cols-3 gap-6 mb-6', 'grid-3col'),
+]
+
+# 依赖文本内容、相邻标签或其他属性的规则，仍按正则逐条执行
+STYLE_RULES = [
+    rename_classes(STYLE_CLASSES, name='STYLE_CLASSES'),
+
+    # 侧边栏 logo 文字
+    (r'<h1 class="font-bold text-gray-900">LangChain4j</h1>', '<h1 class="sidebar-logo-title">LangChain4j</h1>'),
+    (r'<p class="text-xs text-gray-500">入门指南</p>', '<p class="sidebar-logo-subtitle">入门指南</p>'),
+
+    # 目录条目与链接
+    (
+        r'<li class="flex items-start gap-2"><span class="text-indigo-600 font-medium">(\d+)\.</span>',
+        r'<li class="toc-item"><span class="toc-number">\1.</span>'
+    ),
+    (
+        r'<a href="([^"]+)" class="hover:text-indigo-600 transition-colors">([^<]+)</a>',
+        r'<a href="\1" class="toc-link">\2</a>'
+    ),
+
+    # 代码块文件名
+    (
+        r'<div class="absolute top-0 right-0 px-3 py-1 bg-gray-800 text-gray-400 text-xs font-medium rounded-bl-md">([^<]+)</div>',
+        r'<div class="code-filename-badge">\1</div>'
+    ),
+
+    # 外部链接
+    (
         r'<a href="([^"]*)" target="_blank" class="text-blue-600 hover:underline">',
-        r'<a href="\1" target="_blank" class="link-external">',
-        content
-    )
-    
-    return content
+        r'<a href="\1" target="_blank" class="link-external">'
+    ),
+]
 
-def refactor_file(file_path):
-    """重构单个文件"""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    original_content = content
-    content = refactor_all_styles(content)
-    
-    if content != original_content:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
-        print(f"已更新: {file_path}")
+_STYLE_RULES = compile_rules(STYLE_RULES, 'STYLE_RULES')
+
+# 匹配语义用例 (输入, 期望输出)，--check 时检查，语义见 rewriter/classes.py
+MATCHING_CASES = [
+    # class 前后可有其他属性，标签名不区分大小写，属性间可以换行
+    ('<div id="x" class="code-block">', '<div id="x" class="code-preview">'),
+    ('<div class="code-block" data-lang="java">', '<div class="code-preview" data-lang="java">'),
+    ('<DIV class="code-block">', '<DIV class="code-preview">'),
+    ('<div\nclass="code-block">', '<div\nclass="code-preview">'),
+    ('<svg class="w-6 h-6 text-white" fill="none">', '<svg class="sidebar-logo-svg" fill="none">'),
+    # 标签不符、值不完全相同、单引号不匹配
+    ('<span class="code-block">', '<span class="code-block">'),
+    ('<div class="code-block extra">', '<div class="code-block extra">'),
+    ('<div class="code-block ">', '<div class="code-block ">'),
+    ("<div class='code-block'>", "<div class='code-block'>"),
+    # 不在真实标签内或不是 class 属性
+    ('&lt;div class="code-block"&gt;', '&lt;div class="code-block"&gt;'),
+    ('<div data-class="code-block">', '<div data-class="code-block">'),
+    ('<div title="a > b" class="code-block">', '<div title="a > b" class="code-block">'),
+    ('<h4 class="card-title card-title-blue" id="a">', '<h4 class="card-title-blue" id="a">'),
+    ('<H4 class="card-title card-title-blue">', '<H4 class="card-title-blue">'),
+    ('<h3 class="card-title card-title-blue">', '<h3 class="card-title card-title-blue">'),
+    ('<p class="text-xl text-gray-600 mb-8" id="intro">', '<p class="page-intro" id="intro">'),
+    # 依赖文本内容的规则仍按字面量匹配
+    ('<h1 class="font-bold text-gray-900">LangChain4j</h1>', '<h1 class="sidebar-logo-title">LangChain4j</h1>'),
+    ('<h1 id="t" class="font-bold text-gray-900">LangChain4j</h1>',
+     '<h1 id="t" class="font-bold text-gray-900">LangChain4j</h1>'),
+]
+
+def refactor_all_styles(content):
+    """应用所有重构规则"""
+    return _STYLE_RULES.apply(content)
+
+def print_result(result):
+    """打印单个文件的处理结果，返回是否有更新"""
+    if result.status == UPDATED:
+        print(f"已更新: {result.path}")
         return True
+    if result.status == FAILED:
+        print(f"处理失败: {result.path} - {result.error}")
     else:
-        print(f"无需更新: {file_path}")
-        return False
+        print(f"无需更新: {result.path}")
+    return False
+
+def refactor_file(file_path):
+    """重构单个文件"""
+    return print_result(rewrite_file(file_path, refactor_all_styles))
 
 def main():
     """主函数"""
-    html_files = glob.glob('/Users/qingyu/langchain4j-intro/*.html')
+    parser = add_rules_argument(make_parser('全面重构HTML文件的CSS样式'))
+    parser.add_argument('--check', action='store_true', help='只检查 class 重命名的匹配语义用例，不处理文件')
+    args = parser.parse_args()
+    rules = selected_rules(args, _STYLE_RULES)
+    if args.check:
+        raise SystemExit(0 if check_cases(rules, MATCHING_CASES) else 1)
+    
+    html_files = glob.glob(os.path.join(PROJECT_DIR, '*.html'))
     
     # 排除模板文件
     html_files = [f for f in html_files if 'TEMPLATE' not in f and 'FIXED' not in f]
     
     updated_count = 0
-    for file_path in html_files:
-        if refactor_file(file_path):
+    options = run_options(args, PROJECT_DIR, 'refactor-html-full', rules)
+    for result in run_files(html_files, rules, **options):
+        if print_result(result):
             updated_count += 1
     
     print(f"\n总计更新 {updated_count} 个文件")
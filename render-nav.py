@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+共享导航栏
+按页面注册表渲染一次侧边栏，再把各页面的 <aside> 替换为只改动了激活链接的副本
+"""
+
+import argparse
+import functools
+import os
+import traceback
+from pathlib import Path
+
+from rewriter.navigation import CACHE_NAME, load_partial, splice_nav
+from rewriter.runner import FAILED, UPDATED, rewrite_file
+
+# 项目根目录
+PROJECT_DIR = Path("/Users/qingyu/langchain4j-intro")
+
+# 导航模板页面，不参与替换
+EXCLUDED = ["NAVIGATION_FIXED.html", "UNIFIED_NAV_TEMPLATE.html"]
+
+def print_result(result):
+    """打印单个文件的处理结果，返回是否有更新"""
+    if result.status == UPDATED:
+        print(f"✓ 已更新: {result.path.name}")
+        return True
+    if result.status == FAILED:
+        print(f"✗ 处理失败: {result.path.name} - {result.error}")
+        traceback.print_exception(result.error)
+    else:
+        print(f"ℹ 无需更新: {result.path.name}")
+    return False
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='按页面注册表更新所有页面的导航栏')
+    parser.add_argument('--cache', metavar='PATH', help=f'导航渲染缓存路径（默认为项目目录下的 {CACHE_NAME}）')
+    parser.add_argument('--no-cache', action='store_true', help='不读写渲染缓存')
+    args = parser.parse_args()
+
+    cache_path = None if args.no_cache else (args.cache or os.path.join(PROJECT_DIR, CACHE_NAME))
+    partial, cached = load_partial(cache_path)
+
+    print("开始更新导航栏...")
+    print("ℹ 沿用缓存的导航栏" if cached else f"✓ 已渲染导航栏: {len(partial.slots)} 个页面")
+    print("=" * 60)
+
+    updated_count = 0
+    for path in sorted(PROJECT_DIR.glob("*.html")):
+        if path.name in EXCLUDED:
+            continue
+        if print_result(rewrite_file(path, functools.partial(splice_nav, partial, path.stem))):
+            updated_count += 1
+
+    print("=" * 60)
+    print(f"总计更新 {updated_count} 个文件")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+重写流水线
+一次完成 update-css-refs.py、refactor-css.py、refactor-html-full.py、batch-update.py、
+batch-update-simple.py、batch-update-all.py 的迁移：每个页面只读取、写回一次，
+各阶段按 --stages 声明的顺序在内存中依次执行，语料目录由参数给出，例如：
+    python3 rewrite-pipeline.py /path/to/site
+    python3 rewrite-pipeline.py /path/to/site --stages refactor-css,batch-update-all -j 0 --incremental
+"""
+
+import argparse
+import os
+import traceback
+
+from rewriter.cli import make_parser
+from rewriter.pipeline import DEFAULT_STAGES, STAGES
+
+def parse_stages(text):
+    """把逗号分隔的阶段名解析为列表"""
+    stages = [stage.strip() for stage in text.split(',') if stage.strip()]
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown or not stages:
+        raise argparse.ArgumentTypeError(f"未知的阶段: {', '.join(unknown) or text!r}（可用: {', '.join(STAGES)}）")
+    return stages
+
+def main():
+    """主函数"""
+    parser = make_parser('按声明的顺序在内存中执行各迁移阶段，每个页面只读写一次')
+    parser.add_argument('root', help='语料目录（*.html 所在目录）')
+    parser.add_argument('--stages', type=parse_stages, default=DEFAULT_STAGES, metavar='A,B,...',
+                        help=f"要执行的阶段及其顺序，逗号分隔（默认 {','.join(DEFAULT_STAGES)}）")
+    args = parser.parse_args()
+    if not os.path.isdir(args.root):
+        parser.error(f'找不到语料目录 {args.root}')
+
+    # 规则引擎、进程池等在解析完参数后才导入
+    from rewriter.cli import run_options
+    from rewriter.pipeline import Pipeline, StageError, finish_partial, plan
+    from rewriter.runner import FAILED, UPDATED, count_status, run_files
+
+    print(f"阶段: {' -> '.join(args.stages)}")
+    print("=" * 60)
+    results = []
+    partial_count = 0
+    for stages, paths in plan(args.root, args.stages):
+        pipeline = Pipeline(stages)
+        if stages != tuple(args.stages):
+            print(f"ℹ {len(paths)} 个页面只经过: {' -> '.join(stages)}")
+        options = run_options(args, args.root, f'rewrite-pipeline:{pipeline.__name__}', pipeline)
+        for result in run_files(paths, pipeline, **options):
+            name = os.path.basename(result.path)
+            if result.status == UPDATED:
+                print(f"✓ 已更新: {name}")
+            elif isinstance(result.error, StageError):
+                partial_count += 1
+                written = finish_partial(result.path, result.error)
+                print(f"⚠ 部分阶段出错{'（其余阶段已写回）' if written else ''}: {name} - {result.error}")
+            elif result.status == FAILED:
+                print(f"✗ 处理失败: {name} - {result.error}")
+                traceback.print_exception(result.error)
+            results.append(result)
+
+    counts = count_status(results)
+    print("=" * 60)
+    print(f"共 {len(results)} 个页面：更新 {counts[UPDATED]} 个，部分阶段出错 {partial_count} 个，"
+          f"失败 {counts[FAILED] - partial_count} 个，无需更新 {len(results) - counts[UPDATED] - counts[FAILED]} 个")
+
+if __name__ == '__main__':
+    main()
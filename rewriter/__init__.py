@@ -0,0 +1,28 @@
+"""
+HTML 批量重写脚本共用的工具包
+
+导出的名字在第一次访问时才导入对应模块，只用到 rewriter.cli 等轻量模块的入口不必加载规则引擎
+"""
+
+import importlib
+
+_EXPORTS = {
+    'ClassMap': '.classes',
+    'rename_classes': '.classes',
+    'Rule': '.engine',
+    'RuleSet': '.engine',
+    'compile_rules': '.engine',
+    'fixpoint': '.engine',
+    'literal': '.engine',
+}
+
+__all__ = ['ClassMap', 'Rule', 'RuleSet', 'compile_rules', 'fixpoint', 'literal', 'rename_classes']
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
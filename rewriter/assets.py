@@ -0,0 +1,159 @@
+"""
+样式表内容指纹
+
+把 css/ 下的每个样式表复制为带内容哈希的文件名（main.css -> main.<哈希>.css），
+页面引用改为指纹文件名后即可使用 Cache-Control: immutable 长期缓存。
+样式表内 @import 的本地文件先于导入方处理，导入方的副本引用依赖的指纹文件名，
+因此任何被导入的文件变化都会传递到入口文件的哈希上。
+哈希不变时既不重写副本也不改页面。
+对应关系保存在 assets.json（{原文件名: 指纹文件名}）中；哈希变化后，之前的对应关系按新旧顺序
+记入 assets-history.json，最近 keep 代（默认 1 代）仍被引用的旧指纹文件保留，
+已缓存旧页面或仍在部署中的客户端还能取到对应的样式表，更早的指纹文件才删除。
+"""
+
+import json
+import os
+import re
+
+from .engine import compile_rules
+from .hashing import digest_bytes
+
+MANIFEST_NAME = 'assets.json'
+HISTORY_NAME = 'assets-history.json'
+HASH_LENGTH = 10
+# 默认保留的旧指纹文件代数
+KEEP_GENERATIONS = 1
+
+_HASHED = re.compile(r'\.[0-9a-f]{%d}\.css$' % HASH_LENGTH)
+# @import 'x.css' / @import url(./x.css) 等本地导入（远程地址不含在内）
+_LOCAL_IMPORT = re.compile(r'''(@import\s+(?:url\(\s*)?['"]?(?:\./)?)([\w.-]+\.css)(?=['")\s;])''')
+
+
+def hashed_name(name, data):
+    stem = name[:-len('.css')]
+    return f'{stem}.{digest_bytes(data)[:HASH_LENGTH]}.css'
+
+
+def _read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _load_manifest(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _load_history(path):
+    """之前各代的对应关系，新的在前"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return []
+    if not isinstance(data, list):
+        return []
+    return [generation for generation in data if isinstance(generation, dict)]
+
+
+def _write_json(path, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write('\n')
+    os.replace(tmp_path, path)
+
+
+def generated_files(css_dir):
+    """当前和保留的各代指纹文件名"""
+    names = set(_load_manifest(os.path.join(css_dir, MANIFEST_NAME)).values())
+    for generation in _load_history(os.path.join(css_dir, HISTORY_NAME)):
+        names.update(generation.values())
+    return names
+
+
+def fingerprint_assets(css_dir, keep=KEEP_GENERATIONS):
+    """
+    为 css_dir 下的样式表生成指纹副本；keep 为保留的旧指纹文件代数
+    返回 {'assets': {原文件名: 指纹文件名}, 'written': [...], 'removed': [...]}
+    """
+    manifest_path = os.path.join(css_dir, MANIFEST_NAME)
+    history_path = os.path.join(css_dir, HISTORY_NAME)
+    previous = _load_manifest(manifest_path)
+    history = _load_history(history_path)
+    generated = set(previous.values())
+    for generation in history:
+        generated.update(generation.values())
+    sources = sorted(name for name in os.listdir(css_dir)
+                     if name.endswith('.css') and name not in generated and not _HASHED.search(name))
+    sources_set = set(sources)
+    assets = {}
+    written = []
+    visiting = set()
+
+    def visit(name):
+        if name in assets or name in visiting:
+            return
+        visiting.add(name)
+        text = _read(os.path.join(css_dir, name)).decode('utf-8')
+        for m in _LOCAL_IMPORT.finditer(text):
+            if m.group(2) in sources_set:
+                visit(m.group(2))
+
+        def replace(m):
+            # 循环导入时依赖尚未生成指纹，保留原文件名
+            target = assets.get(m.group(2))
+            return m.group(1) + target if target else m.group()
+
+        data = _LOCAL_IMPORT.sub(replace, text).encode('utf-8')
+        target = hashed_name(name, data)
+        path = os.path.join(css_dir, target)
+        if not os.path.exists(path) or _read(path) != data:
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            written.append(target)
+        assets[name] = target
+        visiting.discard(name)
+
+    for name in sources:
+        visit(name)
+
+    # 对应关系变化时上一代记入历史，只保留最近 keep 代
+    kept = history
+    if previous and assets != previous:
+        kept = [previous] + [generation for generation in history if generation != previous]
+    kept = kept[:keep]
+    current = set(assets.values())
+    for generation in kept:
+        current.update(generation.values())
+    removed = []
+    for target in sorted(generated - current):
+        path = os.path.join(css_dir, target)
+        if _HASHED.search(target) and os.path.exists(path):
+            os.remove(path)
+            removed.append(target)
+
+    if assets != previous:
+        _write_json(manifest_path, assets)
+    if kept != history:
+        _write_json(history_path, kept)
+    return {'assets': assets, 'written': written, 'removed': removed}
+
+
+def href_rules(assets, prefix='css/'):
+    """
+    把页面中对样式表的引用（原文件名或任意旧指纹文件名）改为当前指纹文件名
+    引用已是当前指纹时替换结果与原文相同，页面不会被重写
+    """
+    table = []
+    for name, target in sorted(assets.items()):
+        stem = re.escape(prefix + name[:-len('.css')])
+        table.append((rf'href="{stem}(?:\.[0-9a-f]{{{HASH_LENGTH}}})?\.css"',
+                      f'href="{prefix}{target}"'))
+    return compile_rules(table, 'ASSET_HREFS')
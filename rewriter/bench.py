@@ -0,0 +1,194 @@
+"""
+重写脚本基准测试
+
+用现有 *.html 页面的真实骨架（头部、侧边栏导航分组、目录、各个 <section>
+及其中的代码预览块）拼出任意规模的合成语料，先把片段还原成迁移前的
+Tailwind 写法，让各脚本的规则真正命中；页面按需逐个生成，不把整个语料放进内存。
+
+每个用例在独立子进程中运行，单独统计吞吐量（MB/s、文件/s）和峰值 RSS，
+结果可保存为基线，之后与基线比较并标记超过阈值的性能回退。
+"""
+
+import json
+import random
+import re
+import resource
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from time import perf_counter
+
+from .classes import ClassMap
+from .loader import SCRIPTS_DIR, load_script
+
+# (脚本, 核心函数)
+CASES = [
+    ('refactor-html-full.py', 'refactor_all_styles'),
+    ('refactor-css.py', 'refactor_code_highlight_styles'),
+    ('batch-update-all.py', 'rewrite_content'),
+    ('update-css-refs.py', 'update_css_content'),
+]
+
+DEFAULT_SIZES = (10, 1000, 50000)
+DEFAULT_THRESHOLD = 0.10
+
+# 模板页不是真实页面
+_EXCLUDED = ('NAVIGATION_FIXED.html', 'UNIFIED_NAV_TEMPLATE.html')
+
+_HEAD = re.compile(r'^.*?<body[^>]*>', re.DOTALL)
+_SIDEBAR = re.compile(r'<aside\b.*?</aside>', re.DOTALL)
+_SECTION = re.compile(r'<section\b.*?</section>', re.DOTALL)
+_MAIN = re.compile(r'<main\b', re.DOTALL)
+
+# 正则规则无法自动反推，手写对应的迁移前写法
+_MANUAL_REVERSE = [
+    (r'<li class="toc-item"><span class="toc-number">(\d+)\.</span>',
+     r'<li class="flex items-start gap-2"><span class="text-indigo-600 font-medium">\1.</span>'),
+    (r'<a href="([^"]+)" class="toc-link">',
+     r'<a href="\1" class="hover:text-indigo-600 transition-colors">'),
+    (r'<div class="code-filename-badge">',
+     r'<div class="absolute top-0 right-0 px-3 py-1 bg-gray-800 text-gray-400 text-xs font-medium rounded-bl-md">'),
+    (r'<!-- 模块化CSS -->\s*<link rel="stylesheet" href="css/main\.css">',
+     r'<link rel="stylesheet" href="styles.css">'),
+]
+
+
+def _reverse_table():
+    """由各脚本的字面量规则和 class 重命名表反推"语义类 -> Tailwind 类"的还原表"""
+    table = []
+    for script, _ in CASES:
+        module = load_script(script)
+        for value in vars(module).values():
+            for rule in getattr(value, 'rules', ()):
+                if getattr(rule, 'literal', None) and rule.expanded and rule.expanded != rule.literal:
+                    table.append((rule.expanded, rule.literal))
+            for stage in getattr(value, 'stages', ()):
+                func = getattr(stage, 'func', None)
+                if isinstance(func, ClassMap):
+                    table.extend((f'<{tag} class="{new}"', f'<{tag} class="{old}"')
+                                 for tag, old, new in func.renames if tag)
+    # 长的先还原，避免短串截断长串
+    table.sort(key=lambda item: len(item[0]), reverse=True)
+    return table
+
+
+def _derefactor(fragment, table):
+    for pattern, replacement in _MANUAL_REVERSE:
+        fragment = re.sub(pattern, replacement, fragment)
+    for new, old in table:
+        fragment = fragment.replace(new, old)
+    return fragment
+
+
+def build_pools():
+    """从现有页面切出片段池"""
+    table = _reverse_table()
+    pools = {'head': [], 'sidebar': [], 'prologue': [], 'section': [], 'epilogue': []}
+    for path in sorted(SCRIPTS_DIR.glob('*.html')):
+        if path.name in _EXCLUDED:
+            continue
+        page = path.read_text(encoding='utf-8')
+        head = _HEAD.match(page)
+        sidebar = _SIDEBAR.search(page)
+        main = _MAIN.search(page)
+        sections = list(_SECTION.finditer(page))
+        if not (head and sidebar and main and sections):
+            continue
+        pools['head'].append(head.group())
+        pools['sidebar'].append(page[head.end():sidebar.end()])
+        pools['prologue'].append(page[sidebar.end():sections[0].start()])
+        pools['section'].extend(match.group() for match in sections)
+        pools['epilogue'].append(page[sections[-1].end():])
+    return {key: [_derefactor(fragment, table) for fragment in fragments]
+            for key, fragments in pools.items()}
+
+
+def generate_pages(pools, count, seed=0):
+    """逐个产出合成页面"""
+    rng = random.Random(seed)
+    for _ in range(count):
+        sections = rng.choices(pools['section'], k=rng.randint(3, 9))
+        yield ''.join([
+            rng.choice(pools['head']),
+            rng.choice(pools['sidebar']),
+            rng.choice(pools['prologue']),
+            '\n\n'.join(sections),
+            rng.choice(pools['epilogue']),
+        ])
+
+
+def _peak_rss():
+    """当前进程的峰值 RSS（字节）"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def run_case(script, func_name, size, seed=0):
+    """在当前进程中运行一个用例（由子进程调用）"""
+    func = getattr(load_script(script), func_name)
+    pools = build_pools()
+    elapsed = 0.0
+    total_bytes = 0
+    for page in generate_pages(pools, size, seed):
+        total_bytes += len(page.encode('utf-8'))
+        start = perf_counter()
+        func(page)
+        elapsed += perf_counter() - start
+    elapsed = max(elapsed, 1e-9)
+    return {
+        'case': f'{script}:{func_name}',
+        'pages': size,
+        'bytes': total_bytes,
+        'seconds': elapsed,
+        'mb_per_s': total_bytes / elapsed / 1e6,
+        'files_per_s': size / elapsed,
+        'peak_rss_mb': _peak_rss() / 1e6,
+    }
+
+
+def run_all(sizes=DEFAULT_SIZES, cases=CASES, seed=0):
+    """逐个用例在新的 spawn 子进程中运行，保证峰值 RSS 互不影响"""
+    results = []
+    for script, func_name in cases:
+        for size in sizes:
+            with ProcessPoolExecutor(1, mp_context=get_context('spawn')) as pool:
+                results.append(pool.submit(run_case, script, func_name, size, seed).result())
+    return results
+
+
+def _key(result):
+    return f"{result['case']}@{result['pages']}"
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """返回吞吐量比基线下降超过 threshold 的用例 [(结果, 基线), ...]"""
+    regressions = []
+    for result in results:
+        base = baseline.get(_key(result))
+        if base and result['mb_per_s'] < base['mb_per_s'] * (1 - threshold):
+            regressions.append((result, base))
+    return regressions
+
+
+def load_baseline(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_baseline(path, results):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({_key(result): result for result in results}, f, ensure_ascii=False, indent=2)
+
+
+def print_results(results, baseline=None):
+    baseline = baseline or {}
+    print(f"{'用例':<52}{'页数':>7}{'MB/s':>9}{'文件/s':>10}{'峰值RSS(MB)':>13}{'对比基线':>10}")
+    for result in results:
+        base = baseline.get(_key(result))
+        change = f"{(result['mb_per_s'] / base['mb_per_s'] - 1) * 100:+.1f}%" if base else '-'
+        print(f"{result['case']:<52}{result['pages']:>7}{result['mb_per_s']:>9.2f}"
+              f"{result['files_per_s']:>10.1f}{result['peak_rss_mb']:>13.1f}{change:>10}")
@@ -0,0 +1,200 @@
+"""
+字节模式重写
+
+规则模式几乎都是 ASCII 标签和类名，可以直接编译成 bytes 正则，在 mmap 上匹配 UTF-8 原文：
+没有任何规则命中的文件既不解码也不复制。
+
+只有能证明与 str 语义等价的规则才会编译字节版本：
+- 不使用 IGNORECASE、\\d、\\w、\\b 等依赖 Unicode 字符属性的写法；
+- 可能匹配非 ASCII 字符的元素（.、[^...]、\\S）只能作为无上限重复（*、+、*?、+?）的唯一内容，
+  这样按字节匹配与按字符匹配覆盖的范围相同；
+- 模式中不出现非 ASCII 字符（字面量规则直接按 UTF-8 编码，不受此限），且不能匹配空串。
+文本模式读取会把 \\r\\n 转成 \\n，含 \\r 的文件整份回退到文本模式处理；
+str 的 \\s 还匹配 \\x1c-\\x1f 和 Unicode 空白，用到 \\s/\\S 的规则真正命中时
+再检查这些字符，存在时该规则回退到文本模式执行。
+"""
+
+import mmap
+import re
+from contextlib import contextmanager
+
+try:
+    import re._parser as sre_parse
+except ImportError:
+    # Python 3.10 及更早
+    import sre_parse
+
+_c = sre_parse
+_MAXREPEAT = _c.MAXREPEAT
+# 占有量词和原子组是 Python 3.11 新增的操作码，旧版本的解析结果中不会出现
+_POSSESSIVE_REPEAT = getattr(_c, 'POSSESSIVE_REPEAT', None)
+_ATOMIC_GROUP = getattr(_c, 'ATOMIC_GROUP', None)
+_REPEATS = tuple(op for op in (_c.MAX_REPEAT, _c.MIN_REPEAT, _POSSESSIVE_REPEAT) if op is not None)
+_SPACE = (_c.CATEGORY_SPACE, _c.CATEGORY_NOT_SPACE)
+_SPACE_ESCAPE = re.compile(r'\\[sS]')
+_SAFE_AT = (_c.AT_BEGINNING, _c.AT_BEGINNING_LINE, _c.AT_BEGINNING_STRING,
+            _c.AT_END, _c.AT_END_LINE, _c.AT_END_STRING)
+
+# str 的 \s 会匹配而 bytes 的 \s 不匹配的字符（UTF-8 编码），逐个用 find 查找
+_TEXT_SPACE = (b'\x1c', b'\x1d', b'\x1e', b'\x1f', b'\xc2\x85', b'\xc2\xa0',
+               b'\xe1\x9a\x80', b'\xe2\x81\x9f', b'\xe3\x80\x80')
+_TEXT_SPACE_RANGE = re.compile(rb'\xe2\x80[\x80-\x8a\xa8\xa9\xaf]')
+
+
+class _Unsafe(Exception):
+    pass
+
+
+def _check_class(items):
+    """返回字符类是否可能匹配非 ASCII 字符"""
+    wide = False
+    for op, av in items:
+        if op is _c.NEGATE:
+            wide = True
+        elif op is _c.CATEGORY:
+            if av not in _SPACE:
+                raise _Unsafe
+            wide = wide or av is _c.CATEGORY_NOT_SPACE
+        elif op is _c.LITERAL:
+            if av > 0x7f:
+                raise _Unsafe
+        elif op is _c.RANGE:
+            if av[1] > 0x7f:
+                raise _Unsafe
+        else:
+            raise _Unsafe
+    return wide
+
+
+def _wide(op, av):
+    """单个字符元素是否可能匹配非 ASCII 字符；不是单字符元素时返回 None"""
+    if op is _c.ANY:
+        return True
+    if op is _c.NOT_LITERAL:
+        if av > 0x7f:
+            raise _Unsafe
+        return True
+    if op is _c.IN:
+        return _check_class(av)
+    if op is _c.CATEGORY:
+        if av not in _SPACE:
+            raise _Unsafe
+        return av is _c.CATEGORY_NOT_SPACE
+    return None
+
+
+def _starts_ascii(items, tail):
+    """
+    items 是否必然从一个只能匹配 ASCII 字节的元素开始；items 可以为空时取决于 tail（其后内容的结论）
+    宽元素的重复后面必须满足这一点，否则回溯可能停在多字节字符中间，分组边界与 str 不同
+    """
+    for index, (op, av) in enumerate(items):
+        if op is _c.AT:
+            continue
+        if op is _c.LITERAL:
+            return True
+        wide = _wide(op, av)
+        if wide is not None:
+            return not wide
+        if op in _REPEATS:
+            low, _, body = av
+            if not _starts_ascii(body, False):
+                return False
+            if low:
+                return True
+            continue
+        if op is _c.SUBPATTERN:
+            return _starts_ascii(av[-1], _starts_ascii(items[index + 1:], tail))
+        if op is _c.BRANCH:
+            rest = _starts_ascii(items[index + 1:], tail)
+            return all(_starts_ascii(branch, rest) for branch in av[1])
+        return False
+    return tail
+
+
+def _check(items, tail):
+    """tail：items 之后的内容是否必然从 ASCII 字节开始（模式结尾视为是）"""
+    for index, (op, av) in enumerate(items):
+        if op is _c.LITERAL:
+            if av > 0x7f:
+                raise _Unsafe
+            continue
+        wide = _wide(op, av)
+        if wide is not None:
+            if wide:
+                # 单独出现时一个字符对应多个字节，计数会不同
+                raise _Unsafe
+            continue
+        rest = items[index + 1:]
+        if op in _REPEATS:
+            low, high, body = av
+            if len(body) == 1 and _wide(*body[0]):
+                # 懒惰重复在模式结尾只取最少的字节，后面必须有 ASCII 元素作为终点
+                follows = _starts_ascii(rest, tail and op is not _c.MIN_REPEAT)
+                if high is not _MAXREPEAT or low > 1 or not follows:
+                    raise _Unsafe
+                continue
+            # 循环体之后可能是下一轮循环体，也可能是后续内容
+            _check(body, _starts_ascii(body, False) and _starts_ascii(rest, tail))
+        elif op is _c.SUBPATTERN:
+            _check(av[-1], _starts_ascii(rest, tail))
+        elif _ATOMIC_GROUP is not None and op is _ATOMIC_GROUP:
+            _check(av, _starts_ascii(rest, tail))
+        elif op is _c.BRANCH:
+            for branch in av[1]:
+                _check(branch, _starts_ascii(rest, tail))
+        elif op in (_c.ASSERT, _c.ASSERT_NOT):
+            _check(av[1], False)
+        elif op is _c.GROUPREF_EXISTS:
+            _check(av[1], _starts_ascii(rest, tail))
+            if av[2] is not None:
+                _check(av[2], _starts_ascii(rest, tail))
+        elif op is _c.AT:
+            if av not in _SAFE_AT:
+                raise _Unsafe
+        elif op is not _c.GROUPREF:
+            raise _Unsafe
+
+
+def compile_bytes(pattern, flags=0):
+    """
+    返回 (bytes 正则, 是否用到 \\s/\\S)；不能证明与 str 语义等价时返回 (None, False)
+    """
+    if flags & (re.IGNORECASE | re.LOCALE):
+        return None, False
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+        # 能匹配空串的模式会在多字节字符内部的每个字节位置产生空匹配
+        if parsed.getwidth()[0] == 0:
+            raise _Unsafe
+        _check(parsed, True)
+        regex = re.compile(pattern.encode('utf-8'), flags & ~re.UNICODE)
+    except (_Unsafe, re.error):
+        return None, False
+    return regex, _SPACE_ESCAPE.search(pattern) is not None
+
+
+def text_only(data):
+    """内容含 \\r，整份需要按文本模式处理"""
+    return data.find(b'\r') >= 0
+
+
+def has_text_space(data):
+    """内容是否含有 str 的 \\s 能匹配而 bytes 的 \\s 不能匹配的字符"""
+    return (any(data.find(chars) >= 0 for chars in _TEXT_SPACE)
+            or _TEXT_SPACE_RANGE.search(data) is not None)
+
+
+@contextmanager
+def map_file(path):
+    """只读映射文件内容；空文件产出 b''"""
+    with open(path, 'rb') as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            yield b''
+            return
+        try:
+            yield data
+        finally:
+            data.close()
@@ -0,0 +1,64 @@
+"""
+脚本规则链
+
+把若干脚本中的规则集或处理函数按顺序串成一个处理函数，供开发服务器和监视模式共用；
+脚本文件修改后自动重新加载，规则指纹随之变化。
+"""
+
+import argparse
+import os
+import threading
+
+from .hashing import fingerprint
+from .loader import SCRIPTS_DIR, load_script, reload_script
+
+# 默认规则链：(脚本, 模块中的规则集或处理函数)，按顺序执行
+DEFAULT_CHAIN = [
+    ('update-css-refs.py', 'update_css_content'),
+    ('refactor-css.py', 'ALL_RULES'),
+    ('refactor-html-full.py', '_STYLE_RULES'),
+    ('batch-update-all.py', 'RULES'),
+]
+
+
+def parse_spec(text):
+    """把命令行中的 脚本:名称 解析为 (脚本, 名称)，用作 argparse 的 type"""
+    script, sep, name = text.partition(':')
+    if not sep or not script.endswith('.py') or not name:
+        raise argparse.ArgumentTypeError(f'格式应为 脚本.py:规则名，例如 refactor-css.py:ALL_RULES（收到 {text!r}）')
+    return script, name
+
+
+class RuleChain:
+    """按顺序执行的脚本规则；处理函数返回 None 表示不修改"""
+
+    def __init__(self, specs=DEFAULT_CHAIN):
+        self.specs = list(specs)
+        self.lock = threading.Lock()
+        self.mtimes = [None] * len(self.specs)
+        self.transforms = [None] * len(self.specs)
+        self.key = None
+        self.refresh()
+
+    def refresh(self):
+        """重新加载修改过的脚本，返回当前的规则指纹"""
+        mtimes = [os.stat(SCRIPTS_DIR / script).st_mtime_ns for script, _ in self.specs]
+        with self.lock:
+            if mtimes == self.mtimes:
+                return self.key
+            transforms = list(self.transforms)
+            for i, (script, name) in enumerate(self.specs):
+                if mtimes[i] != self.mtimes[i]:
+                    module = load_script(script) if self.mtimes[i] is None else reload_script(script)
+                    transforms[i] = getattr(module, name)
+            self.transforms = transforms
+            self.key = fingerprint(*transforms)
+            self.mtimes = mtimes
+            return self.key
+
+    def __call__(self, content):
+        for transform in self.transforms:
+            new_content = transform(content)
+            if new_content is not None:
+                content = new_content
+        return content
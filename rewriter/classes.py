@@ -0,0 +1,182 @@
+"""
+class 属性重命名
+
+把"整个 class 属性 -> 新 class"和"单个类名 -> 新类名"两种映射表编译成一个处理阶段：
+一次扫描找出所有 class 属性，每个属性只查一次字典（逐个映射类名时只切分一次），
+耗时取决于文件中 class 属性的数量，与映射条目数无关。
+
+匹配语义（与逐条替换 <tag class="..."> 字面量的旧规则不同）：
+- class 属性可以出现在开始标签中的任意位置，前后可有其他属性，其他属性原样保留；
+- 标签名不区分大小写（<DIV class="..."> 同样匹配），替换时保留原文的大小写；
+- 整属性映射按值精确比较（不忽略多余空白，不匹配多一个类名的值），只认双引号；
+- class 前必须是空白且位于真实的开始标签内：转义的示例代码（&lt;div class="..."&gt;）、
+  data-class="..." 等其他属性不匹配；class 之前的属性值中含有 > 时同样不匹配（宁缺勿错）。
+使用重命名表的脚本用 --check 检查这些用例（见各脚本的 MATCHING_CASES）。
+"""
+
+import re
+
+from .engine import _trie_pattern
+from .hashing import fingerprint
+
+# class 属性的值（分组 1）；按字面量 class=" 快速定位，需要修改时才回头确认所在标签
+_CLASS_ATTR = r'class="([^"]*)"'
+_TAG_NAME = r'<([A-Za-z][A-Za-z0-9:-]*)[ \t\n\r\f]'
+# 空白只认 ASCII 空白（HTML 规范如此），字节模式下语义相同
+_TEXT = re.compile(_TAG_NAME), '<', '>', ' \t\n\r\f'
+_BYTES = re.compile(_TAG_NAME.encode('ascii')), b'<', b'>', b' \t\n\r\f'
+
+
+def _tag_at(content, pos, syntax):
+    """
+    pos 处的 class 属性所在开始标签的标签名（小写）
+    不是独立的属性或不在标签内（如转义后的示例代码）时返回 None
+    """
+    tag_name, lt, gt, spaces = syntax
+    if pos == 0 or content[pos - 1:pos] not in spaces:
+        return None
+    start = content.rfind(lt, 0, pos)
+    if start < 0 or content.find(gt, start, pos) >= 0:
+        return None
+    m = tag_name.match(content, start)
+    if m is None:
+        return None
+    tag = m.group(1)
+    return (tag if isinstance(tag, str) else tag.decode('ascii')).lower()
+
+
+class ClassMap:
+    """
+    class 重命名表，可直接作为规则表中的处理函数
+    renames 为 [(标签, 原 class, 新 class), ...]，标签为 None 时匹配任意标签，原 class 按原文精确比较；
+    tokens 为 {原类名: 新类名}，新类名可以为空（删除）或包含多个类名。
+    整属性映射优先，命中后不再逐个映射类名
+    """
+
+    def __init__(self, renames=(), tokens=None, name='classes'):
+        self.__name__ = name
+        self.renames = list(renames)
+        self.tokens = dict(tokens or {})
+        # {原 class: {标签或 None: 新 class}}，按值查表，绝大多数属性一次字典查找即可排除
+        self.whole = {}
+        # 性能分析时按映射统计命中：{(原 class, 标签或 None): 序号}、{原类名: 序号}，序号与 labels() 对应
+        self._whole_index = {}
+        for i, (tag, old, new) in enumerate(self.renames):
+            key = tag.lower() if tag else None
+            self.whole.setdefault(old, {})[key] = new
+            self._whole_index[old, key] = i
+        self._token_index = {name: len(self.renames) + i for i, name in enumerate(self.tokens)}
+        # 只有整属性映射时把所有原 class 编入正则，值不在表中的属性在正则引擎内就被排除；
+        # 有类名映射时每个属性都要切分，匹配任意值
+        if self.tokens or not self.whole:
+            pattern = _CLASS_ATTR
+        else:
+            # 每个值后接引号，互不为前缀，才能编成前缀树
+            keys = [old + '"' for old in self.whole]
+            pattern = 'class="(?=' + _trie_pattern(keys) + ')([^"]*)"'
+        self._text = re.compile(pattern)
+        self._bytes = re.compile(pattern.encode('utf-8'))
+
+    def _map_tokens(self, value, counts=None):
+        mapped = []
+        changed = False
+        tokens = self.tokens
+        for name in value.split():
+            replacement = tokens.get(name)
+            if replacement is None:
+                mapped.append(name)
+            else:
+                changed = True
+                mapped.extend(replacement.split())
+                if counts is not None:
+                    _count(counts, self._token_index[name], name, replacement)
+        if not changed:
+            return None
+        # 映射后可能出现重复的类名，保留第一次出现的位置
+        return ' '.join(dict.fromkeys(mapped))
+
+    def rename(self, tag, value, counts=None):
+        """
+        返回 tag 标签上 class 值的新值；无需修改时返回 None
+        传入 counts 时把命中的映射记入其中（{序号: [命中, 匹配字节, 字节变化]}）
+        """
+        by_tag = self.whole.get(value)
+        if by_tag is not None:
+            key = tag if tag in by_tag else None
+            new = by_tag.get(key)
+            if new is not None:
+                if counts is not None:
+                    _count(counts, self._whole_index[value, key], value, new)
+                return None if new == value else new
+        return self._map_tokens(value, counts) if self.tokens else None
+
+    def _apply(self, content, regex, syntax, decode, encode, counts=None):
+        pieces = []
+        last = 0
+        for m in regex.finditer(content):
+            raw = m.group(1)
+            tag = _tag_at(content, m.start(), syntax)
+            if tag is None:
+                continue
+            new = self.rename(tag, decode(raw), counts)
+            if new is not None:
+                pieces.append(content[last:m.start(1)])
+                pieces.append(encode(new))
+                last = m.end(1)
+        if not pieces:
+            return content
+        pieces.append(content[last:])
+        return content[:0].join(pieces)
+
+    def __call__(self, content):
+        return self._apply(content, self._text, _TEXT, _same, _same)
+
+    def apply_bytes(self, data):
+        """字节版本：只解码 class 属性的值；没有修改时原样返回 data"""
+        return self._apply(data, self._bytes, _BYTES, _decode, _encode)
+
+    def apply_counted(self, content):
+        """性能分析用：返回 (新内容, {映射序号: [命中, 匹配字节, 字节变化]})"""
+        counts = {}
+        return self._apply(content, self._text, _TEXT, _same, _same, counts), counts
+
+    def labels(self):
+        """各映射在性能分析报告中显示的模式，顺序为整属性映射、类名映射"""
+        labels = [f'<{tag or "*"} class="{old}">' for tag, old, _ in self.renames]
+        labels.extend(f'class~="{name}"' for name in self.tokens)
+        return labels
+
+    def fingerprint(self):
+        return fingerprint(self.__name__, self.renames, sorted(self.tokens.items()))
+
+    def __repr__(self):
+        return f'ClassMap({self.__name__!r}, {len(self.renames)} 条整属性映射, {len(self.tokens)} 个类名映射)'
+
+
+def _count(counts, index, old, new):
+    entry = counts.get(index)
+    if entry is None:
+        entry = counts[index] = [0, 0, 0]
+    entry[0] += 1
+    entry[1] += len(old.encode('utf-8'))
+    entry[2] += len(new.encode('utf-8')) - len(old.encode('utf-8'))
+
+
+def _same(value):
+    return value
+
+
+def _decode(value):
+    return value.decode('utf-8')
+
+
+def _encode(value):
+    return value.encode('utf-8')
+
+
+def rename_classes(renames=(), tokens=None, name='classes'):
+    """
+    构造 class 重命名阶段，放入规则表中与其他规则按顺序执行
+    name 用于性能分析报告中标识该阶段
+    """
+    return ClassMap(renames, tokens, name)
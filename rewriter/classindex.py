@@ -0,0 +1,303 @@
+"""
+class 属性索引
+
+把语料中每个 class="..." 的值、所在文件、行号和标签（不在真实标签内时为空，如代码示例中的文本）
+以及值中的各个类名记录到语料目录下的 SQLite 数据库中，按文件增量更新：
+stat 与记录一致（且修改时间早于上次索引）时不读取文件，内容哈希不变时只更新 stat。
+
+重写引擎用它在读取文件之前排除规则不可能命中的文件：规则集中每条规则都能给出
+"必须出现的 class 值（整值或前缀）或类名"时，只有索引中含有其中之一的文件才需要处理；
+任何一条规则给不出这样的条件（自定义处理函数、不含 class=" 的正则等），就不排除任何文件。
+规则按顺序执行，若原文不满足任何一条规则的条件，每条规则都不会命中，文件必然不变。
+"""
+
+import bisect
+import os
+import re
+try:
+    import re._parser as sre_parse
+except ImportError:
+    # Python 3.10 及更早
+    import sre_parse
+import sqlite3
+import time
+from pathlib import Path
+
+from .classes import _TEXT, ClassMap, _tag_at
+from .engine import FunctionStage, RuleSet
+from .hashing import digest_bytes
+
+INDEX_NAME = '.class-index.sqlite'
+INDEX_VERSION = 1
+
+# 每个 class=" 出现处都记录一次（零宽匹配，值中嵌套的 class=" 也不会漏掉）；值到引号或文件结尾为止
+_ATTR = re.compile(r'(?=class="([^"]*))')
+# 前缀查询的上界
+_MAX_CHAR = '\U0010ffff'
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL,
+    mtime_ns INTEGER, size INTEGER, digest TEXT, indexed_at INTEGER
+);
+CREATE TABLE IF NOT EXISTS attrs (
+    id INTEGER PRIMARY KEY, file_id INTEGER NOT NULL, line INTEGER NOT NULL, tag TEXT, value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tokens (attr_id INTEGER NOT NULL, token TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS attrs_value ON attrs (value);
+CREATE INDEX IF NOT EXISTS attrs_file ON attrs (file_id);
+CREATE INDEX IF NOT EXISTS tokens_token ON tokens (token);
+CREATE INDEX IF NOT EXISTS tokens_attr ON tokens (attr_id);
+'''
+
+# 原子组和占有量词是 Python 3.11 新增的操作码，旧版本中没有
+_ATOMIC_GROUP = getattr(sre_parse, 'ATOMIC_GROUP', None)
+_REQUIRED = tuple(op for op in (sre_parse.SUBPATTERN, _ATOMIC_GROUP) if op is not None)
+_REPEATS = tuple(op for op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT,
+                               getattr(sre_parse, 'POSSESSIVE_REPEAT', None)) if op is not None)
+
+
+def extract_attrs(content):
+    """返回 [(行号, 标签或 None, class 值), ...]"""
+    newlines = None
+    attrs = []
+    for m in _ATTR.finditer(content):
+        if newlines is None:
+            newlines = [nl.start() for nl in re.finditer('\n', content)]
+        line = bisect.bisect_left(newlines, m.start()) + 1
+        attrs.append((line, _tag_at(content, m.start(), _TEXT), m.group(1)))
+    return attrs
+
+
+def _required_chunks(items, chunks):
+    """收集模式中必然出现的连续字面量片段"""
+    current = []
+    for op, av in items:
+        if op is sre_parse.LITERAL:
+            current.append(chr(av))
+            continue
+        if current:
+            chunks.append(''.join(current))
+            current = []
+        if op in _REQUIRED:
+            # (?i:...) 内的字面量不区分大小写，不能作为条件
+            if op is _ATOMIC_GROUP or not av[1] & re.IGNORECASE:
+                _required_chunks(av[-1], chunks)
+        elif op in _REPEATS and av[0] >= 1:
+            _required_chunks(av[2], chunks)
+    if current:
+        chunks.append(''.join(current))
+
+
+def rule_requirement(rule):
+    """
+    单条正则规则对 class 属性的要求：('exact', 值)、('prefix', 前缀)，无法给出时返回 None
+    """
+    if rule.template_error is not None:
+        return None
+    parsed = sre_parse.parse(rule.pattern, rule.flags)
+    if parsed.state.flags & re.IGNORECASE:
+        return None
+    chunks = []
+    _required_chunks(parsed, chunks)
+    best = None
+    for chunk in chunks:
+        position = chunk.find('class="')
+        if position < 0:
+            continue
+        value = chunk[position + len('class="'):]
+        end = value.find('"')
+        if end >= 0:
+            return 'exact', value[:end]
+        if best is None or len(value) > len(best[1]):
+            best = 'prefix', value
+    return best
+
+
+def requirements(transform, strict=True):
+    """
+    规则集命中所需的条件列表 [(类型, 值, 标签), ...]；任一规则无法给出条件时返回 None
+    正则规则为 ('exact' / 'prefix', 值, None)，任何位置的 class=" 都算；
+    ClassMap 只处理真实标签上的属性：整属性映射为 ('class', 原 class, 标签或 None)，类名映射为 ('token', 类名, None)
+    strict=False 时跳过无法给出条件的规则，只返回能给出的条件（用于统计哪些 class 已有规则处理）
+    """
+    if isinstance(transform, ClassMap):
+        stages = [FunctionStage(transform)]
+    elif isinstance(transform, RuleSet):
+        stages = transform.stages
+    else:
+        return None
+    result = []
+    for stage in stages:
+        if isinstance(stage, FunctionStage):
+            if not isinstance(stage.func, ClassMap):
+                if strict:
+                    return None
+                continue
+            result.extend(('class', old, tag) for old, by_tag in stage.func.whole.items() for tag in by_tag)
+            result.extend(('token', token, None) for token in stage.func.tokens)
+            continue
+        for rule in stage.rules:
+            requirement = rule_requirement(rule)
+            if requirement is None:
+                if strict:
+                    return None
+                continue
+            result.append(requirement + (None,))
+    return result
+
+
+class ClassIndex:
+    """语料目录下的 class 属性索引"""
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        self.db = sqlite3.connect(self.path)
+        if self._version() != str(INDEX_VERSION):
+            self.db.executescript('DROP TABLE IF EXISTS meta; DROP TABLE IF EXISTS files; '
+                                  'DROP TABLE IF EXISTS attrs; DROP TABLE IF EXISTS tokens;')
+            self.db.executescript(_SCHEMA)
+            self.db.execute('INSERT INTO meta VALUES (?, ?)', ('version', str(INDEX_VERSION)))
+            self.db.commit()
+
+    def _version(self):
+        try:
+            row = self.db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        except sqlite3.Error:
+            return None
+        return row[0] if row else None
+
+    def close(self):
+        self.db.close()
+
+    def _remove(self, file_id):
+        self.db.execute('DELETE FROM tokens WHERE attr_id IN (SELECT id FROM attrs WHERE file_id = ?)',
+                        (file_id,))
+        self.db.execute('DELETE FROM attrs WHERE file_id = ?', (file_id,))
+
+    def update(self, paths, prune=False):
+        """
+        增量更新 paths 的索引，返回 {'indexed': n, 'reused': n, 'removed': n}
+        prune=True 时删除不在 paths 中的文件的记录
+        """
+        stats = {'indexed': 0, 'reused': 0, 'removed': 0}
+        known = {path: (file_id, mtime_ns, size, digest, indexed_at)
+                 for file_id, path, mtime_ns, size, digest, indexed_at
+                 in self.db.execute('SELECT id, path, mtime_ns, size, digest, indexed_at FROM files')}
+        seen = set()
+        with self.db:
+            for path in paths:
+                path = os.path.abspath(path)
+                seen.add(path)
+                st = os.stat(path)
+                entry = known.get(path)
+                # 与上次索引处于同一时间刻度内的修改可能没有改变 mtime，需要复核哈希
+                if (entry is not None and entry[1:3] == (st.st_mtime_ns, st.st_size)
+                        and st.st_mtime_ns < entry[4]):
+                    stats['reused'] += 1
+                    continue
+                now = time.time_ns()
+                with open(path, 'rb') as f:
+                    data = f.read()
+                digest = digest_bytes(data)
+                if entry is not None and entry[3] == digest:
+                    self.db.execute('UPDATE files SET mtime_ns = ?, size = ?, indexed_at = ? WHERE id = ?',
+                                    (st.st_mtime_ns, st.st_size, now, entry[0]))
+                    stats['reused'] += 1
+                    continue
+                if entry is None:
+                    file_id = self.db.execute(
+                        'INSERT INTO files (path, mtime_ns, size, digest, indexed_at) VALUES (?, ?, ?, ?, ?)',
+                        (path, st.st_mtime_ns, st.st_size, digest, now)).lastrowid
+                else:
+                    file_id = entry[0]
+                    self._remove(file_id)
+                    self.db.execute('UPDATE files SET mtime_ns = ?, size = ?, digest = ?, indexed_at = ? '
+                                    'WHERE id = ?', (st.st_mtime_ns, st.st_size, digest, now, file_id))
+                for line, tag, value in extract_attrs(data.decode('utf-8')):
+                    attr_id = self.db.execute('INSERT INTO attrs (file_id, line, tag, value) VALUES (?, ?, ?, ?)',
+                                              (file_id, line, tag, value)).lastrowid
+                    self.db.executemany('INSERT INTO tokens VALUES (?, ?)',
+                                        [(attr_id, token) for token in dict.fromkeys(value.split())])
+                stats['indexed'] += 1
+            if prune:
+                for path in set(known) - seen:
+                    self._remove(known[path][0])
+                    self.db.execute('DELETE FROM files WHERE id = ?', (known[path][0],))
+                    stats['removed'] += 1
+        return stats
+
+    def find(self, value, tokens=False):
+        """
+        返回 [(路径, 行号, 标签, class 值), ...]
+        tokens=False 时按整个 class 值精确匹配，否则返回包含 value 中全部类名的属性
+        """
+        if not tokens:
+            return self.db.execute(
+                'SELECT f.path, a.line, a.tag, a.value FROM attrs a JOIN files f ON f.id = a.file_id '
+                'WHERE a.value = ? ORDER BY f.path, a.line', (value,)).fetchall()
+        names = list(dict.fromkeys(value.split()))
+        if not names:
+            return []
+        marks = ','.join('?' * len(names))
+        return self.db.execute(
+            'SELECT f.path, a.line, a.tag, a.value FROM attrs a JOIN files f ON f.id = a.file_id '
+            f'WHERE a.id IN (SELECT attr_id FROM tokens WHERE token IN ({marks}) '
+            'GROUP BY attr_id HAVING COUNT(DISTINCT token) = ?) ORDER BY f.path, a.line',
+            names + [len(names)]).fetchall()
+
+    def top_values(self, limit=None):
+        """返回真实标签上出现最多的 class 值 [(值, 标签, 次数, 文件数), ...]，limit 为 None 时返回全部"""
+        return self.db.execute(
+            'SELECT value, tag, COUNT(*) AS n, COUNT(DISTINCT file_id) FROM attrs WHERE tag IS NOT NULL '
+            'GROUP BY value, tag ORDER BY n DESC, value, tag LIMIT ?', (-1 if limit is None else limit,)).fetchall()
+
+    def _matching_files(self, requirement):
+        kind, value, tag = requirement
+        select = 'SELECT DISTINCT f.path FROM attrs a JOIN files f ON f.id = a.file_id '
+        if kind == 'exact':
+            return self.db.execute(select + 'WHERE a.value = ?', (value,))
+        if kind == 'prefix':
+            return self.db.execute(select + 'WHERE a.value >= ? AND a.value < ?', (value, value + _MAX_CHAR))
+        if kind == 'class':
+            if tag is None:
+                return self.db.execute(select + 'WHERE a.value = ? AND a.tag IS NOT NULL', (value,))
+            return self.db.execute(select + 'WHERE a.value = ? AND a.tag = ?', (value, tag))
+        return self.db.execute(select + 'JOIN tokens t ON t.attr_id = a.id WHERE t.token = ? AND a.tag IS NOT NULL',
+                               (value,))
+
+    def candidates(self, transform, paths):
+        """
+        返回 paths 中规则集可能命中的文件集合（绝对路径）；无法判断时返回 None
+        查询前先增量更新这些文件的索引，保证结果与磁盘内容一致
+        """
+        needed = requirements(transform)
+        if needed is None:
+            return None
+        self.update(paths)
+        found = set()
+        for requirement in dict.fromkeys(needed):
+            found.update(path for path, in self._matching_files(requirement))
+        return found
+
+def satisfies(requirement, value, tag):
+    """tag 标签（不在真实标签内时为 None）上的 class 值 value 是否满足条件"""
+    kind, expected, expected_tag = requirement
+    if kind == 'exact':
+        return value == expected
+    if kind == 'prefix':
+        return value.startswith(expected)
+    if tag is None:
+        return False
+    if kind == 'class':
+        return value == expected and expected_tag in (None, tag)
+    return expected in value.split()
+
+
+def open_index(args, root):
+    """根据命令行参数打开索引；未启用时返回 None"""
+    if not getattr(args, 'class_index', None):
+        return None
+    path = Path(root) / INDEX_NAME if args.class_index is True else args.class_index
+    return ClassIndex(path)
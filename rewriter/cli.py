@@ -0,0 +1,154 @@
+"""
+批量脚本共用的命令行参数
+
+清单、快照、性能分析、class 索引、分片报告、规则包等模块在用到时才导入，--help 和参数错误时不加载
+"""
+
+import argparse
+
+DEFAULT_PROFILE_PATH = 'rewrite-profile.json'
+DEFAULT_TIMEOUT = 10.0
+
+
+def parse_shard(text):
+    """解析 --shard 的 I/N（1 <= I <= N），返回 (I, N)"""
+    index, sep, count = text.partition('/')
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        index = count = 0
+    if not sep or not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f'分片应写作 I/N（1 <= I <= N），而不是 {text!r}')
+    return index, count
+
+
+def parse_size(text):
+    """解析 500M、2G 形式的大小，返回字节数"""
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    number, unit = (text[:-1], units[text[-1].upper()]) if text[-1:].upper() in units else (text, 1)
+    try:
+        size = int(float(number) * unit)
+    except ValueError:
+        size = -1
+    if size < 0:
+        raise argparse.ArgumentTypeError(f'无效的大小 {text!r}（如 500M、2G）')
+    return size
+
+
+def make_parser(description):
+    """创建带有公共参数的命令行解析器"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        '-j', '--jobs', type=int, default=1,
+        help='并行处理的进程数，0 表示使用全部 CPU 核心（默认 1，逐个处理）'
+    )
+    parser.add_argument(
+        '--incremental', action='store_true',
+        help='增量模式：跳过在当前规则下已处理过且未修改的文件'
+    )
+    parser.add_argument(
+        '--manifest', metavar='PATH',
+        help='增量清单路径（默认为语料目录下的 .rewrite-manifest.json）'
+    )
+    parser.add_argument(
+        '--profile', nargs='?', const=DEFAULT_PROFILE_PATH, metavar='PATH',
+        help=f'逐条统计规则耗时、命中次数和字节数，写出 JSON 报告（默认 {DEFAULT_PROFILE_PATH}）'
+    )
+    parser.add_argument(
+        '--timeout', type=float, default=DEFAULT_TIMEOUT, metavar='SECONDS',
+        help=f'单个文件的重写时间预算，超时的文件跳过并记为失败，0 表示不限制（默认 {DEFAULT_TIMEOUT:g}）'
+    )
+    parser.add_argument(
+        '--bytes', action='store_true',
+        help='字节模式：直接在文件映射上按 UTF-8 字节执行规则，未命中的文件不解码、不复制'
+    )
+    parser.add_argument(
+        '--class-index', nargs='?', const=True, metavar='PATH',
+        help='用 class 属性索引跳过规则不可能命中的文件（默认为语料目录下的 .class-index.sqlite）'
+    )
+    parser.add_argument(
+        '--no-snapshot', action='store_true',
+        help='不保存被改写文件的原始内容（默认保存到语料目录下的 .rewrite-snapshots/，可用 rollback.py 回滚）'
+    )
+    parser.add_argument(
+        '--snapshot-limit', type=parse_size, metavar='SIZE',
+        help='快照库大小上限，超过时淘汰最久未用的运行，如 500M、2G（默认 256M）'
+    )
+    parser.add_argument(
+        '--shard', type=parse_shard, metavar='I/N',
+        help='只处理第 I 片（共 N 片）的文件，按相对语料目录的路径哈希划分，多台机器各跑一片；同时写出运行报告'
+    )
+    parser.add_argument(
+        '--report', nargs='?', const=True, metavar='PATH',
+        help='写出 JSON 运行报告（各文件状态、规则命中、耗时），供 merge-reports.py 合并'
+             '（默认为当前目录下的 rewrite-report.<脚本名>[.<I>-of-<N>].json）'
+    )
+    return parser
+
+
+def add_rules_argument(parser):
+    """添加 --rules：用数据文件声明的规则表代替脚本内置的规则"""
+    parser.add_argument(
+        '--rules', metavar='FILE',
+        help='改用 JSON 规则文件中的规则表；编译结果缓存在同目录的 .rulepacks/ 中，规则文件不变时直接加载'
+    )
+    return parser
+
+
+def selected_rules(args, default):
+    """--rules 指定的规则集，未指定时返回 default"""
+    if not getattr(args, 'rules', None):
+        return default
+    from .rulepack import load_rules
+    return load_rules(args.rules)
+
+
+def check_cases(transform, cases):
+    """
+    按 [(输入, 期望输出), ...] 检查 transform 的匹配语义，文本和字节两种模式都检查
+    打印不符的用例，返回是否全部通过
+    """
+    failures = 0
+    for source, expected in cases:
+        outputs = [('文本', transform(source))]
+        if hasattr(transform, 'apply_bytes'):
+            data = source.encode('utf-8')
+            result = transform.apply_bytes(data)
+            outputs.append(('字节', source if result is None else bytes(result).decode('utf-8')))
+        for mode, output in outputs:
+            if output != expected:
+                failures += 1
+                print(f"✗ {mode}模式: {source!r}\n    期望 {expected!r}\n    得到 {output!r}")
+    if failures:
+        print(f"✗ {failures} 个匹配语义用例不符（共 {len(cases)} 个）")
+        return False
+    print(f"✓ {len(cases)} 个匹配语义用例全部通过")
+    return True
+
+
+def run_options(args, root, tool, transform):
+    """把命令行参数转换为 run_files 的关键字参数"""
+    from .manifest import open_manifest
+    from .snapshot import open_snapshot
+
+    index = profiler = shard = report = None
+    if getattr(args, 'shard', None) or getattr(args, 'report', None):
+        from .shard import open_report
+        shard, report = open_report(args, root, tool)
+    if getattr(args, 'class_index', None):
+        from .classindex import open_index
+        index = open_index(args, root)
+    if args.profile:
+        from .profile import ProfileReport
+        profiler = ProfileReport(args.profile)
+    return {
+        'jobs': args.jobs,
+        'manifest': open_manifest(args, root, tool, transform),
+        'profiler': profiler,
+        'timeout': args.timeout,
+        'binary': args.bytes,
+        'index': index,
+        'shard': shard,
+        'report': report,
+        'snapshot': open_snapshot(args, root, tool),
+    }
@@ -0,0 +1,253 @@
+"""
+TSX 页面的多 codemod 引擎
+
+每个页面只读取和切分一次，登记的 codemod 依次作用于代码部分，最后统一整理 import：
+- 模板字符串（`...`，页面里的示例代码大多放在其中）的正文不做替换，${...} 中的表达式仍按代码处理；
+- codemod 声明自己引入的组件（provides）和取代的组件（replaces）：
+  代码中用到而没有导入的组件并入同一模块已有的 import 语句（没有时新增一行），
+  取代的组件不再被引用时从 import 中删除；改名时新名字写在旧名字原来的位置。
+CodemodSet 是普通的处理函数，带 fingerprint()，可以直接交给 run_files 并行和增量执行。
+"""
+
+import re
+
+from .engine import RuleSet, compile_rules
+from .hashing import fingerprint
+
+_IMPORT = re.compile(r'''
+    import\s+(?P<type>type\s+)?
+    (?:(?P<default>[\w$]+)\s*(?:,\s*)?)?
+    (?:\{(?P<names>[^{}]*)\}\s*|\*\s*as\s+[\w$]+\s*)?
+    from\s*(?P<quote>['"])(?P<module>[^'"\n]+)(?P=quote)\s*;?
+    |
+    import\s*(?P<bare>['"])[^'"\n]+(?P=bare)\s*;?
+''', re.X)
+_SPACE = re.compile(r'(?:\s+|//[^\n]*|/\*.*?\*/)+', re.S)
+
+
+def split_code(content):
+    """
+    把页面切分为 [(是否代码, 文本), ...]，拼接后与原文相同
+    非代码部分是模板字符串的正文（不含反引号和 ${...} 表达式）
+    """
+    parts = []
+    start = 0
+    # 栈中每一项是一层 ${...} 表达式内未闭合的 { 个数；栈为空表示在顶层代码中
+    depth = []
+    in_template = False
+    i = 0
+    n = len(content)
+    while i < n:
+        c = content[i]
+        if in_template:
+            if c == '\\':
+                i += 2
+                continue
+            if c == '`' or content.startswith('${', i):
+                parts.append((False, content[start:i]))
+                start = i
+                if c == '`':
+                    in_template = False
+                    i += 1
+                else:
+                    depth.append(0)
+                    in_template = False
+                    i += 2
+                continue
+        elif c == '`':
+            i += 1
+            parts.append((True, content[start:i]))
+            start = i
+            in_template = True
+            continue
+        elif depth:
+            if c == '{':
+                depth[-1] += 1
+            elif c == '}':
+                if depth[-1] == 0:
+                    depth.pop()
+                    i += 1
+                    parts.append((True, content[start:i]))
+                    start = i
+                    in_template = True
+                    continue
+                depth[-1] -= 1
+        i += 1
+    parts.append((not in_template, content[start:]))
+    return [part for part in parts if part[1]]
+
+
+class _Import:
+    """页面开头的一条 import 语句"""
+
+    def __init__(self, m):
+        self.start, self.end = m.span()
+        self.text = m.group()
+        self.module = m.group('module')
+        self.quote = m.group('quote') or "'"
+        self.is_type = bool(m.group('type'))
+        self.default = m.group('default')
+        names = m.group('names')
+        self.braced = names is not None
+        self.names = [name.strip() for name in names.split(',') if name.strip()] if names else []
+
+    def local(self, spec):
+        return spec.split(' as ')[-1].strip()
+
+    def render(self):
+        if not self.default and not self.names:
+            return ''
+        parts = [self.default] if self.default else []
+        if self.names or not self.default:
+            parts.append('{ ' + ', '.join(self.names) + ' }')
+        semicolon = ';' if self.text.rstrip().endswith(';') else ''
+        return f"import {'type ' if self.is_type else ''}{', '.join(parts)} from {self.quote}{self.module}{self.quote}{semicolon}"
+
+
+def parse_imports(content):
+    """页面开头连续的 import 语句；遇到第一条其他语句即停止（示例代码里的 import 不会被当作导入）"""
+    imports = []
+    pos = 0
+    while True:
+        m = _SPACE.match(content, pos)
+        if m:
+            pos = m.end()
+        m = _IMPORT.match(content, pos)
+        if m is None or m.group('bare'):
+            if m is None:
+                return imports
+            pos = m.end()
+            continue
+        imports.append(_Import(m))
+        pos = m.end()
+
+
+def _references(code, name):
+    return re.search(rf'(?<![\w$.]){re.escape(name)}(?![\w$])', code) is not None
+
+
+class Codemod:
+    """
+    一次迁移：rules 为替换表或 RuleSet，只作用于代码部分
+    provides 为 {组件名: 模块}，用到时确保已导入；replaces 为被取代的组件名，不再引用时删除导入
+    """
+
+    def __init__(self, name, rules, provides=None, replaces=()):
+        self.name = name
+        self.rules = rules if isinstance(rules, RuleSet) else compile_rules(rules, name)
+        self.provides = dict(provides or {})
+        self.replaces = tuple(replaces)
+
+    def fingerprint(self):
+        return fingerprint(self.name, self.rules, sorted(self.provides.items()), self.replaces)
+
+
+def rename_component(old, new, module, name=None):
+    """把 JSX 中的 <old ...> / </old> 改为 new，并相应地调整从 module 的导入"""
+    return Codemod(name or f'{old}->{new}', [
+        (rf'<{old}(?=[\s/>])', f'<{new}'),
+        (rf'</{old}\s*>', f'</{new}>'),
+    ], provides={new: module}, replaces=[old])
+
+
+def fix_imports(content, provides, replaces):
+    """
+    按代码中的实际引用整理页面开头的 import，返回新内容
+    provides 中用到而没有导入的名字补上；replaces 中不再引用的名字删除
+    """
+    imports = parse_imports(content)
+    if imports:
+        body_start = imports[-1].end
+        code = ''.join(text for is_code, text in split_code(content[body_start:]) if is_code)
+    else:
+        body_start = 0
+        code = ''.join(text for is_code, text in split_code(content) if is_code)
+    imported = {imp.local(spec) for imp in imports for spec in imp.names}
+    imported.update(imp.default for imp in imports if imp.default)
+
+    missing = [name for name in provides if name not in imported and _references(code, name)]
+    unused = {name for name in replaces if name in imported and not _references(code, name)}
+    if not missing and not unused:
+        return content
+
+    changed = set()
+    for imp in imports:
+        if imp.is_type:
+            continue
+        names = []
+        for spec in imp.names:
+            if imp.local(spec) not in unused:
+                names.append(spec)
+                continue
+            # 改名：新名字放在旧名字的位置
+            for name in missing:
+                if provides[name] == imp.module:
+                    names.append(name)
+                    missing.remove(name)
+                    break
+        if names != imp.names:
+            imp.names = names
+            changed.add(id(imp))
+    for name in list(missing):
+        for imp in imports:
+            if not imp.is_type and imp.module == provides[name] and (imp.braced or imp.default):
+                imp.names.append(name)
+                changed.add(id(imp))
+                missing.remove(name)
+                break
+
+    out = []
+    pos = 0
+    for imp in imports:
+        if id(imp) not in changed:
+            continue
+        out.append(content[pos:imp.start])
+        text = imp.render()
+        pos = imp.end
+        if not text:
+            # 整条语句删除时连同行尾换行一起删除
+            if content.startswith('\n', pos):
+                pos += 1
+        out.append(text)
+    out.append(content[pos:body_start])
+    if missing:
+        quote = imports[0].quote if imports else "'"
+        semicolon = ';' if not imports or imports[-1].text.rstrip().endswith(';') else ''
+        lines = ''.join(f'\nimport {{ {name} }} from {quote}{provides[name]}{quote}{semicolon}' for name in missing)
+        out.append(lines if imports else lines.lstrip('\n') + '\n')
+    out.append(content[body_start:])
+    return ''.join(out)
+
+
+class CodemodSet:
+    """按顺序执行的一组 codemod；调用时返回新内容，没有改动时返回 None"""
+
+    def __init__(self, codemods, name='codemods'):
+        self.__name__ = name
+        self.codemods = list(codemods)
+        self.provides = {}
+        self.replaces = []
+        for codemod in self.codemods:
+            self.provides.update(codemod.provides)
+            self.replaces.extend(codemod.replaces)
+
+    def __call__(self, content):
+        parts = split_code(content)
+        changed = False
+        for i, (is_code, text) in enumerate(parts):
+            if not is_code:
+                continue
+            new_text = text
+            for codemod in self.codemods:
+                new_text = codemod.rules(new_text)
+            if new_text != text:
+                parts[i] = (True, new_text)
+                changed = True
+        if changed:
+            content = ''.join(text for _, text in parts)
+        new_content = fix_imports(content, self.provides, self.replaces)
+        return new_content if changed or new_content != content else None
+
+    def fingerprint(self):
+        return fingerprint(self.__name__, *self.codemods, split_code, fix_imports, parse_imports,
+                           _Import.render, CodemodSet.__call__)
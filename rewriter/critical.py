@@ -0,0 +1,233 @@
+"""
+首屏关键 CSS
+
+页面首屏为 <body> 开头到 <main> 中第一个 <section> 之前的部分（侧边栏、content-wrapper、页面标签、
+标题、page-intro、目录）。收集这部分用到的标签、类和 id，与页面样式表（按 @import 链展开后的全部规则）
+的选择器求交集：选择器中出现的每个类型、类和 id 都在首屏出现过，才保留该选择器。
+:not(...) 等带参数的伪类和属性选择器不参与判断，伪类、伪元素随所属选择器保留。
+
+结果内联为 <head> 中的 <style id="critical-css">，原样式表改为 preload 后异步生效（<noscript> 中保留同步引用）。
+处理前先把上一次的结果还原为普通 <link>，因此重复运行结果不变，样式表变化后重新运行即可更新。
+"""
+
+import os
+import re
+
+from .cssbundle import Block, Bundle, Decl, Statement, _render, _Writer
+from .hashing import digest_bytes, fingerprint
+
+STYLE_ID = 'critical-css'
+CSS_DIR = 'css'
+
+_LINK = re.compile(r'([ \t]*)<link rel="stylesheet" href="([^"]+\.css)">')
+_INLINED = re.compile(
+    r'<style id="%s">.*?</style>\s*'
+    r'''<link rel="preload" href="[^"]*" as="style" onload="this\.onload=null;this\.rel='stylesheet'">'''
+    r'<noscript><link rel="stylesheet" href="([^"]*)"></noscript>' % STYLE_ID, re.S)
+_PRELOAD = ('<link rel="preload" href="{href}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">'
+            '<noscript><link rel="stylesheet" href="{href}"></noscript>')
+
+_HTML_TAG = re.compile(r'<([a-zA-Z][\w-]*)([^>]*)>')
+_HTML_CLASS = re.compile(r'''\bclass\s*=\s*(?:"([^"]*)"|'([^']*)')''')
+_HTML_ID = re.compile(r'''\bid\s*=\s*(?:"([^"]*)"|'([^']*)')''')
+
+_SEL_ATTR = re.compile(r'\[[^\]]*\]')
+_SEL_PSEUDO = re.compile(r'::?[\w-]+(?:\([^()]*(?:\([^()]*\)[^()]*)*\))?')
+_SEL_CLASS = re.compile(r'\.((?:[\w-]|\\.)+)')
+_SEL_ID = re.compile(r'#((?:[\w-]|\\.)+)')
+_SEL_TYPE = re.compile(r'(?<![\w\\-])([a-zA-Z][\w-]*)')
+_ESCAPE = re.compile(r'\\(.)')
+
+_URL = re.compile(r'''url\((['"]?)(?![a-zA-Z][\w+.-]*:|/|#)([^'")]+)\1\)''')
+
+# 子规则需要逐条筛选的条件规则；其余 @ 规则块（@keyframes 等）不进入关键 CSS，@font-face 原样保留
+_CONDITIONAL = ('@media', '@supports')
+
+
+def fold(content):
+    """返回页面首屏部分的 HTML"""
+    main = content.find('<main')
+    if main < 0:
+        return content
+    end = content.find('<section', main)
+    if end < 0:
+        end = content.find('</main>', main)
+    return content[:end] if end >= 0 else content
+
+
+def used_names(html):
+    """返回 HTML 中出现的 (标签集合, 类集合, id 集合)"""
+    tags, classes, ids = set(), set(), set()
+    for m in _HTML_TAG.finditer(html):
+        tags.add(m.group(1).lower())
+        attrs = m.group(2)
+        for cm in _HTML_CLASS.finditer(attrs):
+            classes.update((cm.group(1) or cm.group(2) or '').split())
+        im = _HTML_ID.search(attrs)
+        if im:
+            ids.add(im.group(1) or im.group(2) or '')
+    return tags, classes, ids
+
+
+def split_selectors(prelude):
+    """按顶层逗号拆分选择器列表（括号内的逗号不拆）"""
+    parts = []
+    depth = 0
+    start = 0
+    for i, ch in enumerate(prelude):
+        if ch in '([':
+            depth += 1
+        elif ch in ')]':
+            depth -= 1
+        elif ch == ',' and depth == 0:
+            parts.append(prelude[start:i])
+            start = i + 1
+    parts.append(prelude[start:])
+    return [part.strip() for part in parts if part.strip()]
+
+
+def selector_requires(selector):
+    """返回选择器要求出现的 (标签集合, 类集合, id 集合)"""
+    rest = _SEL_PSEUDO.sub(' ', _SEL_ATTR.sub(' ', selector))
+    classes = {_ESCAPE.sub(r'\1', name) for name in _SEL_CLASS.findall(rest)}
+    ids = {_ESCAPE.sub(r'\1', name) for name in _SEL_ID.findall(rest)}
+    rest = _SEL_ID.sub(' ', _SEL_CLASS.sub(' ', rest))
+    tags = {name.lower() for name in _SEL_TYPE.findall(rest)}
+    return tags, classes, ids
+
+
+class _Matcher:
+    """按页面首屏用到的名字筛选规则；requires 为样式表预先算好的 {选择器: 需求}"""
+
+    def __init__(self, used):
+        self.tags, self.classes, self.ids = used
+
+    def matches(self, requires):
+        tags, classes, ids = requires
+        return tags <= self.tags and classes <= self.classes and ids <= self.ids
+
+    def filter(self, nodes, requires):
+        result = []
+        for node in nodes:
+            if not isinstance(node, Block):
+                continue
+            prelude = node.prelude
+            if prelude.startswith('@'):
+                lowered = prelude.lower()
+                if lowered.startswith(_CONDITIONAL):
+                    children = self.filter(node.children, requires)
+                    if children:
+                        result.append(Block(prelude, children, node.src))
+                elif lowered.startswith('@font-face'):
+                    result.append(node)
+                continue
+            selectors = [selector for selector in split_selectors(prelude)
+                         if self.matches(requires[selector])]
+            if selectors:
+                result.append(Block(','.join(selectors), node.children, node.src))
+        return result
+
+
+class Stylesheet:
+    """展开后的样式表及其选择器需求表"""
+
+    def __init__(self, path, base):
+        bundle = Bundle(path)
+        bundle.collapse()
+        self.sources = bundle.sources
+        self.nodes = _rebase(bundle.nodes, bundle.sources, base)
+        self.requires = {}
+        self._index(self.nodes)
+
+    def _index(self, nodes):
+        for node in nodes:
+            if not isinstance(node, Block):
+                continue
+            if node.prelude.startswith('@'):
+                self._index(node.children)
+                continue
+            for selector in split_selectors(node.prelude):
+                if selector not in self.requires:
+                    self.requires[selector] = selector_requires(selector)
+
+    def critical(self, html):
+        """返回页面首屏所需的压缩 CSS"""
+        nodes = _Matcher(used_names(fold(html))).filter(self.nodes, self.requires)
+        writer = _Writer()
+        _render(nodes, writer)
+        return ''.join(writer.parts)
+
+
+def _rebase(nodes, sources, base):
+    """把声明中相对于样式表的 url(...) 改为相对于页面目录"""
+    result = []
+    for node in nodes:
+        if isinstance(node, Decl) and 'url(' in node.value:
+            directory = os.path.dirname(sources[node.src[0]])
+
+            def replace(m, directory=directory):
+                target = os.path.relpath(os.path.join(directory, m.group(2)), base).replace(os.sep, '/')
+                return f'url({m.group(1)}{target}{m.group(1)})'
+
+            node = Decl(node.prop, _URL.sub(replace, node.value), node.important, node.src)
+        elif isinstance(node, Block):
+            node = Block(node.prelude, _rebase(node.children, sources, base), node.src)
+        elif isinstance(node, Statement):
+            continue
+        result.append(node)
+    return result
+
+
+def inlined_css(content):
+    """返回页面中内联的关键 CSS；没有时返回 None"""
+    m = _INLINED.search(content)
+    if m is None:
+        return None
+    start = m.group().index('>') + 1
+    return m.group()[start:m.group().index('</style>')]
+
+
+def restore(content):
+    """把内联过关键 CSS 的页面还原为普通的样式表引用"""
+    return _INLINED.sub(lambda m: f'<link rel="stylesheet" href="{m.group(1)}">', content)
+
+
+class CriticalInliner:
+    """
+    页面处理函数：内联首屏关键 CSS，样式表改为异步加载
+    root 为页面所在目录，样式表路径相对于它解析；展开后的样式表按路径缓存，各页面共用
+    """
+
+    def __init__(self, root, name='critical-css'):
+        self.__name__ = name
+        self.root = os.fspath(root)
+        self.stylesheets = {}
+
+    def stylesheet(self, href):
+        path = os.path.normpath(os.path.join(self.root, href.split('?', 1)[0]))
+        sheet = self.stylesheets.get(path)
+        if sheet is None:
+            sheet = self.stylesheets[path] = Stylesheet(path, self.root)
+        return sheet
+
+    def __call__(self, content):
+        original = restore(content)
+        m = _LINK.search(original)
+        if m is None:
+            return None
+        indent, href = m.groups()
+        css = self.stylesheet(href).critical(original)
+        # 与异步引用写在同一行，压缩后的页面再次处理时结果不变
+        replacement = f'{indent}<style id="{STYLE_ID}">{css}</style>' + _PRELOAD.format(href=href)
+        return original[:m.start()] + replacement + original[m.end():]
+
+    def fingerprint(self):
+        # 样式表变化后页面需要重新处理，指纹包含 css/ 下全部样式表的内容
+        css_dir = os.path.join(self.root, CSS_DIR)
+        digests = []
+        for name in sorted(os.listdir(css_dir)) if os.path.isdir(css_dir) else []:
+            if name.endswith('.css'):
+                with open(os.path.join(css_dir, name), 'rb') as f:
+                    digests.append((name, digest_bytes(f.read())))
+        return fingerprint(self.__name__, CriticalInliner.__call__, Stylesheet.__init__, Stylesheet.critical,
+                           _Matcher.filter, _Matcher.matches, digests)
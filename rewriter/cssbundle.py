@@ -0,0 +1,376 @@
+"""
+CSS 打包
+
+从入口样式表出发，按 @import 出现顺序深度优先内联本地样式表（每个文件只内联一次，循环引用自动终止），
+输出单个压缩文件和 Source Map v3：
+- 去掉注释和多余空白，字符串与不带引号的 url(...) 原样保留；
+- 外部样式表（带协议或 // 开头）的 @import 不能内联，去重后提到文件开头（@import 必须位于其他规则之前）；
+- 带媒体查询的本地 @import 内联为同条件的 @media 块；
+- 重复声明合并：同一上下文中相同选择器的规则（无论是否在同一个块内），后面出现了值和 !important
+  完全相同的同名属性时删除前面的声明；值不同的同名属性可能是兼容回退（如 display:-webkit-box
+  之后的 display:flex，浏览器不支持后者时用前者），全部保留。
+"""
+
+import bisect
+import json
+import os
+import re
+
+BUNDLE_NAME = 'bundle.min.css'
+
+# 结构层面的记号：注释、字符串、不带引号的 url(...) 内容、块和语句分隔符、空白
+_TOKEN = re.compile(r'''
+    (?P<comment>/\*.*?(?:\*/|\Z))
+  | (?P<string>"(?:[^"\\\n]|\\.)*"?|'(?:[^'\\\n]|\\.)*'?)
+  | (?P<url>(?<=url)\([^'"()]*\))
+  | (?P<open>\{) | (?P<close>\}) | (?P<semi>;)
+  | (?P<space>\s+)
+  | (?P<other>[^/"'{};\s(]+|[/(])
+''', re.S | re.X | re.I)
+
+# 这些字符前后的空白可以省略；选择器中的 : 前后空白有含义（a :hover 与 a:hover 不同），不在此列
+_TIGHT = {
+    'selector': (',>~+', ',>~+)'),
+    'value': (',(', ',)!'),
+    'prelude': (',(:', ',)'),
+}
+
+_IMPORT = re.compile(r'''@import\s*(?:url\(\s*(['"]?)(.*?)\1\s*\)|(['"])(.*?)\3)\s*(.*)$''', re.S | re.I)
+_EXTERNAL = re.compile(r'^(?:[a-z][a-z0-9+.-]*:|//)', re.I)
+_IMPORTANT = re.compile(r'!\s*important$', re.I)
+# 子规则按层叠顺序比较、可以合并重复声明的条件规则
+_CASCADING = ('@media', '@supports')
+
+_VLQ = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'
+
+
+class Decl:
+    """声明：属性、值、是否 !important、在源文件中的位置 (源序号, 行, 列)"""
+    __slots__ = ('prop', 'value', 'important', 'src')
+
+    def __init__(self, prop, value, important, src):
+        self.prop = prop
+        self.value = value
+        self.important = important
+        self.src = src
+
+
+class Block:
+    """带块的规则：选择器或 @ 规则的前导部分，子节点为声明、语句或嵌套规则"""
+    __slots__ = ('prelude', 'children', 'src')
+
+    def __init__(self, prelude, children, src):
+        self.prelude = prelude
+        self.children = children
+        self.src = src
+
+
+class Statement:
+    """不带块的 @ 规则（@import、@charset 等）"""
+    __slots__ = ('text', 'src')
+
+    def __init__(self, text, src):
+        self.text = text
+        self.src = src
+
+
+def _minify(tokens, kind):
+    """把一段记号拼成压缩后的文本：去掉注释，空白折叠为一个空格，标点两侧的空白省略"""
+    before, after = _TIGHT[kind]
+    parts = []
+    space = False
+    for token_kind, text, _ in tokens:
+        if token_kind == 'comment':
+            continue
+        if token_kind == 'space':
+            space = bool(parts)
+            continue
+        if space and parts[-1][-1] not in before and text[0] not in after:
+            parts.append(' ')
+        space = False
+        parts.append(text)
+    return ''.join(parts)
+
+
+class _Source:
+    """单个源文件的记号流"""
+
+    def __init__(self, index, path):
+        self.index = index
+        self.path = path
+        with open(path, encoding='utf-8') as f:
+            text = f.read()
+        if text.startswith('\ufeff'):
+            text = text[1:]
+        self.lines = [0] + [m.end() for m in re.finditer('\n', text)]
+        self.tokens = [(m.lastgroup, m.group(), m.start()) for m in _TOKEN.finditer(text)]
+        self.pos = 0
+
+    def location(self, offset):
+        line = bisect.bisect_right(self.lines, offset) - 1
+        return self.index, line, offset - self.lines[line]
+
+    def parse(self, close=False):
+        """解析到文件结尾（或与之配对的 }）为止，返回节点列表"""
+        nodes = []
+        pending = []
+        tokens = self.tokens
+        while self.pos < len(tokens):
+            token = tokens[self.pos]
+            self.pos += 1
+            kind = token[0]
+            if kind == 'close':
+                if close:
+                    break
+                continue
+            if kind == 'open':
+                prelude = _strip(pending)
+                children = self.parse(close=True)
+                if prelude:
+                    text = prelude[0][1]
+                    minified = _minify(prelude, 'prelude' if text.startswith('@') else 'selector')
+                    nodes.append(Block(minified, children, self.location(prelude[0][2])))
+                pending = []
+            elif kind == 'semi':
+                self._statement(_strip(pending), nodes)
+                pending = []
+            else:
+                pending.append(token)
+        self._statement(_strip(pending), nodes)
+        return nodes
+
+    def _statement(self, tokens, nodes):
+        if not tokens:
+            return
+        src = self.location(tokens[0][2])
+        if tokens[0][1].startswith('@'):
+            nodes.append(Statement(_minify(tokens, 'prelude'), src))
+            return
+        text = _minify(tokens, 'value')
+        prop, colon, value = text.partition(':')
+        if not colon:
+            return
+        value = value.strip()
+        match = _IMPORTANT.search(value)
+        important = match is not None
+        if important:
+            value = value[:match.start()].rstrip()
+        nodes.append(Decl(prop.strip(), value, important, src))
+
+
+def _strip(tokens):
+    """去掉首尾的空白和注释"""
+    start, end = 0, len(tokens)
+    while start < end and tokens[start][0] in ('space', 'comment'):
+        start += 1
+    while end > start and tokens[end - 1][0] in ('space', 'comment'):
+        end -= 1
+    return tokens[start:end]
+
+
+class Bundle:
+    """打包结果：节点树、外部 @import、源文件列表"""
+
+    def __init__(self, entry):
+        self.entry = os.path.abspath(entry)
+        self.sources = []
+        self.charset = None
+        self.external = []
+        self._included = set()
+        self.nodes = self._inline(self.entry)
+
+    def _inline(self, path):
+        self._included.add(path)
+        source = _Source(len(self.sources), path)
+        self.sources.append(path)
+        nodes = []
+        for node in source.parse():
+            if not isinstance(node, Statement):
+                nodes.append(node)
+                continue
+            lowered = node.text.lower()
+            if lowered.startswith('@charset'):
+                self.charset = self.charset or node
+                continue
+            match = _IMPORT.match(node.text) if lowered.startswith('@import') else None
+            if match is None:
+                nodes.append(node)
+                continue
+            url = match.group(2) if match.group(1) is not None else match.group(4)
+            media = match.group(5).strip()
+            # 外部地址、@import ... layer/supports(...) 无法按原语义内联
+            if _EXTERNAL.match(url) or 'layer' in media.lower() or 'supports(' in media.lower():
+                if node.text not in (statement.text for statement in self.external):
+                    self.external.append(node)
+                continue
+            target = os.path.normpath(os.path.join(os.path.dirname(path), url.split('?', 1)[0]))
+            if target in self._included:
+                continue
+            children = self._inline(target)
+            if media:
+                nodes.append(Block('@media ' + media, children, node.src))
+            else:
+                nodes.extend(children)
+        return nodes
+
+    def collapse(self):
+        """合并重复声明，返回删除的声明数"""
+        rules = []
+        _collect(self.nodes, (), rules)
+        removed = 0
+        later = {}
+        for context, block in reversed(rules):
+            kept = []
+            for decl in reversed([child for child in block.children if isinstance(child, Decl)]):
+                values = later.setdefault((context, block.prelude, decl.prop), set())
+                if (decl.value, decl.important) in values:
+                    removed += 1
+                    continue
+                values.add((decl.value, decl.important))
+                kept.append(decl)
+            kept = set(map(id, kept))
+            block.children = [child for child in block.children
+                              if not isinstance(child, Decl) or id(child) in kept]
+        self.nodes = _prune(self.nodes)
+        return removed
+
+    def render(self, output, map_name=None):
+        """返回 (压缩后的 CSS, Source Map 字典)；output 为打包文件路径，决定 sources 的相对路径"""
+        writer = _Writer()
+        header = ([self.charset] if self.charset else []) + self.external
+        for statement in header:
+            writer.emit(statement.text + ';', statement.src)
+        _render(self.nodes, writer)
+        base = os.path.dirname(os.path.abspath(output))
+        source_map = {
+            'version': 3,
+            'file': os.path.basename(output),
+            'sources': [os.path.relpath(path, base).replace(os.sep, '/') for path in self.sources],
+            'names': [],
+            'mappings': writer.mappings(),
+        }
+        css = ''.join(writer.parts)
+        if map_name:
+            css += f'\n/*# sourceMappingURL={map_name} */\n'
+        return css, source_map
+
+
+def _collect(nodes, context, rules):
+    """按文档顺序收集可以合并声明的样式规则 [(所在条件规则, Block), ...]"""
+    for node in nodes:
+        if not isinstance(node, Block):
+            continue
+        if not node.prelude.startswith('@'):
+            rules.append((context, node))
+        elif node.prelude.lower().startswith(_CASCADING):
+            _collect(node.children, context + (node.prelude,), rules)
+
+
+def _prune(nodes):
+    """删除合并后变空的规则（@font-face 等不含选择器的块原样保留）"""
+    result = []
+    for node in nodes:
+        if isinstance(node, Block):
+            if node.prelude.lower().startswith(_CASCADING):
+                node.children = _prune(node.children)
+            if not node.children:
+                continue
+        result.append(node)
+    return result
+
+
+def _render(nodes, writer):
+    for index, node in enumerate(nodes):
+        if index:
+            # 块之后不需要分号
+            if not isinstance(nodes[index - 1], Block):
+                writer.emit(';')
+        if isinstance(node, Decl):
+            important = '!important' if node.important else ''
+            writer.emit(f'{node.prop}:{node.value}{important}', node.src)
+        elif isinstance(node, Statement):
+            writer.emit(node.text, node.src)
+            if index == len(nodes) - 1:
+                writer.emit(';')
+        else:
+            writer.emit(node.prelude + '{', node.src)
+            _render(node.children, writer)
+            writer.emit('}')
+
+
+class _Writer:
+    """拼接输出并记录映射点（输出只有一行，只需记录列号）"""
+
+    def __init__(self):
+        self.parts = []
+        self.column = 0
+        self.segments = []
+
+    def emit(self, text, src=None):
+        if src is not None:
+            self.segments.append((self.column,) + src)
+        self.parts.append(text)
+        self.column += len(text)
+
+    def mappings(self):
+        encoded = []
+        previous = (0, 0, 0, 0)
+        for segment in self.segments:
+            encoded.append(''.join(_vlq(value - last) for value, last in zip(segment, previous)))
+            previous = segment
+        return ','.join(encoded)
+
+
+def _vlq(value):
+    """Source Map 使用的 Base64 VLQ 编码"""
+    value = (-value << 1) | 1 if value < 0 else value << 1
+    digits = []
+    while True:
+        digit = value & 31
+        value >>= 5
+        if value:
+            digit |= 32
+        digits.append(_VLQ[digit])
+        if not value:
+            return ''.join(digits)
+
+
+def build(entry, output, used=None, write=True):
+    """
+    打包 entry 并写出 output 与 output.map，内容未变化的文件不重写；write=False 时只统计，不写出
+    传入 used（purge.UsedNames）时删除无法匹配任何元素的规则，源样式表不变
+    返回 {'sources', 'input_bytes', 'output_bytes', 'collapsed', 'written', 'purged'}，
+    purged 为 purge.purge_bundle 的统计加上清理前的大小 'bytes'，未清理时为 None
+    """
+    bundle = Bundle(entry)
+    collapsed = bundle.collapse()
+    purged = None
+    if used is not None:
+        from .purge import purge_bundle
+
+        before = len(bundle.render(output)[0].encode('utf-8'))
+        purged = purge_bundle(bundle, used)
+        purged['bytes'] = before
+    map_path = output + '.map'
+    css, source_map = bundle.render(output, os.path.basename(map_path))
+    written = []
+    for path, content in ((output, css), (map_path, json.dumps(source_map, ensure_ascii=False) + '\n')):
+        if not write:
+            break
+        try:
+            with open(path, encoding='utf-8') as f:
+                if f.read() == content:
+                    continue
+        except FileNotFoundError:
+            pass
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        written.append(path)
+    return {
+        'sources': bundle.sources,
+        'input_bytes': sum(os.path.getsize(path) for path in bundle.sources),
+        'output_bytes': len(css.encode('utf-8')),
+        'collapsed': collapsed,
+        'written': written,
+        'purged': purged,
+    }
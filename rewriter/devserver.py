@@ -0,0 +1,167 @@
+"""
+开发预览服务器
+
+只用标准库：以语料目录为根提供静态文件，HTML 页面在返回前按配置的脚本规则在内存中重写，
+磁盘上的文件不做任何修改。
+- 重写结果按 (路径, mtime_ns, 大小, 规则指纹) 缓存，修改一个页面后刷新只重写这一个页面；
+  规则脚本修改后自动重新加载，规则指纹随之变化，页面按需重新生成；
+- 响应带强 ETag（内容哈希，gzip 编码的表示另有 ETag），If-None-Match 命中时返回 304；
+- 客户端接受 gzip 时压缩文本类响应，压缩结果与页面一起缓存。
+HTML 以外的文本文件（CSS、JS 等）同样走缓存、ETag 和 gzip，其余文件交给 SimpleHTTPRequestHandler。
+"""
+
+import gzip
+import os
+import threading
+import traceback
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from time import perf_counter
+
+from .hashing import digest_bytes
+
+# 开发时优先响应速度，不用最高压缩级别
+GZIP_LEVEL = 6
+_COMPRESSIBLE = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+
+
+class _Entry:
+    """缓存的响应体；gzip 表示在第一次需要时生成"""
+
+    def __init__(self, key, body):
+        self.key = key
+        self.body = body
+        self.etag = f'"{digest_bytes(body)[:20]}"'
+        self._gzip = None
+
+    def gzipped(self):
+        if self._gzip is None:
+            self._gzip = gzip.compress(self.body, GZIP_LEVEL, mtime=0)
+        return self._gzip, self.etag[:-1] + '-gz"'
+
+
+class PageCache:
+    """按 (mtime_ns, 大小, 规则指纹) 缓存的响应体"""
+
+    def __init__(self, chain):
+        self.chain = chain
+        self.lock = threading.Lock()
+        self.entries = {}
+
+    def get(self, path):
+        """返回 (缓存项, 本次重写耗时秒数；命中缓存时为 None)"""
+        st = os.stat(path)
+        is_html = path.endswith('.html')
+        rules = self.chain.refresh() if is_html else None
+        key = (st.st_mtime_ns, st.st_size, rules)
+        with self.lock:
+            entry = self.entries.get(path)
+        if entry is not None and entry.key == key:
+            return entry, None
+        with open(path, 'rb') as f:
+            data = f.read()
+        elapsed = None
+        if is_html:
+            start = perf_counter()
+            data = self.chain(data.decode('utf-8')).encode('utf-8')
+            elapsed = perf_counter() - start
+        entry = _Entry(key, data)
+        with self.lock:
+            self.entries[path] = entry
+        return entry, elapsed
+
+
+def _accepts_gzip(header):
+    """
+    Accept-Encoding 是否接受 gzip：显式列出的 gzip 优先，没有列出时才看 *
+    与各项的先后顺序无关（"*;q=0, gzip" 接受，"gzip;q=0, *" 不接受）
+    """
+    weights = {}
+    for part in (header or '').split(','):
+        coding, *params = part.strip().split(';')
+        q = 1.0
+        for param in params:
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value.strip())
+                except ValueError:
+                    q = 0.0
+        weights.setdefault(coding.strip().lower(), q)
+    q = weights.get('gzip', weights.get('x-gzip', weights.get('*', 0.0)))
+    return q > 0
+
+
+class DevRequestHandler(SimpleHTTPRequestHandler):
+    """经过缓存和规则重写的静态文件处理器"""
+
+    def __init__(self, *args, cache=None, **kwargs):
+        self.cache = cache
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def _resolve(self):
+        """请求对应的文件；需要交给父类处理（目录跳转、目录列表等）时返回 None"""
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            if not self.path.split('?', 1)[0].split('#', 1)[0].endswith('/'):
+                return None
+            path = os.path.join(path, 'index.html')
+        if not os.path.isfile(path):
+            return None
+        content_type = self.guess_type(path)
+        if not path.endswith('.html') and not content_type.startswith(_COMPRESSIBLE):
+            return None
+        return path, content_type
+
+    def _serve(self, send_body):
+        resolved = self._resolve()
+        if resolved is None:
+            return super().do_GET() if send_body else super().do_HEAD()
+        path, content_type = resolved
+        try:
+            entry, elapsed = self.cache.get(path)
+        except Exception as e:
+            traceback.print_exc()
+            self.send_error(500, f'重写失败: {e}')
+            return
+        if elapsed is not None:
+            print(f"✓ 已重写: {os.path.basename(path)} ({elapsed * 1000:.1f} ms)")
+        body, etag = entry.body, entry.etag
+        encoded = _accepts_gzip(self.headers.get('Accept-Encoding'))
+        if encoded:
+            body, etag = entry.gzipped()
+        if etag in [tag.strip() for tag in (self.headers.get('If-None-Match') or '').split(',')]:
+            self.send_response(304)
+            self._common_headers(etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self._common_headers(etag)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if encoded:
+            self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def _common_headers(self, etag):
+        self.send_header('ETag', etag)
+        self.send_header('Vary', 'Accept-Encoding')
+        # 每次都向服务器确认；未修改时 304 不带响应体
+        self.send_header('Cache-Control', 'no-cache')
+
+
+def make_server(root, chain, host='127.0.0.1', port=8000):
+    """创建服务器；调用方负责 serve_forever()"""
+    cache = PageCache(chain)
+
+    def handler(*args, **kwargs):
+        return DevRequestHandler(*args, cache=cache, directory=os.fspath(root), **kwargs)
+
+    return ThreadingHTTPServer((host, port), handler)
@@ -0,0 +1,612 @@
+"""
+单遍多规则重写引擎
+
+把 (pattern, replacement[, flags[, anchor]]) 形式的规则表编译成若干"阶段"：
+相邻且互不干扰的字面量规则合并成一个前缀树正则，一次从左到右扫描完成替换；
+其余规则（带捕获组、量词、回调的正则）各自成为一个阶段，并用字面量前缀做快速跳过。
+输出与按顺序逐条 re.sub 的结果完全一致。
+
+各阶段另有字节版本（apply_bytes），直接在 UTF-8 原文（bytes 或 mmap）上执行，
+首次使用时才编译，见 binary 模块。
+
+编译结果（规则分析和阶段划分）可以用 RuleSet.export_state() 导出为只含基本类型的数据，
+再用 RuleSet.from_state() 直接恢复，不重复分析；正则都在第一次使用时才编译，见 rulepack 模块。
+"""
+
+import re
+from collections import namedtuple
+from contextlib import contextmanager
+from time import perf_counter
+
+from .hashing import fingerprint
+
+# 正则元字符（未转义时出现即视为非字面量规则）
+_META = set('.^$*+?{}[]|()')
+_QUANTIFIERS = set('*+?{')
+_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'f': '\f', 'v': '\v'}
+
+
+def _scan_literal(pattern):
+    """
+    逐字符解析 pattern，返回 (字面量前缀, 是否整条都是字面量)
+    """
+    out = []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == '\\':
+            if i + 1 >= len(pattern):
+                return ''.join(out), False
+            n = pattern[i + 1]
+            if n.isalnum() or n == '_':
+                if n not in _ESCAPES:
+                    return ''.join(out), False
+                n = _ESCAPES[n]
+            out.append(n)
+            i += 2
+            continue
+        if c in _META:
+            # 量词作用于前一个字符，它不再是必然出现的
+            if c in _QUANTIFIERS and out:
+                out.pop()
+            return ''.join(out), False
+        out.append(c)
+        i += 1
+    return ''.join(out), True
+
+
+def _overlaps(a, b):
+    """两个字符串在任意错位下是否可能重叠（包含或首尾相接）"""
+    if not a or not b:
+        return False
+    if a in b or b in a:
+        return True
+    return _suffix_is_prefix(a, b) or _suffix_is_prefix(b, a)
+
+
+def _suffix_is_prefix(a, b):
+    """a 的某个比 a、b 都短的非空后缀是否为 b 的前缀（只在 b 首字符出现的位置比较）"""
+    first = b[0]
+    i = a.find(first, len(a) - min(len(a), len(b)) + 1)
+    while i >= 0:
+        if b.startswith(a[i:]):
+            return True
+        i = a.find(first, i + 1)
+    return False
+
+
+def _trie_pattern(words):
+    """把一组互不为前缀的字面量编译成前缀树形式的正则"""
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+
+    def emit(node):
+        parts = []
+        for ch, child in node.items():
+            chain = [ch]
+            # 压缩单分支链，避免深层递归
+            while len(child) == 1:
+                (ch, child), = child.items()
+                chain.append(ch)
+            parts.append(re.escape(''.join(chain)) + emit(child))
+        if not parts:
+            return ''
+        if len(parts) == 1:
+            return parts[0]
+        return '(?:' + '|'.join(parts) + ')'
+
+    return emit(trie)
+
+
+class Rule:
+    """单条替换规则"""
+
+    __slots__ = ('index', 'pattern', 'repl', 'flags', '_regex', 'literal', 'anchor', 'expanded',
+                 'template_error', 'idempotent', 'fixpoint', '_binary')
+
+
+    def __init__(self, index, pattern, repl, flags=0, fixpoint=False, anchor=None):
+        """
+        anchor 为声明的字面量锚点（每个匹配都必然包含的子串）；
+        只在无法从模式中推出字面量前缀时使用，忽略大小写的规则不使用
+        """
+        self.index = index
+        self.pattern = pattern
+        self.repl = repl
+        self.flags = flags
+        self._regex = re.compile(pattern, flags)
+        prefix, is_literal = _scan_literal(pattern)
+        ignore_case = flags & (re.IGNORECASE | re.VERBOSE)
+        if ignore_case or '|' in pattern:
+            prefix, is_literal = '', False
+        if anchor and not prefix and not flags & re.IGNORECASE:
+            prefix = anchor
+        self.template_error = None
+        if not callable(repl):
+            try:
+                self.regex.sub(repl, '')
+            except re.error as e:
+                # 替换模板无效时 re.sub 对每个文件都会报错，不做快速跳过以保持原有行为
+                self.template_error = e
+                prefix, is_literal = '', False
+        self.anchor = prefix
+        self.literal = prefix if is_literal and prefix and not callable(repl) else None
+        # 字面量规则的替换文本与匹配无关，预先展开模板（处理 \n 等转义）
+        self.expanded = self.regex.sub(repl, prefix) if self.literal is not None else None
+        self.idempotent = self._is_idempotent()
+        # 不动点规则：重复替换直到不再匹配；幂等规则一遍即达到不动点，无需重复
+        self.fixpoint = fixpoint and not self.idempotent
+        if self.fixpoint and self.literal is not None and self.literal in self.expanded:
+            raise ValueError(f'不动点规则永远不会收敛（替换结果包含匹配串）: {pattern!r}')
+        self._binary = None
+
+    @property
+    def regex(self):
+        if self._regex is None:
+            self._regex = re.compile(self.pattern, self.flags)
+        return self._regex
+
+    def export_state(self):
+        """分析结果；callable 的替换无法导出"""
+        error = self.template_error
+        return (self.index, self.pattern, self.repl, int(self.flags), self.literal, self.anchor, self.expanded,
+                self.idempotent, self.fixpoint, None if error is None else str(error))
+
+    @classmethod
+    def from_state(cls, state):
+        """由 export_state() 的结果恢复，不重新分析，正则在第一次使用时编译"""
+        rule = cls.__new__(cls)
+        (rule.index, rule.pattern, rule.repl, rule.flags, rule.literal, rule.anchor, rule.expanded,
+         rule.idempotent, rule.fixpoint, error) = state
+        rule.template_error = None if error is None else re.error(error)
+        rule._regex = None
+        rule._binary = None
+        return rule
+
+    def _is_idempotent(self):
+        """
+        替换一遍后结果中是否必然不再有匹配
+        输出中的新匹配只能与替换文本重叠（或由删除后两侧拼接而成），
+        目前只能对字面量规则给出证明，其余规则按非幂等处理
+        """
+        x, rx = self.literal, self.expanded
+        if x is None:
+            return False
+        if not rx:
+            return len(x) == 1
+        return not _overlaps(x, rx)
+
+    def apply(self, content):
+        """按原始语义单独执行这一条规则"""
+        if self.anchor and self.anchor not in content:
+            return content
+        if self.fixpoint:
+            return self._apply_fixpoint(content)
+        return self.regex.sub(self.repl, content)
+
+    def _apply_fixpoint(self, content):
+        while True:
+            content, count = self.regex.subn(self.repl, content)
+            if not count:
+                return content
+
+    def _compile_bytes(self):
+        """
+        返回 (bytes 正则, bytes 模板, bytes 锚点, 是否用到 \\s)；
+        无法按字节等价执行时正则为 None，只用锚点做快速跳过
+        """
+        anchor = self.anchor.encode('utf-8')
+        if self.literal is not None:
+            expanded = self.expanded.encode('utf-8').replace(b'\\', b'\\\\')
+            return re.compile(re.escape(anchor)), expanded, anchor, False
+        if callable(self.repl) or self.template_error is not None:
+            return None, None, anchor, False
+        # 字节模式才用到的分析模块，只在第一次按字节执行时导入
+        from .binary import compile_bytes
+
+        regex, uses_space = compile_bytes(self.pattern, self.flags)
+        if regex is None:
+            return None, None, anchor, False
+        return regex, self.repl.encode('utf-8'), anchor, uses_space
+
+    def apply_bytes(self, data):
+        """
+        字节版本的 apply：没有匹配时原样返回 data（不复制），无法按字节执行时返回 None
+        """
+        if self._binary is None:
+            self._binary = self._compile_bytes()
+        regex, repl, anchor, uses_space = self._binary
+        if anchor and data.find(anchor) < 0:
+            return data
+        if regex is None:
+            return None
+        # 含有 Unicode 空白时 str 的 \s 可能多出匹配，交给文本模式
+        if uses_space:
+            from .binary import has_text_space
+
+            if has_text_space(data):
+                return None
+        # 先查找再替换：没有匹配时 sub 也会复制整个 mmap
+        if regex.search(data) is None:
+            return data
+        content, count = regex.subn(repl, data)
+        while self.fixpoint and count:
+            content, count = regex.subn(repl, content)
+        return content
+
+    def apply_counted(self, content):
+        """执行规则并返回 (新内容, 命中次数, 被替换的字节数)，仅用于性能分析"""
+        if self.template_error is not None:
+            raise self.template_error
+        if self.anchor and self.anchor not in content:
+            return content, 0, 0
+        hits = [0, 0]
+        repl = self.repl
+
+        def count(m):
+            hits[0] += 1
+            hits[1] += len(m.group().encode('utf-8'))
+            return repl(m) if callable(repl) else m.expand(repl)
+
+        while True:
+            before = hits[0]
+            content = self.regex.sub(count, content)
+            if not self.fixpoint or hits[0] == before:
+                return content, hits[0], hits[1]
+
+    def __repr__(self):
+        return f'Rule({self.index}, {self.pattern!r})'
+
+
+class _MergeGroup:
+    """
+    正在合并的字面量规则组
+    与组内每条规则逐一比较是平方复杂度，几千条规则时很慢；这里为组内全部字符串（原文和替换结果）
+    维护前缀、后缀和长度索引，判断新规则能否并入只需按它自身的长度查表，结果与逐一比较相同
+    """
+
+    def __init__(self):
+        self.rules = []
+        self.closed = False     # 组内有删除型规则
+        self.strings = set()
+        self.lengths = set()
+        self.prefixes = set()
+        self.suffixes = set()
+        self.joined = '\0'
+
+    def __bool__(self):
+        return bool(self.rules)
+
+    def append(self, rule):
+        self.rules.append(rule)
+        if not rule.expanded:
+            self.closed = True
+        for text in (rule.literal, rule.expanded):
+            if not text or text in self.strings:
+                continue
+            self.strings.add(text)
+            self.lengths.add(len(text))
+            self.prefixes.update(text[:k] for k in range(1, len(text) + 1))
+            self.suffixes.update(text[-k:] for k in range(1, len(text) + 1))
+            self.joined += text + '\0'
+
+    def clear(self):
+        self.__init__()
+
+    def accepts(self, rule):
+        """rule 能否并入而不改变顺序执行的结果：与组内任一字符串可能重叠时不能合并"""
+        x = rule.literal
+        if x is None:
+            return False
+        # 删除型规则会让两侧文本拼接出新匹配，后续规则不能与之合并
+        if self.closed:
+            return False
+        if not x:
+            return True
+        if '\0' in x:
+            return not any(_overlaps(x, text) for text in self.strings)
+        # x 包含于某个字符串，或 x 的后缀是某个字符串的前缀、x 的前缀是某个字符串的后缀
+        if x in self.joined:
+            return False
+        prefixes, suffixes = self.prefixes, self.suffixes
+        if any(x[-k:] in prefixes or x[:k] in suffixes for k in range(1, len(x) + 1)):
+            return False
+        # 某个字符串包含于 x
+        strings = self.strings
+        return not any(x[i:i + n] in strings for n in self.lengths if n <= len(x) for i in range(len(x) - n + 1))
+
+
+class LiteralStage:
+    """若干互不干扰的字面量规则，合并为一次扫描"""
+
+    def __init__(self, rules, pattern=None):
+        self.rules = rules
+        self.table = {rule.literal: rule.expanded for rule in rules}
+        self.pattern = _trie_pattern(self.table) if pattern is None else pattern
+        self._regex = None
+        self._binary = None
+
+    @property
+    def regex(self):
+        if self._regex is None:
+            self._regex = re.compile(self.pattern)
+        return self._regex
+
+    def apply(self, content):
+        table = self.table
+        return self.regex.sub(lambda m: table[m.group()], content)
+
+    def apply_bytes(self, data):
+        if self._binary is None:
+            table = {key.encode('utf-8'): value.encode('utf-8') for key, value in self.table.items()}
+            self._binary = re.compile(self.pattern.encode('utf-8')), table
+        regex, table = self._binary
+        if regex.search(data) is None:
+            return data
+        return regex.sub(lambda m: table[m.group()], data)
+
+
+class RegexStage:
+    """单条正则规则"""
+
+    def __init__(self, rule):
+        self.rules = [rule]
+        self.apply = rule.apply
+        self.apply_bytes = rule.apply_bytes
+
+
+class FunctionStage:
+    """规则表中的自定义处理函数，按原位置执行"""
+
+    def __init__(self, func):
+        self.rules = []
+        self.func = func
+
+    def apply(self, content):
+        return self.func(content)
+
+    def apply_bytes(self, data):
+        # 处理函数提供字节版本（如 ClassMap）时直接使用，否则交给文本模式
+        apply_bytes = getattr(self.func, 'apply_bytes', None)
+        return apply_bytes(data) if apply_bytes is not None else None
+
+
+class RuleSet:
+    """编译后的规则表"""
+
+    def __init__(self, table, name='rules'):
+        self.name = name
+        self.rules = []
+        self.stages = []
+        self._fingerprint = None
+        group = _MergeGroup()
+        for entry in table:
+            if callable(entry):
+                self._flush(group)
+                self.stages.append(FunctionStage(entry))
+                continue
+            if isinstance(entry, Fixpoint):
+                rule = Rule(len(self.rules), entry.pattern, entry.repl, entry.flags, fixpoint=True,
+                            anchor=entry.anchor)
+            else:
+                pattern, repl, *rest = entry
+                rule = Rule(len(self.rules), pattern, repl, rest[0] if rest else 0,
+                            anchor=rest[1] if len(rest) > 1 else None)
+            self.rules.append(rule)
+            if group and not rule.fixpoint and group.accepts(rule):
+                group.append(rule)
+                continue
+            self._flush(group)
+            if rule.literal is not None and not rule.fixpoint:
+                group.append(rule)
+            else:
+                self.stages.append(RegexStage(rule))
+        self._flush(group)
+
+    def _flush(self, group):
+        if group:
+            self.stages.append(LiteralStage(list(group.rules)))
+            group.clear()
+
+    def _apply_fast(self, content):
+        """单遍（按阶段）应用全部规则"""
+        for stage in self.stages:
+            content = stage.apply(content)
+        return content
+
+    def _apply_profiled(self, content):
+        """逐条执行并把每条规则的耗时、命中数、字节数记入当前分析记录"""
+        stats = _profile_stats
+        for stage in self.stages:
+            if isinstance(stage, FunctionStage):
+                func = stage.func
+                counted = getattr(func, 'apply_counted', None)
+                if counted is not None:
+                    content = self._profile_table(stats, func, counted, content)
+                    continue
+                start = perf_counter()
+                new_content = stage.apply(content)
+                elapsed = perf_counter() - start
+                _record(stats, f'{self.name}:{func.__name__}', func.__name__,
+                        elapsed, int(new_content != content), 0, len(new_content) - len(content))
+                content = new_content
+                continue
+            for rule in stage.rules:
+                start = perf_counter()
+                new_content, hits, matched = rule.apply_counted(content)
+                elapsed = perf_counter() - start
+                _record(stats, f'{self.name}[{rule.index}]', rule.pattern,
+                        elapsed, hits, matched, len(new_content) - len(content))
+                content = new_content
+        return content
+
+    def _profile_table(self, stats, func, counted, content):
+        """
+        映射表形式的处理函数（如 ClassMap）按映射逐条记录，未命中的映射同样登记，便于发现无用映射；
+        整张表一次扫描完成，耗时按映射条数平均分摊
+        """
+        start = perf_counter()
+        new_content, counts = counted(content)
+        elapsed = perf_counter() - start
+        labels = func.labels()
+        for i, label in enumerate(labels):
+            hits, matched, delta = counts.get(i, (0, 0, 0))
+            _record(stats, f'{self.name}:{func.__name__}[{i}]', label,
+                    elapsed / len(labels), hits, matched, delta)
+        return new_content
+
+    apply = _apply_fast
+
+    def __call__(self, content):
+        return self.apply(content)
+
+    def export_state(self):
+        """
+        返回 (数据, 处理函数列表)：数据只含基本类型，可用 marshal 保存；
+        处理函数按出现顺序单独返回，由调用方自行记录如何重建
+        """
+        if any(callable(rule.repl) for rule in self.rules):
+            raise ValueError(f'{self.name}: 回调形式的替换无法导出')
+        functions = []
+        stages = []
+        for stage in self.stages:
+            if isinstance(stage, FunctionStage):
+                stages.append(('function', len(functions)))
+                functions.append(stage.func)
+            elif isinstance(stage, LiteralStage):
+                stages.append(('literal', [rule.index for rule in stage.rules], stage.pattern))
+            else:
+                stages.append(('regex', stage.rules[0].index))
+        state = {'name': self.name, 'rules': [rule.export_state() for rule in self.rules], 'stages': stages}
+        return state, functions
+
+    @classmethod
+    def from_state(cls, state, functions):
+        """由 export_state() 的结果和重建好的处理函数恢复规则集"""
+        ruleset = cls.__new__(cls)
+        ruleset.name = state['name']
+        ruleset.rules = [Rule.from_state(rule) for rule in state['rules']]
+        ruleset.stages = []
+        ruleset._fingerprint = None
+        for kind, *args in state['stages']:
+            if kind == 'function':
+                ruleset.stages.append(FunctionStage(functions[args[0]]))
+            elif kind == 'literal':
+                ruleset.stages.append(LiteralStage([ruleset.rules[i] for i in args[0]], args[1]))
+            else:
+                ruleset.stages.append(RegexStage(ruleset.rules[args[0]]))
+        return ruleset
+
+    def apply_bytes(self, data):
+        """
+        在 UTF-8 原文（bytes 或 mmap）上执行规则，返回新的 bytes；没有任何改动时返回 None，
+        不解码也不复制。无法按字节执行的阶段（处理函数、不满足条件的正则）先解码再按文本执行，
+        文本未变时后续阶段继续按字节处理。
+        调用方需先用 binary.text_only 排除含 \\r 的内容。
+        """
+        content = data
+        text = None
+        in_text = False
+        for stage in self.stages:
+            if in_text:
+                text = stage.apply(text)
+                continue
+            new_content = stage.apply_bytes(content)
+            if new_content is not None:
+                if new_content is not content:
+                    content, text = new_content, None
+                continue
+            if text is None:
+                text = str(content, 'utf-8')
+            new_text = stage.apply(text)
+            if new_text != text:
+                text, in_text = new_text, True
+        if in_text:
+            content = text.encode('utf-8')
+        if content is data or memoryview(data) == content:
+            return None
+        return content
+
+    def apply_sequential(self, content):
+        """逐条执行规则的参考实现，结果应与 apply 相同"""
+        for stage in self.stages:
+            if isinstance(stage, FunctionStage):
+                content = stage.apply(content)
+            else:
+                for rule in stage.rules:
+                    content = rule.apply(content)
+        return content
+
+    def fingerprint(self):
+        """规则集指纹：规则内容或处理函数代码变化时随之变化"""
+        if self._fingerprint is None:
+            parts = []
+            for stage in self.stages:
+                if isinstance(stage, FunctionStage):
+                    parts.append(stage.func)
+                for rule in stage.rules:
+                    parts.extend([(rule.pattern, rule.flags, rule.fixpoint), rule.repl])
+            self._fingerprint = fingerprint(*parts)
+        return self._fingerprint
+
+    def __len__(self):
+        return len(self.rules)
+
+
+# 性能分析期间的统计数据；未开启时为 None，RuleSet.apply 走无埋点的快速路径
+_profile_stats = None
+
+
+def _record(stats, key, pattern, elapsed, hits, matched, delta):
+    entry = stats.get(key)
+    if entry is None:
+        entry = stats[key] = {'pattern': pattern, 'time': 0.0, 'matches': 0, 'bytes': 0, 'delta': 0}
+    entry['time'] += elapsed
+    entry['matches'] += hits
+    entry['bytes'] += matched
+    entry['delta'] += delta
+
+
+@contextmanager
+def profiling():
+    """
+    在上下文内逐条执行规则并统计，产出 {规则键: 统计} 字典
+    通过替换 RuleSet.apply 实现，关闭时没有任何额外开销
+    """
+    global _profile_stats
+    _profile_stats = stats = {}
+    RuleSet.apply = RuleSet._apply_profiled
+    try:
+        yield stats
+    finally:
+        RuleSet.apply = RuleSet._apply_fast
+        _profile_stats = None
+
+
+# 不动点规则表项：重复替换直到不再匹配
+Fixpoint = namedtuple('Fixpoint', ['pattern', 'repl', 'flags', 'anchor'], defaults=(0, None))
+
+
+def fixpoint(pattern, repl, flags=0, anchor=None):
+    """
+    构造不动点规则，语义等同于 while re.search(...): content = re.sub(...)
+    编译时检查幂等性：能证明一遍替换后不会产生新匹配的规则只扫描一遍
+    （并可与相邻字面量规则合并），否则逐遍替换直到没有匹配为止
+    """
+    return Fixpoint(pattern, repl, flags, anchor)
+
+
+def literal(old, new):
+    """按 str.replace 语义构造一条规则（不解释正则元字符和反斜杠）"""
+    return (re.escape(old), new.replace('\\', '\\\\'))
+
+
+def compile_rules(table, name='rules'):
+    """
+    把规则表编译为 RuleSet；表项为 (pattern, replacement[, flags[, anchor]]) 或处理函数
+    name 用于性能分析报告中标识规则
+    """
+    return RuleSet(table, name)
@@ -0,0 +1,170 @@
+"""
+规则回溯风险检测
+
+从各脚本收集全部正则规则，按模式中的字面量片段构造对抗输入
+（重复前缀、缺少结尾的未闭合结构、长空白串等），在成倍增长的规模下计时，
+用 log-log 斜率估计增长阶数；斜率超过阈值或单次匹配超出时间预算的规则视为超线性。
+"""
+
+import math
+import re
+try:
+    import re._parser as sre_parse
+except ImportError:
+    # Python 3.10 及更早
+    import sre_parse
+from time import perf_counter
+
+from .guard import RewriteTimeout, time_budget
+from .loader import load_script
+
+SCRIPTS = [
+    'batch-update.py',
+    'batch-update-all.py',
+    'batch-update-simple.py',
+    'refactor-css.py',
+    'refactor-html-full.py',
+    'update-css-refs.py',
+]
+
+DEFAULT_SIZES = (1024, 2048, 4096, 8192, 16384, 32768)
+DEFAULT_BUDGET = 1.0
+# 斜率 1 为线性，2 为平方
+DEFAULT_SLOPE = 1.5
+# 低于该耗时的测量受计时噪声影响太大，不参与拟合
+_MIN_TIME = 2e-4
+
+_LITERAL = sre_parse.LITERAL
+_NESTED = tuple(op for op in (sre_parse.SUBPATTERN, sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT,
+                             getattr(sre_parse, 'POSSESSIVE_REPEAT', None), sre_parse.ASSERT,
+                             sre_parse.ASSERT_NOT) if op is not None)
+
+
+def collect_rules(scripts=SCRIPTS):
+    """返回 [(来源, 已编译正则), ...]，同一模式只保留第一次出现"""
+    found = {}
+    for script in scripts:
+        module = load_script(script)
+        for name, value in vars(module).items():
+            if isinstance(value, re.Pattern):
+                found.setdefault((value.pattern, value.flags), (f'{script}:{name}', value))
+                continue
+            for rule in getattr(value, 'rules', ()):
+                regex = getattr(rule, 'regex', None)
+                if isinstance(regex, re.Pattern):
+                    found.setdefault((regex.pattern, regex.flags),
+                                     (f'{script}:{name}[{rule.index}]', regex))
+    return list(found.values())
+
+
+def _walk(items, chunks):
+    current = []
+    for op, av in items:
+        if op is _LITERAL:
+            current.append(chr(av))
+            continue
+        if current:
+            chunks.append(''.join(current))
+            current = []
+        if op is sre_parse.BRANCH:
+            _walk(av[1][0], chunks)
+        elif op in _NESTED:
+            _walk(av[-1], chunks)
+    if current:
+        chunks.append(''.join(current))
+
+
+def literal_chunks(regex):
+    """按出现顺序取出模式中的字面量片段"""
+    chunks = []
+    _walk(sre_parse.parse(regex.pattern, regex.flags), chunks)
+    return [chunk for chunk in chunks if chunk.strip()] or ['a']
+
+
+def _fill(unit, size):
+    return unit * max(1, size // max(1, len(unit)))
+
+
+def adversarial_inputs(chunks, size):
+    """产出 (名称, 输入)；各输入长度约为 size"""
+    yield 'prefix-repeat', _fill(chunks[0], size)
+    # 除最后一段外都出现：懒惰匹配会从每个起点一直扫到文本末尾
+    opened = ''.join(chunks[:-1]) if len(chunks) > 1 else chunks[0]
+    yield 'unterminated', _fill(opened, size)
+    yield 'unterminated-spaced', _fill(' \n '.join(chunks[:-1] or chunks) + ' \n ', size)
+    yield 'whitespace', chunks[0] + ' ' * size
+
+
+def _time_scan(regex, text, budget):
+    """扫描全文所有匹配的耗时；超出预算返回 None"""
+    start = perf_counter()
+    try:
+        with time_budget(budget):
+            for _ in regex.finditer(text):
+                pass
+    except RewriteTimeout:
+        return None
+    return perf_counter() - start
+
+
+def _slope(points):
+    """对 (规模, 耗时) 做 log-log 最小二乘，返回斜率；有效点不足时返回 None"""
+    points = [(math.log(n), math.log(t)) for n, t in points if t >= _MIN_TIME]
+    if len(points) < 3:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    var = sum((x - mean_x) ** 2 for x, _ in points)
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / var
+
+
+def fuzz_rule(regex, sizes=DEFAULT_SIZES, budget=DEFAULT_BUDGET):
+    """返回该规则最坏的对抗输入 {'input', 'slope', 'seconds', 'size', 'timeout'}"""
+    chunks = literal_chunks(regex)
+    timings = {}
+    timed_out = {}
+    for size in sizes:
+        for name, text in adversarial_inputs(chunks, size):
+            if name in timed_out:
+                continue
+            seconds = _time_scan(regex, text, budget)
+            if seconds is None:
+                timed_out[name] = len(text)
+                continue
+            timings.setdefault(name, []).append((len(text), seconds))
+    if timed_out:
+        name, size = min(timed_out.items(), key=lambda item: item[1])
+        return {'input': name, 'slope': None, 'seconds': budget, 'size': size, 'timeout': True}
+    worst = None
+    for name, points in timings.items():
+        slope = _slope(points)
+        size, seconds = points[-1]
+        entry = {'input': name, 'slope': slope, 'seconds': seconds, 'size': size, 'timeout': False}
+        if worst is None or (slope or 0) > (worst['slope'] or 0):
+            worst = entry
+    return worst
+
+
+def is_superlinear(entry, threshold=DEFAULT_SLOPE):
+    return entry['timeout'] or (entry['slope'] is not None and entry['slope'] >= threshold)
+
+
+def fuzz_all(scripts=SCRIPTS, sizes=DEFAULT_SIZES, budget=DEFAULT_BUDGET):
+    """返回 [(来源, 模式, 最坏结果), ...]"""
+    return [(source, regex.pattern, fuzz_rule(regex, sizes, budget))
+            for source, regex in collect_rules(scripts)]
+
+
+def print_results(results, threshold=DEFAULT_SLOPE, verbose=False):
+    print(f"{'规则':<36}{'斜率':>7}{'最大耗时(ms)':>14}{'规模':>8}  {'输入':<20}模式")
+    for source, pattern, entry in results:
+        flagged = is_superlinear(entry, threshold)
+        if not (flagged or verbose):
+            continue
+        slope = '超时' if entry['timeout'] else ('-' if entry['slope'] is None else f"{entry['slope']:.2f}")
+        pattern = pattern.replace('\n', '\\n')
+        if len(pattern) > 48:
+            pattern = pattern[:45] + '...'
+        mark = '⚠ ' if flagged else '  '
+        print(f"{mark}{source:<34}{slope:>7}{entry['seconds'] * 1000:>14.2f}{entry['size']:>8}"
+              f"  {entry['input']:<20}{pattern}")
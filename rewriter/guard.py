@@ -0,0 +1,46 @@
+"""
+重写时间预算
+
+正则匹配过程中会周期性检查信号，因此可以用 SIGALRM 打断回溯失控的规则。
+只在支持 setitimer 的平台且位于主线程时生效（逐个处理时的主进程、进程池中的工作进程均满足），
+其余情况下不做限制。
+"""
+
+import signal
+import threading
+from contextlib import contextmanager
+
+
+class RewriteTimeout(Exception):
+    """单个文件的重写超过了时间预算"""
+
+    def __init__(self, seconds):
+        # args 只保留秒数，保证异常能从工作进程 pickle 回主进程
+        super().__init__(seconds)
+        self.seconds = seconds
+
+    def __str__(self):
+        return f'重写超时（超过 {self.seconds:g} 秒），已跳过'
+
+
+def _supported():
+    return hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread()
+
+
+@contextmanager
+def time_budget(seconds):
+    """在 seconds 秒后中断上下文内的执行并抛出 RewriteTimeout；seconds 为空或 0 时不限制"""
+    if not seconds or not _supported():
+        yield
+        return
+
+    def on_alarm(signum, frame):
+        raise RewriteTimeout(seconds)
+
+    previous = signal.signal(signal.SIGALRM, on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
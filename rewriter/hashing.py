@@ -0,0 +1,66 @@
+"""内容与规则集的哈希"""
+
+import hashlib
+import re
+import types
+
+_ADDRESS = re.compile(r' at 0x[0-9a-fA-F]+')
+
+
+def digest_bytes(data):
+    """文件内容哈希（blake2b，128 位十六进制）"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def digest_text(text):
+    return digest_bytes(text.encode('utf-8'))
+
+
+def _update_code(h, code):
+    h.update(code.co_code)
+    h.update(repr(code.co_names).encode('utf-8'))
+    for const in code.co_consts:
+        if hasattr(const, 'co_code'):
+            _update_code(h, const)
+        else:
+            h.update(repr(const).encode('utf-8'))
+
+
+def _update(h, part, seen):
+    if hasattr(part, 'fingerprint'):
+        h.update(part.fingerprint().encode('utf-8'))
+    elif hasattr(part, '__code__'):
+        # 只对函数去重，防止相互引用时无限递归
+        if id(part) in seen:
+            return
+        seen.add(id(part))
+        code = part.__code__
+        h.update(part.__qualname__.encode('utf-8'))
+        _update_code(h, code)
+        # 函数引用的全局规则集、常量和辅助函数也会影响结果
+        for name in code.co_names:
+            if name in part.__globals__:
+                value = part.__globals__[name]
+                if not isinstance(value, (types.ModuleType, type)):
+                    _update(h, value, seen)
+    elif hasattr(part, 'pattern') and hasattr(part, 'flags'):
+        h.update(repr((part.pattern, part.flags)).encode('utf-8'))
+    elif isinstance(part, (set, frozenset)):
+        # 集合的迭代顺序随字符串哈希随机化变化
+        h.update(repr(sorted(part, key=repr)).encode('utf-8'))
+    else:
+        # 默认 repr 中的内存地址每次运行都不同
+        h.update(_ADDRESS.sub('', repr(part)).encode('utf-8'))
+    h.update(b'\0')
+
+
+def fingerprint(*parts):
+    """
+    计算规则集指纹
+    parts 可以是 RuleSet、处理函数、已编译正则或任意可 repr 的常量
+    """
+    h = hashlib.sha256()
+    seen = set()
+    for part in parts:
+        _update(h, part, seen)
+    return h.hexdigest()[:16]
@@ -0,0 +1,298 @@
+"""
+构建期代码高亮
+
+取出每个 <pre><code> 的纯文本，按 Java / YAML / XML 分词后重新生成紧凑的高亮标记
+（<i class="hl-k">...</i>，替换手写的 <span class="code-keyword"> 等），普通标识符和标点不加标记。
+语言取 language-xxx 类名，没有时按内容猜测；无法识别的语言、含有其他标签（如 step-marker）的代码块保持原样。
+只处理已经带有高亮标记的代码块，且新标记比原标记长时保留原样，处理后页面不会变大；
+没有任何标记的纯文本代码块不加高亮。
+
+高亮结果按 (语言, 代码文本) 的哈希缓存，规则不变时只有修改过的代码块需要重新分词；
+已经高亮过的代码块取出的纯文本不变，再次处理时原样输出。
+"""
+
+import html
+import json
+import os
+import re
+
+from .hashing import digest_text, fingerprint
+
+CACHE_NAME = '.highlight-cache.json'
+CACHE_VERSION = 1
+
+# 高亮类别 -> 类名后缀；颜色定义见 css/code.css
+# 只标记手写高亮中也会着色的类别；方法调用等普通标识符不加标记，保持输出紧凑
+KEYWORD, TYPE, STRING, COMMENT, NUMBER, ANNOTATION, PROPERTY = 'ktscnap'
+
+_BLOCK = re.compile(r'(<pre\b[^>]*>\s*<code\b([^>]*)>)(.*?)(</code>\s*</pre>)', re.S)
+_LANGUAGE = re.compile(r'\blanguage-([\w+-]+)')
+_TAG = re.compile(r'<(/?)([A-Za-z][\w-]*)([^>]*)>')
+# 手写高亮和本模块生成的高亮所用的类，只含这些标记的代码块可以重新生成
+_HIGHLIGHT_CLASS = re.compile(
+    r'\s*class="(?:code-(?:keyword|string|number|comment|function|variable|operator|class)'
+    r'|text-(?:blue|gray|orange|purple|yellow|green)-\d00|hl-[a-z])"\s*'
+)
+
+_LANGUAGES = {
+    'java': 'java',
+    'yaml': 'yaml',
+    'yml': 'yaml',
+    'xml': 'xml',
+    'html': 'xml',
+}
+
+_JAVA_KEYWORDS = frozenset('''
+    abstract assert boolean break byte case catch char class const continue default do double
+    else enum extends final finally float for goto if implements import instanceof int interface
+    long native new package private protected public record return sealed short static strictfp
+    super switch synchronized this throw throws transient try var void volatile while yield
+    true false null
+'''.split())
+
+_JAVA = re.compile(r'''
+    (?P<c>//[^\n]*|/\*.*?(?:\*/|\Z))
+  | (?P<s>"""(?:[^\\]|\\.)*?(?:"""|\Z)|"(?:[^"\\\n]|\\.)*"?|'(?:[^'\\\n]|\\.)*'?)
+  | (?P<a>@(?!interface\b)[A-Za-z_]\w*(?:\.\w+)*)
+  | (?P<n>\b(?:0[xX][0-9a-fA-F_]+|\d[\d_]*(?:\.\d+)?(?:[eE][+-]?\d+)?)[lLfFdD]?\b)
+  | (?P<w>[A-Za-z_$][\w$]*)
+''', re.S | re.X)
+
+_YAML = re.compile(r'''
+    (?P<c>(?<!\S)\#[^\n]*)
+  | (?P<p>(?:[\w$][\w.$/-]*|"[^"\n]*"|'[^'\n]*')(?=[ \t]*:(?:[ \t]|$)))
+  | (?P<a>\$\{[^}\n]*\})
+  | (?P<s>"(?:[^"\\\n]|\\.)*"|'(?:[^'\n]|'')*')
+  | (?P<k>(?<![\w.-])(?:true|false|null|yes|no|on|off|~)(?![\w.-]))
+  | (?P<n>(?<![\w.-])[-+]?\d+(?:\.\d+)?(?![\w.-]))
+  | (?P<t>(?<!\S)[&*!][\w-]+)
+''', re.M | re.X)
+
+_XML = re.compile(r'''
+    (?P<c><!--.*?(?:-->|\Z))
+  | (?P<s><!\[CDATA\[.*?(?:\]\]>|\Z))
+  | (?P<a><[?!][^>]*>?)
+  | (?P<tag><(?P<name>/?[\w:.-]+)(?P<attrs>(?:[^>"']|"[^"]*"|'[^']*')*?)(?P<end>\s*/?>))
+''', re.S | re.X)
+_XML_ATTR = re.compile(r'''([\w:.-]+)(\s*=\s*)("[^"]*"|'[^']*')?''')
+
+
+def _java(code, out):
+    last = 0
+    for m in _JAVA.finditer(code):
+        kind = m.lastgroup
+        text = m.group()
+        if kind == 'w':
+            if text in _JAVA_KEYWORDS:
+                kind = KEYWORD
+            elif text[0].isupper():
+                kind = TYPE
+            else:
+                continue
+        out.append((None, code[last:m.start()]))
+        out.append((kind, text))
+        last = m.end()
+    out.append((None, code[last:]))
+
+
+def _yaml(code, out):
+    last = 0
+    for m in _YAML.finditer(code):
+        out.append((None, code[last:m.start()]))
+        out.append((m.lastgroup, m.group()))
+        last = m.end()
+    out.append((None, code[last:]))
+
+
+def _xml(code, out):
+    last = 0
+    for m in _XML.finditer(code):
+        out.append((None, code[last:m.start()]))
+        last = m.end()
+        if m.group('tag') is None:
+            out.append((m.lastgroup, m.group()))
+            continue
+        attrs = m.group('attrs')
+        out.append((TYPE, '<' + m.group('name')))
+        position = 0
+        for attr in _XML_ATTR.finditer(attrs):
+            out.append((None, attrs[position:attr.start()]))
+            out.append((PROPERTY, attr.group(1)))
+            out.append((None, attr.group(2)))
+            if attr.group(3):
+                out.append((STRING, attr.group(3)))
+            position = attr.end()
+        out.append((None, attrs[position:]))
+        out.append((TYPE, m.group('end')))
+    out.append((None, code[last:]))
+
+
+def guess_language(code):
+    """没有 language-xxx 类名时按内容猜测语言；无法判断时返回 None"""
+    stripped = code.lstrip()
+    if stripped.startswith('<'):
+        return 'xml'
+    # JavaScript / TypeScript
+    if re.search(r'\bfrom\s+[\'"]|=>|\b(?:const|let|function)\s+\w+\s*[=(:]', code):
+        return None
+    if re.search(r'[;{]', code) and re.search(
+            r'\b(?:package|import|class|interface|public|private|new|return|void)\b', code):
+        return 'java'
+    # 片段式写法：Type name = ...;
+    if ';' in code and re.search(r'\b[A-Z]\w*(?:<[\w<>, ?]*>)?\s+[a-z]\w*\s*=', code):
+        return 'java'
+    lines = [line for line in code.splitlines() if line.strip() and not line.lstrip().startswith('#')]
+    keys = sum(1 for line in lines if re.match(r'\s*(?:-\s+)?[\w.$-]+:(?:\s|$)', line))
+    if lines and ';' not in code and keys * 2 >= len(lines):
+        return 'yaml'
+    return None
+
+
+def highlight_code(code, language):
+    """返回代码的高亮标记（已转义）；language 为 'java'、'yaml' 或 'xml'"""
+    tokens = []
+    if language == 'java':
+        _java(code, tokens)
+    elif language == 'yaml':
+        _yaml(code, tokens)
+    else:
+        _xml(code, tokens)
+    parts = []
+    current = None
+    for kind, text in tokens:
+        if not text:
+            continue
+        # 相邻同类记号合并为一个标记；标记之间的空白不单独打断
+        if kind != current and not (kind is None and current and text.isspace()):
+            if current:
+                parts.append('</i>')
+            if kind:
+                parts.append(f'<i class="hl-{kind}">')
+            current = kind
+        parts.append(html.escape(text, quote=False))
+    if current:
+        parts.append('</i>')
+    return ''.join(parts)
+
+
+def _plain_text(body):
+    """去掉高亮标记后的代码文本；含有其他标签时返回 None"""
+    for m in _TAG.finditer(body):
+        closing, name, attrs = m.groups()
+        if name not in ('span', 'i'):
+            return None
+        if closing:
+            if attrs.strip():
+                return None
+        elif _HIGHLIGHT_CLASS.fullmatch(attrs) is None:
+            return None
+    return html.unescape(_TAG.sub('', body))
+
+
+class Highlighter:
+    """
+    页面处理函数：重新生成页面中已高亮代码块的高亮
+    cache 为 {哈希: 高亮标记}，处理过程中会加入新结果；
+    在工作进程中运行时，新增的缓存条目和统计由 drain_updates 取出，随结果带回主进程合并
+    """
+
+    def __init__(self, cache=None, name='highlight'):
+        self.__name__ = name
+        self.cache = {} if cache is None else cache
+        self.used = set()
+        self.hits = 0
+        self.misses = 0
+        # 上次 drain_updates 之后新增的缓存条目和用到的键
+        self._added = {}
+        self._touched = set()
+        self._counts = [0, 0]
+
+    def __getstate__(self):
+        # 发送到工作进程时只带缓存，统计由主进程合并
+        state = self.__dict__.copy()
+        state['used'] = set()
+        state['hits'] = state['misses'] = 0
+        state['_added'] = {}
+        state['_touched'] = set()
+        state['_counts'] = [0, 0]
+        return state
+
+    def highlight(self, code, language):
+        key = digest_text(language + '\0' + code)
+        self.used.add(key)
+        self._touched.add(key)
+        result = self.cache.get(key)
+        if result is None:
+            self.misses += 1
+            self._counts[1] += 1
+            result = self.cache[key] = self._added[key] = highlight_code(code, language)
+        else:
+            self.hits += 1
+            self._counts[0] += 1
+        return result
+
+    def drain_updates(self):
+        """取出上次调用以来新增的缓存条目、用到的键和命中统计（工作进程中调用）"""
+        updates = self._added, self._touched, tuple(self._counts)
+        self._added = {}
+        self._touched = set()
+        self._counts = [0, 0]
+        return updates
+
+    def merge_updates(self, updates):
+        """合并工作进程 drain_updates 返回的结果（主进程中调用）"""
+        added, touched, (hits, misses) = updates
+        self.cache.update(added)
+        self.used |= touched
+        self.hits += hits
+        self.misses += misses
+
+    def _replace(self, m):
+        opening, attrs, body, closing = m.groups()
+        language = _LANGUAGE.search(opening)
+        language = language.group(1).lower() if language else None
+        if language is not None and language not in _LANGUAGES:
+            return m.group()
+        if _TAG.search(body) is None:
+            # 纯文本代码块不加高亮，否则页面会变大
+            return m.group()
+        code = _plain_text(body)
+        if code is None:
+            return m.group()
+        language = _LANGUAGES[language] if language else guess_language(code)
+        if language is None:
+            return m.group()
+        highlighted = self.highlight(code, language)
+        if len(highlighted) > len(body):
+            return m.group()
+        return opening + highlighted + closing
+
+    def __call__(self, content):
+        return _BLOCK.sub(self._replace, content)
+
+    def fingerprint(self):
+        # 只取决于规则，与缓存内容无关；增量清单据此判断是否需要重新处理
+        return fingerprint(self.__name__, Highlighter._replace, highlight_code, CACHE_VERSION)
+
+
+def load_cache(path):
+    """读取高亮缓存；规则已变化或文件损坏时返回空缓存"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get('rules') != Highlighter().fingerprint():
+        return {}
+    return data.get('blocks', {})
+
+
+def save_cache(path, cache, keep=None):
+    """原子写入缓存；keep 为要保留的键（为 None 时全部保留）"""
+    if keep is not None:
+        cache = {key: value for key, value in cache.items() if key in keep}
+    data = {'version': CACHE_VERSION, 'rules': Highlighter().fingerprint(), 'blocks': cache}
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
@@ -0,0 +1,35 @@
+"""按文件名加载仓库根目录下的脚本（脚本名含连字符，无法直接 import）"""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+# 仓库根目录，即各个批量脚本所在目录
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+
+
+def _module_name(filename):
+    return '_script_' + Path(filename).stem.replace('-', '_')
+
+
+def load_script(filename):
+    """加载脚本模块并缓存到 sys.modules，重复调用返回同一模块"""
+    name = _module_name(filename)
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.spec_from_file_location(name, SCRIPTS_DIR / filename)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[name]
+        raise
+    return module
+
+
+def reload_script(filename):
+    """丢弃缓存的模块并重新加载（脚本修改后使用）"""
+    sys.modules.pop(_module_name(filename), None)
+    return load_script(filename)
@@ -0,0 +1,112 @@
+"""
+增量处理清单
+
+清单是语料目录下的一个 JSON 文件，按脚本（工具名）分区，记录每个文件在
+当前规则集下处理完成后的 (mtime_ns, 大小, 内容哈希)。再次运行时：
+- 规则集指纹变化：该工具的全部记录作废
+- stat 与记录一致：直接跳过，不读取文件
+- stat 变化但内容哈希一致（例如只是 touch）：更新 stat 后跳过
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+
+from .hashing import digest_text, fingerprint
+
+MANIFEST_NAME = '.rewrite-manifest.json'
+MANIFEST_VERSION = 1
+
+
+class Manifest:
+    """单个工具在某个语料目录下的处理记录"""
+
+    def __init__(self, path, tool, rules):
+        self.path = Path(path)
+        self.root = os.path.abspath(self.path.parent)
+        self.tool = tool
+        self.rules = rules
+        self.data = self._load()
+        # 上次保存的时间；mtime 不早于它的记录可能与写入处于同一时间刻度，需要复核哈希
+        self.saved_at = self.data.get('saved_at', 0)
+        section = self.data['tools'].get(tool)
+        if not section or section.get('rules') != rules:
+            section = {'rules': rules, 'files': {}}
+            self.data['tools'][tool] = section
+        self.files = section['files']
+        self.dirty = False
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = None
+        if not isinstance(data, dict) or data.get('version') != MANIFEST_VERSION:
+            data = {'version': MANIFEST_VERSION, 'tools': {}}
+        return data
+
+    def _key(self, path):
+        # 只做字符串运算，不触发额外的系统调用
+        return Path(os.path.relpath(os.path.abspath(path), self.root)).as_posix()
+
+    def is_fresh(self, path):
+        """文件是否已在当前规则下处理过且之后未被修改"""
+        key = self._key(path)
+        entry = self.files.get(key)
+        if entry is None:
+            return False
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        mtime_ns, size, digest = entry
+        if st.st_size != size:
+            return False
+        if st.st_mtime_ns == mtime_ns and mtime_ns < self.saved_at:
+            return True
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                same = digest_text(f.read()) == digest
+        except (OSError, ValueError):
+            return False
+        if same:
+            self.files[key] = [st.st_mtime_ns, st.st_size, digest]
+            self.dirty = True
+        return same
+
+    def record(self, path, digest):
+        """记录文件处理完成后的状态"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return self.forget(path)
+        self.files[self._key(path)] = [st.st_mtime_ns, st.st_size, digest]
+        self.dirty = True
+
+    def forget(self, path):
+        if self.files.pop(self._key(path), None) is not None:
+            self.dirty = True
+
+    def save(self):
+        """原子写入清单（先写临时文件再替换）"""
+        if not self.dirty:
+            return
+        self.data['saved_at'] = time.time_ns()
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+
+def open_manifest(args, root, tool, transform):
+    """
+    根据命令行参数打开清单；未启用增量模式时返回 None
+    规则集指纹由 transform 及其引用的规则表计算
+    """
+    if not getattr(args, 'incremental', False):
+        return None
+    path = args.manifest or Path(root) / MANIFEST_NAME
+    return Manifest(path, tool, fingerprint(transform))
@@ -0,0 +1,123 @@
+"""
+HTML 压缩与预压缩
+
+只做不改变渲染结果的压缩：
+- <pre>、<textarea>、<script>、<style> 以及 class/style 中声明了 white-space: pre* 的元素整体原样保留；
+- 删除注释（条件注释除外）；
+- 文本中的连续空白折叠为一个空格，紧邻块级标签的空白整体删除（行内元素之间的空白有意义，保留一个空格）；
+- 标签内属性之间的空白折叠为一个空格，属性值不动。
+压缩结果幂等，重复运行不再变化。
+预压缩文件用 zlib 最高压缩级别生成 gzip 格式，头部不含时间戳，内容不变时字节完全一致。
+"""
+
+import re
+import zlib
+
+_TOKEN = re.compile(r'''<!--.*?(?:-->|\Z)|<(?:[^>"']|"[^"]*"|'[^']*')*>|[^<]+|<''', re.S)
+_TAG_NAME = re.compile(r'<(/?)([A-Za-z!][\w:-]*)')
+_TAG_SPACE = re.compile(r'''("[^"]*"|'[^']*')|[ \t\n\r\f]+''')
+_SPACE = re.compile(r'[ \t\n\r\f]+')
+_PRESERVE_STYLE = re.compile(r'''\bclass\s*=\s*["'][^"']*\bwhitespace-pre|white-space\s*:\s*pre''', re.I)
+
+_VERBATIM = {'pre', 'textarea', 'script', 'style'}
+_VOID = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+         'source', 'track', 'wbr', '!doctype'}
+# 前后空白不影响渲染的元素：块级元素、不渲染的元素、SVG 图形元素
+_BLOCK = {
+    '!doctype', 'html', 'head', 'body', 'title', 'meta', 'link', 'base', 'script', 'style', 'noscript',
+    'main', 'aside', 'nav', 'header', 'footer', 'section', 'article', 'div', 'p', 'ul', 'ol', 'li',
+    'dl', 'dt', 'dd', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'table', 'thead', 'tbody', 'tfoot', 'tr',
+    'td', 'th', 'caption', 'colgroup', 'col', 'form', 'fieldset', 'legend', 'hr', 'br', 'pre',
+    'blockquote', 'figure', 'figcaption', 'details', 'summary', 'address', 'template', 'option',
+    'path', 'g', 'circle', 'rect', 'line', 'polyline', 'polygon', 'ellipse', 'defs',
+}
+
+GZIP_LEVEL = 9
+
+
+def _tag_name(token):
+    m = _TAG_NAME.match(token)
+    if m is None:
+        return None, False
+    return m.group(2).lower(), bool(m.group(1))
+
+
+def _compact_tag(token):
+    """折叠属性之间的空白，去掉 > 前的空白；引号内的属性值保持不变"""
+    compact = _TAG_SPACE.sub(lambda m: m.group(1) or ' ', token)
+    if compact.endswith(' >'):
+        compact = compact[:-2] + '>'
+    elif compact.endswith(' />'):
+        compact = compact[:-3] + '/>'
+    return compact
+
+
+def _tokens(html):
+    """产出 (类型, 文本)：'raw' 为原样保留的片段，'tag' 为标签（附带标签名），'text' 为文本"""
+    tokens = _TOKEN.findall(html)
+    index = 0
+    while index < len(tokens):
+        token = tokens[index]
+        index += 1
+        if token.startswith('<!--'):
+            if token.startswith(('<!--[if', '<!--<![endif')):
+                yield 'raw', token, None
+            continue
+        if not token.startswith('<') or token == '<':
+            yield 'text', token, None
+            continue
+        name, closing = _tag_name(token)
+        if name is None:
+            yield 'text', token, None
+            continue
+        verbatim = not closing and name not in _VOID and not token.endswith('/>') and (
+            name in _VERBATIM or _PRESERVE_STYLE.search(token) is not None)
+        if not verbatim:
+            yield 'tag', _compact_tag(token), name
+            continue
+        # 原样保留到配对的结束标签为止（同名元素可以嵌套）
+        parts = [token]
+        depth = 1
+        while index < len(tokens) and depth:
+            inner = tokens[index]
+            index += 1
+            parts.append(inner)
+            inner_name, inner_closing = _tag_name(inner) if inner.startswith('<') else (None, False)
+            if inner_name == name and not inner.startswith('<!--'):
+                depth += -1 if inner_closing else (0 if inner.endswith('/>') else 1)
+        yield 'raw', ''.join(parts), name
+
+
+def minify_html(html):
+    """返回压缩后的 HTML"""
+    out = []
+    pending = None
+    # 上一个输出的记号是否为块级标签（文档开头视为是）
+    after_block = True
+    for kind, token, name in _tokens(html):
+        if kind == 'text':
+            pending = token if pending is None else pending + token
+            continue
+        block = name in _BLOCK
+        if pending is not None:
+            text = _SPACE.sub(' ', pending)
+            if after_block:
+                text = text.lstrip(' ')
+            if block:
+                text = text.rstrip(' ')
+            if text:
+                out.append(text)
+            pending = None
+        out.append(token)
+        after_block = block
+    if pending is not None:
+        text = _SPACE.sub(' ', pending).strip(' ') if after_block else _SPACE.sub(' ', pending).rstrip(' ')
+        if text:
+            out.append(text)
+    return ''.join(out)
+
+
+def gzip_bytes(data):
+    """gzip 格式、最高压缩级别、头部时间戳为 0"""
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS, 9)
+    return compressor.compress(data) + compressor.flush()
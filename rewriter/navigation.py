@@ -0,0 +1,180 @@
+"""
+共享导航栏
+
+侧边栏只按页面注册表渲染一次，同时记录每个链接 class 属性的插入位置；
+各页面的副本只是在自己的链接处插入激活类，再整体替换页面中原有的 <aside> 元素（纯字符串查找，不跑正则）。
+渲染结果按注册表和模板的指纹缓存到文件，导航不变时不再渲染。
+"""
+
+import html
+import json
+import os
+
+from .hashing import fingerprint
+
+CACHE_NAME = '.nav-cache.json'
+ACTIVE_CLASS = 'sidebar-nav-link-active'
+
+# 页面注册表：[(分组标题, [(页面名, 链接文字), ...]), ...]，页面名即文件名去掉 .html
+NAV_GROUPS = [
+    ('快速开始', [
+        ('index', '概览'),
+        ('getting-started', '环境准备'),
+        ('core-concepts', '核心概念'),
+    ]),
+    ('核心功能', [
+        ('embedding-models', 'Embedding 模型'),
+        ('prompt-templates', 'Prompt 模板'),
+        ('output-parsers', '输出解析'),
+        ('model-providers', '模型提供商'),
+        ('function-calling-deep', '函数调用'),
+        ('advanced-features', '高级特性'),
+        ('multimodal-full', '多模态'),
+    ]),
+    ('RAG 完整指南', [
+        ('rag-intro', 'RAG 简介'),
+        ('rag-setup', 'RAG 环境搭建'),
+        ('rag-implementation', 'RAG 实现'),
+        ('rag-advanced', 'RAG 高级'),
+    ]),
+    ('项目实战', [
+        ('project-chatbot', '聊天机器人'),
+        ('project-ai-assistant', 'AI助手'),
+        ('project-rag-kb', 'RAG知识库'),
+        ('practice', '综合实战'),
+    ]),
+    ('最佳实践', [
+        ('best-practices', '最佳实践'),
+        ('testing-strategies', '测试策略'),
+        ('performance-tuning', '性能优化'),
+        ('deep-dive', '深度解析'),
+        ('error-handling', '错误处理'),
+        ('moderation-safety', '内容审核'),
+        ('troubleshooting', '故障排查'),
+    ]),
+    ('面试准备', [
+        ('interview-prep', '面试准备'),
+    ]),
+    ('其他', [
+        ('search', '向量搜索'),
+        ('chat-listeners', '监听器'),
+        ('faq', '常见问题'),
+        ('cost-optimization', '成本优化'),
+        ('deployment', '部署上线'),
+        ('integrations', '框架集成'),
+        ('examples', '实战示例'),
+    ]),
+]
+
+_HEADER = '''<aside class="sidebar">
+  <div class="sidebar-content">
+    <div class="sidebar-logo">
+      <div class="sidebar-logo-icon">
+        <svg class="sidebar-logo-svg" fill="none" stroke="currentColor" viewBox="0 0 24 24">
+          <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M13 10V3L4 14h7v7l9-11h-7z"/>
+        </svg>
+      </div>
+      <div>
+        <h1 class="sidebar-logo-title">LangChain4j</h1>
+        <p class="sidebar-logo-subtitle">入门指南</p>
+      </div>
+    </div>
+
+    <div class="space-y-6">
+'''
+_GROUP_START = '''      <div class="sidebar-nav-group">
+        <h3 class="sidebar-nav-title">{title}</h3>
+        <ul class="sidebar-nav-list">
+'''
+# {slot} 处为激活类的插入位置
+_LINK = '          <li><a href="{page}.html" class="sidebar-nav-link{slot}" data-page="{page}">{label}</a></li>\n'
+_GROUP_END = '''        </ul>
+      </div>
+'''
+_FOOTER = '''    </div>
+  </div>
+</aside>'''
+
+
+def render(groups=NAV_GROUPS):
+    """渲染不含激活状态的导航栏，返回 (HTML, {页面名: 激活类插入位置})"""
+    parts = [_HEADER]
+    length = len(_HEADER)
+    slots = {}
+    for index, (title, pages) in enumerate(groups):
+        chunk = ('\n' if index else '') + _GROUP_START.format(title=html.escape(title))
+        parts.append(chunk)
+        length += len(chunk)
+        for page, label in pages:
+            before, after = _LINK.format(page=page, label=html.escape(label), slot='\0').split('\0')
+            slots[page] = length + len(before)
+            parts.append(before + after)
+            length += len(before) + len(after)
+        parts.append(_GROUP_END)
+        length += len(_GROUP_END)
+    parts.append(_FOOTER)
+    return ''.join(parts), slots
+
+
+class NavPartial:
+    """渲染好的导航栏；stamp() 为单个页面生成带激活状态的副本"""
+
+    def __init__(self, markup, slots):
+        self.markup = markup
+        self.slots = slots
+
+    def stamp(self, page):
+        """返回 page 页面的导航栏；page 不在注册表中时没有激活的链接"""
+        slot = self.slots.get(page)
+        if slot is None:
+            return self.markup
+        return self.markup[:slot] + ' ' + ACTIVE_CLASS + self.markup[slot:]
+
+
+def nav_fingerprint(groups=NAV_GROUPS):
+    return fingerprint(groups, render, ACTIVE_CLASS)
+
+
+def load_partial(cache_path=None, groups=NAV_GROUPS):
+    """
+    返回 (NavPartial, 是否命中缓存)
+    cache_path 为空时不使用缓存；缓存的指纹与注册表、模板不一致时重新渲染并写回
+    """
+    key = nav_fingerprint(groups)
+    if cache_path:
+        try:
+            with open(cache_path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = None
+        if isinstance(data, dict) and data.get('key') == key:
+            return NavPartial(data['markup'], data['slots']), True
+    markup, slots = render(groups)
+    if cache_path:
+        tmp_path = cache_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'key': key, 'markup': markup, 'slots': slots}, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+    return NavPartial(markup, slots), False
+
+
+def _find_nav(content):
+    """返回页面中导航栏 <aside> 元素的 (起点, 终点)；没有时返回 None"""
+    start = content.find('<aside')
+    while start >= 0:
+        end = content.find('</aside>', start)
+        if end < 0:
+            return None
+        if content.find('data-page="', start, end) >= 0:
+            return start, end + len('</aside>')
+        start = content.find('<aside', end)
+    return None
+
+
+def splice_nav(partial, page, content):
+    """用 page 页面的导航栏副本替换 content 中原有的导航栏；没有导航栏时原样返回"""
+    span = _find_nav(content)
+    if span is None:
+        return content
+    start, end = span
+    return content[:start] + partial.stamp(page) + content[end:]
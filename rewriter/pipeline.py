@@ -0,0 +1,142 @@
+"""
+单次读写的重写流水线
+
+把各个迁移脚本的规则作为阶段按声明的顺序串起来，每个页面只读取、写回一次。
+各阶段沿用原脚本处理的页面范围：全部 *.html、排除导航模板，或脚本中列出的页面。
+某个阶段出错时与逐个运行原脚本的结果一致：该阶段对这个页面不生效，后续阶段照常执行，
+最后以 StageError 报告出错的阶段并带出其余阶段的结果，由调用方写回。
+脚本在第一次真正需要重写页面时才加载，规则指纹按脚本和 rewriter 包的源文件内容计算，
+增量模式下没有页面需要处理时不加载任何规则。
+"""
+
+import ast
+import os
+
+from .hashing import digest_bytes, fingerprint
+from .loader import SCRIPTS_DIR, load_script
+
+# 页面范围：ALL 为目录下全部 *.html；PAGES 排除导航模板；其他值为脚本中页面列表的变量名
+ALL = 'all'
+PAGES = 'pages'
+
+TEMPLATES = ('NAVIGATION_FIXED.html', 'UNIFIED_NAV_TEMPLATE.html')
+
+# 阶段名 -> (脚本, 模块中的规则集或处理函数, 页面范围)
+STAGES = {
+    'update-css-refs': ('update-css-refs.py', 'update_css_content', ALL),
+    'refactor-css': ('refactor-css.py', 'ALL_RULES', PAGES),
+    'refactor-html-full': ('refactor-html-full.py', '_STYLE_RULES', PAGES),
+    'batch-update': ('batch-update.py', 'RULES', 'HTML_FILES'),
+    'batch-update-simple': ('batch-update-simple.py', 'RULES', 'HTML_FILES'),
+    'batch-update-all': ('batch-update-all.py', 'RULES', PAGES),
+}
+
+# 与逐个运行原脚本的顺序相同
+DEFAULT_STAGES = list(STAGES)
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _script_list(script, name):
+    """不执行脚本，从源码中读出模块级的页面列表常量"""
+    tree = ast.parse(_read_bytes(SCRIPTS_DIR / script), script)
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == name for t in node.targets):
+            return ast.literal_eval(node.value)
+    raise ValueError(f'{script} 中没有页面列表 {name}')
+
+
+def stage_pages(stage, names):
+    """names（目录下的文件名）中属于该阶段处理范围的文件名集合"""
+    script, _, scope = STAGES[stage]
+    if scope == ALL:
+        return set(names)
+    if scope == PAGES:
+        return {name for name in names if name not in TEMPLATES}
+    return set(names) & set(_script_list(script, scope))
+
+
+def plan(root, stages):
+    """
+    按页面实际要经过的阶段分组，返回 [(阶段名元组, [路径, ...]), ...]
+    不经过任何阶段的页面不出现在结果中
+    """
+    names = sorted(name for name in os.listdir(root) if name.endswith('.html'))
+    scopes = {stage: stage_pages(stage, names) for stage in stages}
+    groups = {}
+    for name in names:
+        chain = tuple(stage for stage in stages if name in scopes[stage])
+        if chain:
+            groups.setdefault(chain, []).append(os.path.join(root, name))
+    return list(groups.items())
+
+
+class StageError(Exception):
+    """部分阶段出错；content 为其余阶段处理后的内容，errors 为 [(阶段名, 错误信息), ...]"""
+
+    def __init__(self, errors, content):
+        super().__init__(errors, content)
+        self.errors = errors
+        self.content = content
+
+    def __str__(self):
+        return '; '.join(f'{stage}: {message}' for stage, message in self.errors)
+
+
+def finish_partial(path, error):
+    """把出错页面其余阶段的结果写回（同样进入当前运行的快照），返回是否有改动"""
+    from .runner import read_text, write_text
+
+    if read_text(path) == error.content:
+        return False
+    write_text(path, error.content)
+    return True
+
+
+class Pipeline:
+    """按顺序执行若干阶段的处理函数；各阶段返回 None 表示不修改"""
+
+    def __init__(self, stages):
+        unknown = [stage for stage in stages if stage not in STAGES]
+        if unknown:
+            raise ValueError(f"未知的阶段: {', '.join(unknown)}")
+        self.stages = tuple(stages)
+        self.__name__ = '+'.join(self.stages)
+        self.transforms = None
+
+    def load(self):
+        if self.transforms is None:
+            self.transforms = [getattr(load_script(STAGES[stage][0]), STAGES[stage][1]) for stage in self.stages]
+        return self.transforms
+
+    def __call__(self, content):
+        errors = []
+        for stage, transform in zip(self.stages, self.load()):
+            try:
+                new_content = transform(content)
+            except Exception as e:
+                # 错误信息转为字符串，结果需要从工作进程传回
+                kind = type(e).__name__ if type(e).__module__ == 'builtins' else f'{type(e).__module__}.{type(e).__name__}'
+                errors.append((stage, f'{kind}: {e}'))
+                continue
+            if new_content is not None:
+                content = new_content
+        if errors:
+            raise StageError(errors, content)
+        return content
+
+    def __getstate__(self):
+        # 工作进程自行加载脚本，不传递脚本模块中的对象
+        return {'stages': self.stages, '__name__': self.__name__, 'transforms': None}
+
+    def fingerprint(self):
+        # 按源文件内容计算，不导入脚本
+        sources = [(stage, digest_bytes(_read_bytes(SCRIPTS_DIR / STAGES[stage][0]))) for stage in self.stages]
+        package = [(name, digest_bytes(_read_bytes(os.path.join(_PACKAGE_DIR, name))))
+                   for name in sorted(os.listdir(_PACKAGE_DIR)) if name.endswith('.py')]
+        return fingerprint(self.__name__, sources, package)
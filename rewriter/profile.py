@@ -0,0 +1,78 @@
+"""
+规则性能分析报告
+
+汇总 --profile 模式下每个文件、每条规则的耗时、命中次数和字节数，
+写出 JSON 报告并在控制台打印按耗时排序的表格。
+未命中任何文件的规则会单独列出，便于清理无用规则。
+"""
+
+import json
+import os
+
+
+def _merge(total, stats):
+    for key, entry in stats.items():
+        merged = total.get(key)
+        if merged is None:
+            total[key] = dict(entry, files=int(entry['matches'] > 0))
+            continue
+        for field in ('time', 'matches', 'bytes', 'delta'):
+            merged[field] += entry[field]
+        merged['files'] += int(entry['matches'] > 0)
+
+
+class ProfileReport:
+    """收集 FileResult.profile 并输出报告"""
+
+    def __init__(self, path, limit=30):
+        self.path = path
+        self.limit = limit
+        self.rules = {}
+        self.files = {}
+
+    def add(self, result):
+        stats = result.profile
+        if not stats:
+            return
+        rules = stats['rules']
+        _merge(self.rules, rules)
+        self.files[os.fspath(result.path)] = {
+            'time': stats['time'],
+            'size': stats['size'],
+            'matches': sum(entry['matches'] for entry in rules.values()),
+            'bytes': sum(entry['bytes'] for entry in rules.values()),
+            'rules': {key: entry['matches'] for key, entry in rules.items() if entry['matches']},
+        }
+
+    def _sorted_rules(self):
+        return sorted(self.rules.items(), key=lambda item: item[1]['time'], reverse=True)
+
+    def write(self):
+        report = {
+            'files': self.files,
+            'rules': dict(self._sorted_rules()),
+            'dead_rules': [key for key, entry in self.rules.items() if not entry['matches']],
+        }
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    def print_table(self):
+        total_time = sum(entry['time'] for entry in self.files.values())
+        print()
+        print(f"性能分析：{len(self.files)} 个文件，{len(self.rules)} 条规则，"
+              f"重写总耗时 {total_time * 1000:.1f} ms")
+        print(f"{'规则':<28}{'耗时(ms)':>10}{'命中':>8}{'文件':>6}{'匹配字节':>10}{'字节变化':>10}  模式")
+        for key, entry in self._sorted_rules()[:self.limit]:
+            pattern = entry['pattern'].replace('\n', '\\n')
+            if len(pattern) > 48:
+                pattern = pattern[:45] + '...'
+            print(f"{key:<28}{entry['time'] * 1000:>10.2f}{entry['matches']:>8}{entry['files']:>6}"
+                  f"{entry['bytes']:>10}{entry['delta']:>10}  {pattern}")
+        dead = [key for key, entry in self.rules.items() if not entry['matches']]
+        if dead:
+            print(f"未命中任何文件的规则 ({len(dead)}): {', '.join(dead)}")
+        print(f"报告已写入: {self.path}")
+
+    def finish(self):
+        self.write()
+        self.print_table()
@@ -0,0 +1,219 @@
+"""
+未使用 CSS 清理
+
+扫描全部页面（*.html 中的真实标签，不含代码示例里转义的标记）和 web/src/pages/*.tsx
+（JSX 标签、字符串与模板字面量中的单词、id 属性），得到站点用到的标签、类和 id；
+样式规则中选择器所需的名字（判断方式与关键 CSS 相同，见 critical.selector_requires）
+不全在其中、也不在白名单中的选择器删除，所有选择器都被删除的规则整条删除，
+变空的 @media / @supports 随之删除；@font-face、@keyframes 等其他 @ 规则保留。
+标签选择器（img、hr、blockquote 等基础样式）默认全部保留，只按类和 id 清理；
+keep_elements=False 时标签同样要求在页面中出现。
+
+purge_bundle 在打包后的节点树上清理，源样式表不变（Source Map 仍指向原位置）；
+purge_css 直接在样式表原文上删除对应片段，注释、缩进和其余格式保持不变。
+"""
+
+import fnmatch
+import re
+
+from .critical import selector_requires, split_selectors, used_names
+from .cssbundle import _TOKEN, Block
+
+# 页面中没有静态出现、由其他阶段或脚本生成的名字（类、id、标签均可，支持 * 通配）
+SAFELIST = [
+    'sidebar-nav-link-active',  # render-nav.py 按页面插入的激活类
+    'hl-*',                     # highlight-code.py 生成的高亮标记 <i class="hl-x">
+    'i',
+]
+
+_JSX_TAG = re.compile(r'<([a-z][\w-]*)')
+_JSX_ID = re.compile(r'''\bid=["']([^"']+)["']''')
+_JS_STRING = re.compile(r'''"((?:[^"\\\n]|\\.)*)"|'((?:[^'\\\n]|\\.)*)'|`((?:[^`\\]|\\.)*)`''', re.S)
+_TEMPLATE_EXPR = re.compile(r'\$\{[^}]*\}')
+_CLASS_WORD = re.compile(r'[^\s"\'`{}]+')
+_CONDITIONAL = ('@media', '@supports')
+
+
+class UsedNames:
+    """站点用到的标签、类和 id"""
+
+    def __init__(self, safelist=SAFELIST, keep_elements=True):
+        self.keep_elements = keep_elements
+        self.tags = set()
+        self.classes = set()
+        self.ids = set()
+        self.patterns = [name for name in safelist if '*' in name or '?' in name]
+        self.safe = set(safelist) - set(self.patterns)
+
+    def add_html(self, html):
+        tags, classes, ids = used_names(html)
+        self.tags |= tags
+        self.classes |= classes
+        self.ids |= ids
+
+    def add_tsx(self, source):
+        # 类名可能来自拼接和条件表达式，所有字面量中的单词都按类名处理（宁多勿少）
+        self.tags.update(_JSX_TAG.findall(source))
+        self.ids.update(_JSX_ID.findall(source))
+        for m in _JS_STRING.finditer(source):
+            text = m.group(1) or m.group(2) or _TEMPLATE_EXPR.sub(' ', m.group(3) or '')
+            self.classes.update(_CLASS_WORD.findall(text))
+
+    def _safe(self, name):
+        return name in self.safe or any(fnmatch.fnmatchcase(name, pattern) for pattern in self.patterns)
+
+    def keeps(self, selector):
+        tags, classes, ids = selector_requires(selector)
+        return ((self.keep_elements or all(tag in self.tags or self._safe(tag) for tag in tags))
+                and all(name in self.classes or self._safe(name) for name in classes)
+                and all(name in self.ids or self._safe(name) for name in ids))
+
+
+class _Rule:
+    """样式表中的一个块：前导部分与整个块在原文中的范围"""
+    __slots__ = ('start', 'prelude_end', 'end', 'prelude', 'children')
+
+    def __init__(self, start, prelude_end, prelude):
+        self.start = start
+        self.prelude_end = prelude_end
+        self.prelude = prelude
+        self.end = None
+        self.children = []
+
+
+def _parse(text):
+    top = []
+    stack = []
+    start = None
+    last = None
+    for m in _TOKEN.finditer(text):
+        kind = m.lastgroup
+        if kind in ('space', 'comment'):
+            continue
+        if kind == 'open':
+            if start is None:
+                start = last = m.start()
+            rule = _Rule(start, last, text[start:last])
+            (stack[-1].children if stack else top).append(rule)
+            stack.append(rule)
+            start = None
+        elif kind == 'close':
+            if stack:
+                stack.pop().end = m.end()
+            start = None
+        elif kind == 'semi':
+            start = None
+        else:
+            if start is None:
+                start = m.start()
+            last = m.end()
+    # 未闭合的块延伸到文件结尾
+    for rule in stack:
+        rule.end = len(text)
+    return top
+
+
+def _purge(rules, used, edits, stats):
+    """收集删除和改写的片段，返回保留的块数"""
+    kept = 0
+    for rule in rules:
+        prelude = rule.prelude
+        if prelude.startswith('@'):
+            if prelude.lower().startswith(_CONDITIONAL) and rule.children:
+                inner = []
+                if _purge(rule.children, used, inner, stats):
+                    edits.extend(inner)
+                    kept += 1
+                else:
+                    edits.append((rule.start, rule.end, ''))
+            else:
+                kept += 1
+            continue
+        selectors = split_selectors(prelude)
+        survivors = [selector for selector in selectors if used.keeps(selector)]
+        stats['selectors'] += len(selectors) - len(survivors)
+        if not survivors:
+            edits.append((rule.start, rule.end, ''))
+            stats['rules'] += 1
+            continue
+        kept += 1
+        if len(survivors) < len(selectors):
+            separator = ',\n' if '\n' in prelude else ', '
+            edits.append((rule.start, rule.prelude_end, separator.join(survivors)))
+    return kept
+
+
+def _widen(text, start, end):
+    """整行只有被删除的块时，连同缩进和换行一起删除"""
+    line_start = text.rfind('\n', 0, start) + 1
+    if text[line_start:start].strip():
+        return start, end
+    line_end = text.find('\n', end)
+    line_end = len(text) if line_end < 0 else line_end + 1
+    if text[end:line_end].strip():
+        return start, end
+    # 前一行是空行时，后面的空行也一并删除，规则之间不留下多余的空行
+    previous = text.rfind('\n', 0, max(line_start - 1, 0)) + 1
+    if line_start == 0 or not text[previous:line_start].strip():
+        while line_end < len(text):
+            next_end = text.find('\n', line_end)
+            next_end = len(text) if next_end < 0 else next_end + 1
+            if text[line_end:next_end].strip():
+                break
+            line_end = next_end
+    return line_start, line_end
+
+
+def purge_css(text, used):
+    """返回 (清理后的样式表, {'rules': 删除的规则数, 'selectors': 删除的选择器数})"""
+    stats = {'rules': 0, 'selectors': 0}
+    edits = []
+    _purge(_parse(text), used, edits, stats)
+    parts = []
+    position = len(text)
+    for start, end, replacement in sorted(edits, reverse=True):
+        if not replacement:
+            start, end = _widen(text, start, end)
+        end = min(end, position)
+        parts.append(text[end:position])
+        parts.append(replacement)
+        position = start
+    parts.append(text[:position])
+    return ''.join(reversed(parts)), stats
+
+
+def _purge_nodes(nodes, used, stats):
+    """返回保留的节点；被删除的规则按所在源文件（Block.src 的源序号）计数"""
+    result = []
+    for node in nodes:
+        if isinstance(node, Block):
+            prelude = node.prelude
+            if prelude.startswith('@'):
+                if prelude.lower().startswith(_CONDITIONAL) and node.children:
+                    node.children = _purge_nodes(node.children, used, stats)
+                    if not node.children:
+                        continue
+            else:
+                selectors = split_selectors(prelude)
+                survivors = [selector for selector in selectors if used.keeps(selector)]
+                counts = stats['sources'].setdefault(node.src[0], {'rules': 0, 'selectors': 0})
+                counts['selectors'] += len(selectors) - len(survivors)
+                stats['selectors'] += len(selectors) - len(survivors)
+                if not survivors:
+                    counts['rules'] += 1
+                    stats['rules'] += 1
+                    continue
+                if len(survivors) < len(selectors):
+                    node.prelude = ','.join(survivors)
+        result.append(node)
+    return result
+
+
+def purge_bundle(bundle, used):
+    """
+    在打包结果（cssbundle.Bundle）上删除无法匹配的选择器和规则
+    返回 {'rules', 'selectors', 'sources': {源序号: {'rules', 'selectors'}}}
+    """
+    stats = {'rules': 0, 'selectors': 0, 'sources': {}}
+    bundle.nodes = _purge_nodes(bundle.nodes, used, stats)
+    return stats
@@ -0,0 +1,200 @@
+"""
+数据文件声明的规则表与编译缓存（规则包）
+
+规则文件为 JSON 数组，表项按顺序执行：
+    {"pattern": "...", "replace": "...", "flags": ["MULTILINE"], "anchor": "..."}
+    {"literal": "...", "replace": "..."}                  按 str.replace 语义
+    {"fixpoint": true, "pattern": "...", "replace": "..."} 重复替换直到不再匹配
+    {"classes": [[标签, 原 class, 新 class], ...], "tokens": {...}, "name": "..."}
+    {"function": "batch-update.py:remove_tailwind"}        仓库根目录脚本中的处理函数
+flags、anchor 可省略；anchor 为每个匹配都必然包含的字面量，用于无法从模式推出前缀的规则。
+
+规则分析（字面量识别、幂等性、合并检查）对几千条规则要花很长时间，结果与页面无关，
+所以编译一次后用 marshal 存到规则文件旁的 .rulepacks/ 目录，按规则文件内容和引擎源码的哈希命名；
+之后加载时直接恢复 RuleSet，正则在第一次使用时才编译。
+"""
+
+import json
+import marshal
+import os
+import re
+from pathlib import Path
+
+from .engine import Fixpoint, RuleSet, literal
+from .hashing import digest_bytes, fingerprint
+
+# 规则包格式版本，数据结构变化时递增
+PACK_VERSION = 1
+
+PACK_DIR = '.rulepacks'
+
+_FLAGS = ('IGNORECASE', 'MULTILINE', 'DOTALL', 'VERBOSE', 'ASCII')
+
+# 影响分析结果的源文件
+_ENGINE_SOURCES = ('engine.py', 'classes.py', 'rulepack.py')
+_PACKAGE_DIR = Path(__file__).resolve().parent
+
+
+def _read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _parse_flags(names):
+    flags = 0
+    for name in names or ():
+        if name not in _FLAGS:
+            raise ValueError(f"未知的正则标志 {name!r}（可用: {', '.join(_FLAGS)}）")
+        flags |= getattr(re, name)
+    return flags
+
+
+def _format_flags(flags):
+    names = [name for name in _FLAGS if flags & getattr(re, name)]
+    if flags & ~sum(getattr(re, name) for name in names) & ~re.UNICODE:
+        raise ValueError(f'无法导出的正则标志 {flags!r}')
+    return names
+
+
+def _resolve_function(spec):
+    """把 "脚本:名称" 解析为脚本模块中的对象"""
+    from .loader import load_script
+
+    script, sep, name = spec.partition(':')
+    if not sep:
+        raise ValueError(f'处理函数应写作 脚本:名称，而不是 {spec!r}')
+    return getattr(load_script(script), name)
+
+
+def _build_function(spec):
+    """由规则包中记录的描述重建处理函数"""
+    kind, *args = spec
+    if kind == 'classes':
+        from .classes import ClassMap
+        renames, tokens, name = args
+        return ClassMap([tuple(rename) for rename in renames], tokens, name)
+    return _resolve_function(args[0])
+
+
+def parse_entry(entry):
+    """把规则文件中的一个表项转换为 compile_rules 的表项，处理函数同时返回其描述"""
+    if 'function' in entry:
+        return _resolve_function(entry['function']), ('function', entry['function'])
+    if 'classes' in entry:
+        from .classes import ClassMap
+        renames = [tuple(rename) for rename in entry['classes']]
+        tokens = entry.get('tokens') or {}
+        name = entry.get('name', 'classes')
+        return ClassMap(renames, tokens, name), ('classes', [list(r) for r in renames], tokens, name)
+    if 'literal' in entry:
+        return literal(entry['literal'], entry['replace']), None
+    flags = _parse_flags(entry.get('flags'))
+    anchor = entry.get('anchor')
+    if entry.get('fixpoint'):
+        return Fixpoint(entry['pattern'], entry['replace'], flags, anchor), None
+    return (entry['pattern'], entry['replace'], flags, anchor), None
+
+
+def compile_table(entries, name):
+    """编译规则文件的表项，返回 (RuleSet, 导出的状态, 处理函数描述列表)"""
+    table = []
+    specs = {}
+    for i, entry in enumerate(entries):
+        try:
+            item, spec = parse_entry(entry)
+        except (KeyError, TypeError, ValueError, re.error) as e:
+            raise ValueError(f'{name} 第 {i + 1} 条规则无效: {e!r}') from e
+        if spec is not None:
+            specs[id(item)] = spec
+        table.append(item)
+    ruleset = RuleSet(table, name)
+    state, functions = ruleset.export_state()
+    return ruleset, state, [specs[id(func)] for func in functions]
+
+
+def pack_path(rules_path, data):
+    """规则包路径：规则文件旁 .rulepacks/<文件名>.<哈希>.pack"""
+    rules_path = Path(rules_path)
+    key = fingerprint(PACK_VERSION, digest_bytes(data),
+                      [digest_bytes(_read_bytes(_PACKAGE_DIR / name)) for name in _ENGINE_SOURCES])
+    return rules_path.parent / PACK_DIR / f'{rules_path.name}.{key[:16]}.pack'
+
+
+def _write_pack(path, payload):
+    """原子写入规则包并删除同一规则文件的旧包"""
+    path.parent.mkdir(exist_ok=True)
+    tmp = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    try:
+        with open(tmp, 'wb') as f:
+            marshal.dump(payload, f)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    prefix = path.name.rsplit('.', 2)[0] + '.'
+    for old in path.parent.iterdir():
+        if old != path and old.name.startswith(prefix) and old.name.endswith('.pack'):
+            old.unlink(missing_ok=True)
+
+
+def load_pack(rules_path, rebuild=False):
+    """
+    加载规则文件对应的 RuleSet，返回 (RuleSet, 是否命中规则包)
+    规则包不存在、已过期或损坏时重新编译并写入
+    """
+    rules_path = Path(rules_path)
+    data = _read_bytes(rules_path)
+    path = pack_path(rules_path, data)
+    if not rebuild:
+        try:
+            # 整个读入后再 loads，比 marshal.load 逐段读取文件快一个数量级
+            version, state, functions = marshal.loads(_read_bytes(path))
+        except (OSError, EOFError, ValueError, TypeError):
+            pass
+        else:
+            if version == PACK_VERSION:
+                return RuleSet.from_state(state, [_build_function(spec) for spec in functions]), True
+    ruleset, state, functions = compile_table(json.loads(data), rules_path.stem)
+    try:
+        _write_pack(path, (PACK_VERSION, state, functions))
+    except OSError as e:
+        print(f"⚠ 无法写入规则包 {path}: {e}")
+    return ruleset, False
+
+
+def load_rules(rules_path):
+    """加载规则文件对应的 RuleSet（优先使用规则包）"""
+    return load_pack(rules_path)[0]
+
+
+def export_entries(ruleset):
+    """
+    把编译好的 RuleSet 导出为规则文件表项
+    处理函数须是仓库根目录脚本的模块级函数或 ClassMap；表项按阶段顺序输出，执行结果与原规则集相同
+    """
+    from .classes import ClassMap
+
+    if not isinstance(ruleset, RuleSet):
+        raise ValueError(f'{type(ruleset).__name__} 不是编译好的规则集')
+    entries = []
+    for stage in ruleset.stages:
+        func = getattr(stage, 'func', None)
+        if isinstance(func, ClassMap):
+            entries.append({'classes': [list(rename) for rename in func.renames],
+                            'tokens': func.tokens, 'name': func.__name__})
+        elif func is not None:
+            script = os.path.basename(func.__globals__.get('__file__') or '')
+            if not script or getattr(_resolve_function(f'{script}:{func.__name__}'), '__code__', None) is not func.__code__:
+                raise ValueError(f'处理函数 {func.__name__} 不是脚本的模块级函数，无法导出')
+            entries.append({'function': f'{script}:{func.__name__}'})
+        else:
+            for rule in stage.rules:
+                if callable(rule.repl):
+                    raise ValueError(f'{ruleset.name}[{rule.index}]: 回调形式的替换无法导出')
+                entry = {'pattern': rule.pattern, 'replace': rule.repl}
+                if rule.flags:
+                    entry['flags'] = _format_flags(rule.flags)
+                if rule.fixpoint:
+                    entry = {'fixpoint': True, **entry}
+                entries.append(entry)
+    return entries
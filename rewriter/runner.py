@@ -0,0 +1,343 @@
+"""
+批量文件处理：读取 -> 重写 -> 写回
+
+jobs=1 时在当前进程内逐个处理；jobs>1 时正则重写分发到进程池，
+文件读写交给线程池，结果始终按输入顺序返回，便于打印统一的汇总。
+
+字节模式（binary=True，transform 为 RuleSet）下直接在文件的 mmap 上执行规则，
+没有改动的文件不解码也不复制；并行时由工作进程自行映射和写回文件。
+"""
+
+import os
+import stat
+import threading
+from collections import namedtuple
+from itertools import repeat
+from time import perf_counter
+
+from .engine import profiling
+from .binary import map_file, text_only
+from .guard import time_budget
+from .hashing import digest_bytes, digest_text
+
+UPDATED = 'updated'
+UNCHANGED = 'unchanged'
+SKIPPED = 'skipped'
+FAILED = 'failed'
+# 增量模式下，清单显示文件在当前规则下已处理过，未读取内容
+CACHED = 'cached'
+
+# status 取上面几个值之一；error 仅在 FAILED 时有值；
+# digest 为处理后内容的哈希，仅在增量模式下计算；profile 为性能分析数据，仅在 --profile 时收集
+FileResult = namedtuple('FileResult', ['path', 'status', 'error', 'digest', 'profile'],
+                        defaults=(None, None))
+
+
+# 当前运行的快照库（snapshot.SnapshotStore），由 run_files 和工作进程初始化时设置；
+# 设置后写回前先保存原始内容，新内容写入临时文件再整体替换
+_snapshot = None
+
+
+def read_text(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _write(path, mode, content, encoding=None):
+    if _snapshot is None:
+        with open(path, mode, encoding=encoding) as f:
+            f.write(content)
+        return
+    _snapshot.preserve(path, content)
+    path = os.fspath(path)
+    tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        with open(tmp, mode, encoding=encoding) as f:
+            f.write(content)
+        os.chmod(tmp, stat.S_IMODE(os.stat(path).st_mode))
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def write_text(path, content):
+    _write(path, 'w', content, 'utf-8')
+
+
+def write_bytes(path, data):
+    _write(path, 'wb', data)
+
+
+def _profiled(transform, content):
+    """开启逐条规则统计执行 transform，返回 (新内容, 分析数据)"""
+    with profiling() as stats:
+        start = perf_counter()
+        new_content = transform(content)
+        elapsed = perf_counter() - start
+    return new_content, {'time': elapsed, 'size': len(content.encode('utf-8')), 'rules': stats}
+
+
+def _transform(transform, content, digest=False, profile=False, timeout=None):
+    """
+    在工作进程中执行重写
+    返回 (状态, 新内容, 错误, 哈希, 分析数据)；未改变时不回传内容，减少进程间拷贝；
+    超过 timeout 秒的重写以 RewriteTimeout 记为失败，不写回文件
+    """
+    stats = None
+    try:
+        with time_budget(timeout):
+            if profile:
+                new_content, stats = _profiled(transform, content)
+            else:
+                new_content = transform(content)
+    except Exception as e:
+        return FAILED, None, e, None, None
+    if new_content is None:
+        return SKIPPED, None, None, digest_text(content) if digest else None, stats
+    if new_content == content:
+        return UNCHANGED, None, None, digest_text(content) if digest else None, stats
+    return UPDATED, new_content, None, digest_text(new_content) if digest else None, stats
+
+
+def rewrite_file(path, transform, digest=False, profile=False, timeout=None):
+    """
+    处理单个文件
+    transform 接收文件内容并返回新内容；返回 None 表示跳过该文件
+    """
+    try:
+        content = read_text(path)
+    except Exception as e:
+        return FileResult(path, FAILED, e)
+    status, new_content, error, content_digest, stats = _transform(transform, content, digest, profile, timeout)
+    if status == UPDATED:
+        try:
+            write_text(path, new_content)
+        except Exception as e:
+            return FileResult(path, FAILED, e)
+    return FileResult(path, status, error, content_digest, stats)
+
+
+def rewrite_file_bytes(path, rules, digest=False, timeout=None):
+    """
+    字节模式处理单个文件，rules 为 RuleSet
+    内容含 \\r 时文本模式会转换换行，回退到 rewrite_file
+    """
+    try:
+        with map_file(path) as data:
+            if text_only(data):
+                data = None
+            else:
+                with time_budget(timeout):
+                    new_data = rules.apply_bytes(data)
+                content_digest = None
+                if digest:
+                    content_digest = digest_bytes(data if new_data is None else new_data)
+    except Exception as e:
+        return FileResult(path, FAILED, e)
+    if data is None:
+        return rewrite_file(path, rules, digest, False, timeout)
+    if new_data is None:
+        return FileResult(path, UNCHANGED, None, content_digest)
+    try:
+        write_bytes(path, new_data)
+    except Exception as e:
+        return FileResult(path, FAILED, e)
+    return FileResult(path, UPDATED, None, content_digest)
+
+
+def _read_safe(path):
+    try:
+        return read_text(path), None
+    except Exception as e:
+        return None, e
+
+
+def _write_safe(path, content):
+    try:
+        write_text(path, content)
+        return None
+    except Exception as e:
+        return e
+
+
+def _finish(pending):
+    """等待写入完成，按顺序产出结果"""
+    for path, (status, _, error, content_digest, stats), future in pending:
+        if future is not None:
+            write_error = future.result()
+            if write_error is not None:
+                status, error, content_digest = FAILED, write_error, None
+        yield FileResult(path, status, error, content_digest, stats)
+
+
+# 工作进程中的 transform，由进程池初始化时设置一次，避免每个任务重复 pickle
+_worker_transform = None
+
+
+def _init_worker(transform, snapshot=None):
+    global _worker_transform, _snapshot
+    _worker_transform = transform
+    _snapshot = snapshot
+
+
+def _transform_in_worker(content, digest, profile, timeout):
+    outcome = _transform(_worker_transform, content, digest, profile, timeout)
+    # transform 在工作进程中积累的状态（如新增的缓存条目）随结果带回主进程
+    drain = getattr(_worker_transform, 'drain_updates', None)
+    return outcome, (drain() if drain is not None else None)
+
+
+def _rewrite_bytes_in_worker(path, digest, timeout):
+    return rewrite_file_bytes(path, _worker_transform, digest, timeout)
+
+
+def _run_parallel(paths, transform, jobs, batch_size, digest, profile, timeout):
+    # 进程池模块较重，只在并行时导入
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    io_workers = min(32, jobs * 4)
+    cpu = ProcessPoolExecutor(jobs, initializer=_init_worker, initargs=(transform,))
+    with ThreadPoolExecutor(io_workers) as io, cpu:
+        previous = []
+        # 分批读取，避免一次性把整个语料载入内存
+        for start in range(0, len(paths), batch_size):
+            batch = paths[start:start + batch_size]
+            loaded = list(io.map(_read_safe, batch))
+            contents = [content for content, _ in loaded if content is not None]
+            transformed = iter(cpu.map(_transform_in_worker, contents,
+                                       repeat(digest), repeat(profile), repeat(timeout),
+                                       chunksize=max(1, len(contents) // (jobs * 4))))
+            pending = []
+            for path, (content, read_error) in zip(batch, loaded):
+                if read_error is not None:
+                    pending.append((path, (FAILED, None, read_error, None, None), None))
+                    continue
+                outcome, updates = next(transformed)
+                if updates is not None:
+                    transform.merge_updates(updates)
+                future = io.submit(_write_safe, path, outcome[1]) if outcome[0] == UPDATED else None
+                # 结果中不保留新内容，写入完成后即可释放
+                pending.append((path, outcome[:1] + (None,) + outcome[2:], future))
+            # 上一批的写入与本批的读取/重写并行进行
+            yield from _finish(previous)
+            previous = pending
+        yield from _finish(previous)
+
+
+def _run_bytes(paths, rules, jobs, digest, timeout):
+    if jobs == 1 or len(paths) <= 1:
+        for path in paths:
+            yield rewrite_file_bytes(path, rules, digest, timeout)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+
+    # 字节模式由工作进程自行写回，快照库随 transform 一起发送
+    with ProcessPoolExecutor(jobs, initializer=_init_worker, initargs=(rules, _snapshot)) as cpu:
+        yield from cpu.map(_rewrite_bytes_in_worker, paths, repeat(digest), repeat(timeout),
+                           chunksize=max(1, len(paths) // (jobs * 4)))
+
+
+def _run(paths, transform, jobs, batch_size, digest, profile, timeout, binary=False):
+    if binary:
+        yield from _run_bytes(paths, transform, jobs, digest, timeout)
+        return
+    if jobs == 1 or len(paths) <= 1:
+        for path in paths:
+            yield rewrite_file(path, transform, digest, profile, timeout)
+        return
+    yield from _run_parallel(paths, transform, jobs, batch_size or jobs * 16, digest, profile,
+                             timeout)
+
+
+def _run_incremental(paths, transform, jobs, batch_size, profile, timeout, binary, manifest):
+    fresh = [manifest.is_fresh(path) for path in paths]
+    results = _run([path for path, ok in zip(paths, fresh) if not ok],
+                   transform, jobs, batch_size, True, profile, timeout, binary)
+    try:
+        for path, ok in zip(paths, fresh):
+            if ok:
+                yield FileResult(path, CACHED, None)
+                continue
+            result = next(results)
+            if result.status == FAILED:
+                manifest.forget(path)
+            else:
+                manifest.record(path, result.digest)
+            yield result
+    finally:
+        manifest.save()
+
+
+def _skip_unmatched(paths, candidates, results):
+    """按输入顺序合并结果：不在 candidates 中的文件记为未改变，不读取"""
+    for path in paths:
+        if os.path.abspath(path) in candidates:
+            yield next(results)
+        else:
+            yield FileResult(path, UNCHANGED, None)
+
+
+def _results(paths, transform, jobs, batch_size, manifest, profile, timeout, binary, index):
+    candidates = index.candidates(transform, paths) if index is not None else None
+    if candidates is not None:
+        selected = [path for path in paths if os.path.abspath(path) in candidates]
+        return _skip_unmatched(paths, candidates,
+                               _results(selected, transform, jobs, batch_size, manifest, profile, timeout,
+                                        binary, None))
+    if jobs is None or jobs <= 0:
+        jobs = os.cpu_count() or 1
+    binary = binary and not profile and os.linesep == '\n' and hasattr(transform, 'apply_bytes')
+    if manifest is None:
+        return _run(paths, transform, jobs, batch_size, False, profile, timeout, binary)
+    return _run_incremental(paths, transform, jobs, batch_size, profile, timeout, binary, manifest)
+
+
+def run_files(paths, transform, jobs=1, batch_size=None, manifest=None, profiler=None,
+              timeout=None, binary=False, index=None, shard=None, report=None, snapshot=None):
+    """
+    按顺序逐个产出 FileResult
+    transform 为模块级函数或 RuleSet，jobs>1 时在每个工作进程初始化时发送一次；
+    transform 提供 drain_updates/merge_updates 时，工作进程每处理一个文件后取出其积累的状态，
+    在主进程中合并（如代码高亮的缓存）；
+    传入 manifest 时先用清单过滤掉当前规则下已处理过的文件，结束后保存清单；
+    传入 profiler 时逐条统计规则耗时与命中，结束后由 profiler 输出报告；
+    传入 timeout 时单个文件的重写超过该秒数即中断，记为失败并继续处理后续文件；
+    binary=True 且 transform 为 RuleSet 时按字节处理（性能分析模式下不生效；
+    系统换行符不是 \\n 时文本模式写回会转换换行，也不生效）；
+    传入 index（ClassIndex）时先按索引排除规则不可能命中的文件，这些文件记为未改变；
+    传入 shard（shard.Shard）时只处理落在该分片的文件；
+    传入 report（shard.RunReport）时同样逐条统计规则命中，结束后写出运行报告；
+    传入 snapshot（snapshot.SnapshotStore）时写回前先把原始内容存入快照库，供 rollback.py 回滚
+    """
+    global _snapshot
+    if snapshot is not None:
+        # 运行结束后保持设置，调用方在迭代结果时写回的文件（如流水线的部分结果）同样进入快照
+        _snapshot = snapshot
+    paths = list(paths)
+    if shard is not None:
+        paths = shard.select(paths)
+    results = _results(paths, transform, jobs, batch_size, manifest,
+                       profiler is not None or report is not None, timeout, binary, index)
+    if profiler is None and report is None:
+        yield from results
+        return
+    for result in results:
+        if profiler is not None:
+            profiler.add(result)
+        if report is not None:
+            report.add(result)
+        yield result
+    if profiler is not None:
+        profiler.finish()
+    if report is not None:
+        report.finish()
+
+
+def count_status(results):
+    """统计各状态的文件数"""
+    counts = {UPDATED: 0, UNCHANGED: 0, SKIPPED: 0, FAILED: 0, CACHED: 0}
+    for result in results:
+        counts[result.status] += 1
+    return counts
@@ -0,0 +1,343 @@
+"""
+静态全文搜索索引
+
+从各页面 <main> 中提取标题、正文和代码文本，按标题切分为小节，建立倒排索引：
+- 分词：连续的中日韩汉字切成重叠的二字词（单字保留单字），其余按单词切分并转小写；
+- 倒排表按词的前缀分片写成小 JSON 文件，浏览器只需下载查询词所在的分片；
+- 增量：每个页面的提取结果连同内容哈希保存在状态文件中，只重新解析变化的页面，
+  只重写这些页面新旧词条涉及的分片。
+
+输出目录结构：
+    docs.json          {"pages": {页面编号: [文件名, 页面标题, [[锚点, 小节标题], ...]]}}
+    shards/<前缀>.json  {词: [页面编号, 小节序号, 权重, 页面编号, 小节序号, 权重, ...]}
+    .state.json        增量状态，浏览器不需要
+查询时对每个查询词按 shard_key() 取分片，求各词命中小节的交集，按权重之和排序。
+"""
+
+import json
+import os
+import re
+import time
+from html.parser import HTMLParser
+
+from .hashing import digest_bytes
+
+INDEX_VERSION = 1
+STATE_NAME = '.state.json'
+DOCS_NAME = 'docs.json'
+SHARDS_DIR = 'shards'
+
+# 中日韩统一表意文字（含扩展 A）与兼容表意文字
+_CJK = '\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+_WORD = re.compile(f'[{_CJK}]+|[^\\W{_CJK}]+')
+_CJK_RUN = re.compile(f'[{_CJK}]')
+
+# 各部分文本中每个词的权重
+WEIGHTS = {'title': 8, 'heading': 4, 'text': 1, 'code': 1}
+
+_HEADINGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+_SKIPPED = {'script', 'style', 'nav', 'aside', 'svg', 'noscript', 'template'}
+_VOID = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+         'source', 'track', 'wbr'}
+
+
+def tokenize(text):
+    """返回文本中的词（按出现顺序，可重复）"""
+    tokens = []
+    for run in _WORD.findall(text.lower()):
+        if _CJK_RUN.match(run):
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        elif len(run) > 1:
+            tokens.append(run)
+    return tokens
+
+
+def shard_key(token):
+    """词所在分片：ASCII 词取首字母，其余按首字符码位的高位分组（每组 256 个码位）"""
+    first = token[0]
+    if first.isascii():
+        return first if first.isalnum() else '_'
+    return f'u{ord(first) >> 8:x}'
+
+
+class _PageParser(HTMLParser):
+    """按标题切分小节，收集 (锚点, 标题, {部分: [文本, ...]})"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ''
+        self.sections = []
+        self.anchor = ''
+        self.has_main = False
+        self._main = 0
+        self._skip = 0
+        self._heading = None
+        self._code = 0
+        self._in_title = False
+        self._new_section('', '')
+
+    def _new_section(self, anchor, heading):
+        self.sections.append([anchor, heading, {'heading': [], 'text': [], 'code': []}])
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'title':
+            self._in_title = True
+        if tag == 'main':
+            self.has_main = True
+            self._main += 1
+            return
+        if not self._main or tag in _VOID:
+            return
+        if self._skip or tag in _SKIPPED:
+            self._skip += 1
+            return
+        element_id = dict(attrs).get('id')
+        if element_id:
+            # 标题自身没有 id 时，使用最近出现的 id（通常是所在的 <section>）
+            self.anchor = element_id
+        if tag in _HEADINGS and self._heading is None:
+            self._heading = []
+        elif tag in ('pre', 'code'):
+            self._code += 1
+
+    def handle_endtag(self, tag):
+        if tag == 'title':
+            self._in_title = False
+        if tag == 'main':
+            self._main = max(0, self._main - 1)
+            return
+        if not self._main or tag in _VOID:
+            return
+        if self._skip:
+            self._skip -= 1
+            return
+        if tag in _HEADINGS and self._heading is not None:
+            heading = ' '.join(''.join(self._heading).split())
+            self._heading = None
+            self._new_section(self.anchor, heading)
+            self.sections[-1][2]['heading'].append(heading)
+        elif tag in ('pre', 'code'):
+            self._code = max(0, self._code - 1)
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        if not self._main or self._skip:
+            return
+        if self._heading is not None:
+            self._heading.append(data)
+        elif self._code:
+            self.sections[-1][2]['code'].append(data)
+        else:
+            self.sections[-1][2]['text'].append(data)
+
+
+def extract_page(html):
+    """
+    解析页面，返回 {'title', 'sections': [[锚点, 小节标题], ...], 'postings': {词: [[小节序号, 权重], ...]}}
+    没有 <main> 的页面（模板等）返回 None
+    """
+    parser = _PageParser()
+    parser.feed(html)
+    parser.close()
+    if not parser.has_main:
+        return None
+    title = ' '.join(parser.title.split())
+    sections = []
+    postings = {}
+    for anchor, heading, parts in parser.sections:
+        scores = {}
+        for part, texts in parts.items():
+            weight = WEIGHTS[part]
+            for token in tokenize(' '.join(texts)):
+                scores[token] = scores.get(token, 0) + weight
+        if not scores:
+            continue
+        number = len(sections)
+        sections.append([anchor, heading])
+        for token, score in scores.items():
+            postings.setdefault(token, []).append([number, score])
+    # 页面标题中的词加到第一个小节
+    if sections:
+        first = {}
+        for token in tokenize(title):
+            first[token] = first.get(token, 0) + WEIGHTS['title']
+        for token, score in first.items():
+            entries = postings.setdefault(token, [])
+            if entries and entries[0][0] == 0:
+                entries[0][1] += score
+            else:
+                entries.insert(0, [0, score])
+    return {'title': title, 'sections': sections, 'postings': postings}
+
+
+def _load_json(path, default):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def _write_json(path, data):
+    """内容不变时不重写；返回是否写入"""
+    text = json.dumps(data, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+    try:
+        with open(path, encoding='utf-8') as f:
+            if f.read() == text:
+                return False
+    except OSError:
+        pass
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+    return True
+
+
+class SearchIndex:
+    """输出目录中的索引及其增量状态"""
+
+    def __init__(self, directory, full=False):
+        self.directory = directory
+        self.state = None if full else _load_json(os.path.join(directory, STATE_NAME), None)
+        if not isinstance(self.state, dict) or self.state.get('version') != INDEX_VERSION:
+            self.state = {'version': INDEX_VERSION, 'next_id': 0, 'pages': {}}
+            self.rebuild = True
+        else:
+            self.rebuild = False
+        self.pages = self.state['pages']
+
+    def _fresh(self, name, path, st):
+        entry = self.pages.get(name)
+        if entry is None:
+            return None, None
+        # 与上次保存处于同一时间刻度内的修改可能没有改变 mtime，需要复核哈希
+        if entry['stat'] == [st.st_mtime_ns, st.st_size] and st.st_mtime_ns < self.state.get('saved_at', 0):
+            return entry, None
+        with open(path, 'rb') as f:
+            data = f.read()
+        digest = digest_bytes(data)
+        if entry['digest'] == digest:
+            entry['stat'] = [st.st_mtime_ns, st.st_size]
+            return entry, data
+        return None, data
+
+    def update(self, paths):
+        """
+        按页面增量更新索引，返回统计
+        {'indexed': [...], 'reused': n, 'removed': [...], 'skipped': [...], 'shards_written': n, 'shards_removed': n}
+        """
+        stats = {'indexed': [], 'reused': 0, 'removed': [], 'skipped': [],
+                 'shards_written': 0, 'shards_removed': 0}
+        touched = set()
+        seen = set()
+        for path in sorted(paths):
+            name = os.path.basename(path)
+            seen.add(name)
+            st = os.stat(path)
+            entry, data = self._fresh(name, path, st)
+            if entry is not None:
+                stats['reused'] += 1
+                continue
+            if data is None:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            page = extract_page(data.decode('utf-8'))
+            old = self.pages.pop(name, None)
+            # 页面编号不变，只有倒排项变化的词所在的分片需要重写
+            before = old['postings'] if old is not None else {}
+            after = page['postings'] if page is not None else {}
+            touched.update(shard_key(token) for token in before.keys() | after.keys()
+                           if before.get(token) != after.get(token))
+            if page is None:
+                stats['skipped'].append(name)
+                continue
+            page['id'] = old['id'] if old is not None else self._next_id()
+            page['stat'] = [st.st_mtime_ns, st.st_size]
+            page['digest'] = digest_bytes(data)
+            self.pages[name] = page
+            stats['indexed'].append(name)
+        for name in sorted(set(self.pages) - seen):
+            touched.update(map(shard_key, self.pages.pop(name)['postings']))
+            stats['removed'].append(name)
+
+        shards_dir = os.path.join(self.directory, SHARDS_DIR)
+        os.makedirs(shards_dir, exist_ok=True)
+        if self.rebuild:
+            touched.update(name[:-5] for name in os.listdir(shards_dir) if name.endswith('.json'))
+            touched.update(shard_key(token) for page in self.pages.values() for token in page['postings'])
+        if touched:
+            written, removed = self._write_shards(shards_dir, touched)
+            stats['shards_written'] = written
+            stats['shards_removed'] = removed
+        _write_json(os.path.join(self.directory, DOCS_NAME), self.docs())
+        self.state['saved_at'] = time.time_ns()
+        _write_json(os.path.join(self.directory, STATE_NAME), self.state)
+        return stats
+
+    def _next_id(self):
+        page_id = self.state['next_id']
+        self.state['next_id'] = page_id + 1
+        return page_id
+
+    def _write_shards(self, shards_dir, keys):
+        shards = {key: {} for key in keys}
+        # 按页面编号排列，分片内容与页面的处理顺序无关
+        for page in sorted(self.pages.values(), key=lambda page: page['id']):
+            for token, entries in page['postings'].items():
+                shard = shards.get(shard_key(token))
+                if shard is None:
+                    continue
+                flat = shard.setdefault(token, [])
+                for number, score in entries:
+                    flat.extend((page['id'], number, score))
+        written = removed = 0
+        for key, shard in shards.items():
+            path = os.path.join(shards_dir, key + '.json')
+            if shard:
+                written += _write_json(path, shard)
+            elif os.path.exists(path):
+                os.remove(path)
+                removed += 1
+        return written, removed
+
+    def docs(self):
+        return {'pages': {str(page['id']): [name, page['title'], page['sections']]
+                          for name, page in sorted(self.pages.items())}}
+
+
+def search(directory, query, limit=10):
+    """
+    按浏览器端相同的方式查询：只读取查询词所在的分片
+    返回 [(得分, 链接, 页面标题, 小节标题), ...]
+    """
+    tokens = list(dict.fromkeys(tokenize(query)))
+    if not tokens:
+        return []
+    shards = {}
+    hits = None
+    for token in tokens:
+        key = shard_key(token)
+        if key not in shards:
+            shards[key] = _load_json(os.path.join(directory, SHARDS_DIR, key + '.json'), {})
+        flat = shards[key].get(token, [])
+        scores = {}
+        for i in range(0, len(flat), 3):
+            scores[(flat[i], flat[i + 1])] = flat[i + 2]
+        if hits is None:
+            hits = scores
+        else:
+            hits = {doc: hits[doc] + score for doc, score in scores.items() if doc in hits}
+        if not hits:
+            return []
+    pages = _load_json(os.path.join(directory, DOCS_NAME), {}).get('pages', {})
+    results = []
+    for (page_id, number), score in sorted(hits.items(), key=lambda item: -item[1])[:limit]:
+        name, title, sections = pages[str(page_id)]
+        anchor, heading = sections[number]
+        results.append((score, f'{name}#{anchor}' if anchor else name, title, heading))
+    return results
@@ -0,0 +1,186 @@
+"""
+分片执行与运行报告
+
+--shard I/N 按文件相对语料目录的路径做稳定哈希，只处理落在第 I 片（1..N）的文件：
+同一个文件在任何机器、任何一次运行中都落在同一片，N 片合起来恰好覆盖全部文件。
+每片写出一个 JSON 运行报告（各文件状态、逐条规则命中、耗时），
+merge-reports.py 把各片报告合并为与单机运行相同的汇总。
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+
+from .profile import _merge
+
+REPORT_VERSION = 1
+
+# 同一报告路径在一次运行中只对应一个报告对象（流水线会对多组页面分别调用 run_files）
+_REPORTS = {}
+
+
+def relative_key(path, root):
+    """文件相对语料目录的路径，统一为 / 分隔，作为分片和报告的键"""
+    return os.path.relpath(os.path.abspath(path), os.path.abspath(root)).replace(os.sep, '/')
+
+
+def shard_of(key, count):
+    """key 所在的分片（1..count），与进程、平台和 PYTHONHASHSEED 无关"""
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % count + 1
+
+
+class Shard:
+    """第 index 片（共 count 片），按相对 root 的路径划分"""
+
+    def __init__(self, index, count, root):
+        self.index = index
+        self.count = count
+        self.root = root
+
+    def select(self, paths):
+        return [path for path in paths if shard_of(relative_key(path, self.root), self.count) == self.index]
+
+    def __str__(self):
+        return f'{self.index}/{self.count}'
+
+
+def default_report_path(shard):
+    """默认报告路径：当前目录下的 rewrite-report.<脚本名>[.<I>-of-<N>].json"""
+    script = os.path.splitext(os.path.basename(sys.argv[0]))[0] or 'rewrite'
+    suffix = f'.{shard[0]}-of-{shard[1]}' if shard else ''
+    return f'rewrite-report.{script}{suffix}.json'
+
+
+class RunReport:
+    """收集一次运行（一个分片）中各文件的结果，每次 run_files 结束时写出累计的报告"""
+
+    def __init__(self, path, root, shard=None):
+        self.path = path
+        self.root = root
+        self.shard = shard
+        self.tools = []
+        self.files = {}
+        self.rules = {}
+        self.started = time.time()
+
+    def add(self, result):
+        entry = {'status': result.status}
+        if result.error is not None:
+            entry['error'] = f'{type(result.error).__name__}: {result.error}'
+        stats = result.profile
+        if stats:
+            rules = stats['rules']
+            _merge(self.rules, rules)
+            entry['time'] = stats['time']
+            entry['rules'] = {key: rule['matches'] for key, rule in rules.items() if rule['matches']}
+        self.files[relative_key(result.path, self.root)] = entry
+
+    def counts(self):
+        counts = {}
+        for entry in self.files.values():
+            counts[entry['status']] = counts.get(entry['status'], 0) + 1
+        return counts
+
+    def write(self):
+        report = {
+            'version': REPORT_VERSION,
+            'tools': self.tools,
+            'shard': list(self.shard) if self.shard else None,
+            'elapsed': time.time() - self.started,
+            'counts': self.counts(),
+            'files': self.files,
+            'rules': self.rules,
+        }
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def finish(self):
+        self.write()
+        label = f'分片 {self.shard[0]}/{self.shard[1]} ' if self.shard else ''
+        print(f"ℹ {label}运行报告已写入: {self.path}（{len(self.files)} 个文件）")
+
+
+def open_report(args, root, tool):
+    """根据 --shard/--report 返回 (Shard 或 None, RunReport 或 None)"""
+    shard = getattr(args, 'shard', None)
+    report_path = getattr(args, 'report', None)
+    if not shard and not report_path:
+        return None, None
+    path = report_path if isinstance(report_path, str) else default_report_path(shard)
+    report = _REPORTS.get(path)
+    if report is None:
+        report = _REPORTS[path] = RunReport(path, root, shard)
+    if tool not in report.tools:
+        report.tools.append(tool)
+    return (Shard(shard[0], shard[1], root) if shard else None), report
+
+
+def load_reports(paths):
+    """读取各片报告，检查分片是否一致、齐全，返回 (报告列表, 问题列表)"""
+    reports = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+        if report.get('version') != REPORT_VERSION:
+            raise ValueError(f'{path}: 不支持的报告版本 {report.get("version")!r}')
+        report['path'] = os.fspath(path)
+        reports.append(report)
+    problems = []
+    shards = [tuple(report['shard']) for report in reports if report['shard']]
+    counts = {count for _, count in shards}
+    if len(counts) > 1:
+        problems.append(f"分片总数不一致: {', '.join(map(str, sorted(counts)))}")
+    elif counts:
+        count, = counts
+        seen = [index for index, _ in shards]
+        missing = sorted(set(range(1, count + 1)) - set(seen))
+        duplicated = sorted({index for index in seen if seen.count(index) > 1})
+        if missing:
+            problems.append(f"缺少分片: {', '.join(f'{index}/{count}' for index in missing)}")
+        if duplicated:
+            problems.append(f"重复的分片: {', '.join(f'{index}/{count}' for index in duplicated)}")
+    tools = {frozenset(report['tools']) for report in reports}
+    if len(tools) > 1:
+        problems.append(f"报告来自不同的工具: {'; '.join(', '.join(sorted(t)) for t in tools)}")
+    owners = {}
+    for report in reports:
+        for key in report['files']:
+            owners.setdefault(key, []).append(report['path'])
+    overlapping = [key for key, paths in owners.items() if len(paths) > 1]
+    if overlapping:
+        problems.append(f"{len(overlapping)} 个文件出现在多份报告中，例如 {overlapping[0]}")
+    return reports, problems
+
+
+def merge_reports(reports):
+    """合并各片报告的文件结果、规则命中和耗时"""
+    files = {}
+    rules = {}
+    tools = []
+    for report in reports:
+        files.update(report['files'])
+        tools.extend(tool for tool in report['tools'] if tool not in tools)
+        for key, entry in report['rules'].items():
+            merged = rules.get(key)
+            if merged is None:
+                rules[key] = dict(entry)
+                continue
+            for field in ('time', 'matches', 'bytes', 'delta', 'files'):
+                merged[field] += entry[field]
+    counts = {}
+    for entry in files.values():
+        counts[entry['status']] = counts.get(entry['status'], 0) + 1
+    return {
+        'version': REPORT_VERSION,
+        'tools': tools,
+        'shards': [report['shard'] for report in reports],
+        'elapsed': max((report['elapsed'] for report in reports), default=0),
+        'counts': counts,
+        'files': files,
+        'rules': rules,
+    }
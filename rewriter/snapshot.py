@@ -0,0 +1,286 @@
+"""
+重写前快照与回滚
+
+每次运行只保存实际被改写的文件的原始内容：写回前把原文件按内容哈希存入
+<语料目录>/.rewrite-snapshots/objects/（同一文件系统上用硬链接，不复制数据；
+新内容写入临时文件后整体替换，原 inode 只留在快照库中），相同内容只存一份；
+同时在 runs/<运行 ID>.jsonl 中追加一行 {"path", "before", "after", "mode"}。
+日志在写回前追加，运行中途中断也能回滚已写回的文件。
+
+回滚只处理日志中列出的文件，耗时与改动的文件数成正比；
+快照库超过大小上限时按最近使用时间（创建或回滚）淘汰最旧的运行，再删除不再被引用的对象。
+"""
+
+import atexit
+import json
+import os
+import shutil
+import stat
+import threading
+import time
+from pathlib import Path
+
+from .hashing import digest_bytes
+
+SNAPSHOT_DIR = '.rewrite-snapshots'
+DEFAULT_LIMIT = 256 * 1024 * 1024
+
+# 同一语料目录在一次运行中只对应一个快照（流水线会对多组页面分别调用 run_files）
+_STORES = {}
+
+
+def _relative(path, root):
+    return os.path.relpath(os.path.abspath(path), os.path.abspath(root)).replace(os.sep, '/')
+
+
+def _read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def new_run_id():
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+
+
+class SnapshotStore:
+    """语料目录 root 的快照库；run_id 为当前运行，未开始运行时只能查询、回滚和清理"""
+
+    def __init__(self, root, run_id=None, tool=None, limit=DEFAULT_LIMIT):
+        self.root = Path(root)
+        self.dir = self.root / SNAPSHOT_DIR
+        self.objects = self.dir / 'objects'
+        self.runs = self.dir / 'runs'
+        self.run_id = run_id
+        self.tools = [tool] if tool else []
+        self.limit = limit
+        self._journal = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # 工作进程各自打开日志（O_APPEND 追加，单行写入互不交错）
+        state = self.__dict__.copy()
+        state['_journal'] = None
+        state['_lock'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def object_path(self, digest):
+        return self.objects / digest[:2] / digest[2:]
+
+    def run_path(self, run_id):
+        return self.runs / f'{run_id}.jsonl'
+
+    def _append(self, record):
+        line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+        with self._lock:
+            if self._journal is None:
+                self.runs.mkdir(parents=True, exist_ok=True)
+                path = self.run_path(self.run_id)
+                fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                if os.fstat(fd).st_size == 0:
+                    os.write(fd, (json.dumps({'run': self.run_id, 'tools': self.tools,
+                                              'created': time.time()}) + '\n').encode('utf-8'))
+                self._journal = fd
+            os.write(self._journal, line)
+
+    def _store(self, path, data, digest):
+        """把 path 的当前内容存为对象：优先硬链接，跨文件系统等情况下复制"""
+        target = self.object_path(digest)
+        if target.exists():
+            return
+        target.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(path, target)
+            return
+        except FileExistsError:
+            return
+        except OSError:
+            pass
+        tmp = target.with_name(f'{target.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, target)
+
+    def preserve(self, path, new_content):
+        """
+        写回 path 之前调用：保存原始内容并记入日志
+        之后必须用新文件替换 path（不能原地写入），否则硬链接的对象会随之改变
+        """
+        data = _read_bytes(path)
+        before = digest_bytes(data)
+        if isinstance(new_content, str):
+            new_content = new_content.encode('utf-8')
+        self._store(path, data, before)
+        self._append({'path': _relative(path, self.root), 'before': before,
+                      'after': digest_bytes(new_content), 'mode': stat.S_IMODE(os.stat(path).st_mode)})
+
+    def close(self):
+        if self._journal is not None:
+            os.close(self._journal)
+            self._journal = None
+
+    # 查询、回滚、清理
+
+    def load_run(self, run_id):
+        """读取运行日志，返回 (头信息, {路径: 第一次写回前的记录}, 是否已回滚)"""
+        with open(self.run_path(run_id), 'r', encoding='utf-8') as f:
+            header = json.loads(f.readline())
+            files = {}
+            rolled_back = None
+            for line in f:
+                if not line.endswith('\n'):
+                    break  # 写入中断的最后一行
+                record = json.loads(line)
+                if 'rolled_back' in record:
+                    rolled_back = record['rolled_back']
+                else:
+                    # 同一运行中多次写回时以第一次之前的内容为准，最后一次之后的内容为准
+                    first = files.setdefault(record['path'], record)
+                    first['after'] = record['after']
+        return header, files, rolled_back
+
+    def list_runs(self):
+        """按最近使用时间从新到旧返回运行 ID"""
+        if not self.runs.is_dir():
+            return []
+        runs = [(path.stat().st_mtime, path.stem) for path in self.runs.glob('*.jsonl')]
+        return [run_id for _, run_id in sorted(runs, reverse=True)]
+
+    def latest_run(self):
+        """最近创建且尚未回滚的运行 ID，没有时返回 None"""
+        latest = None
+        for run_id in self.list_runs():
+            header, _, rolled_back = self.load_run(run_id)
+            if not rolled_back and (latest is None or header['created'] > latest[0]):
+                latest = header['created'], run_id
+        return latest and latest[1]
+
+    def restore(self, run_id, force=False):
+        """
+        把运行中改写过的文件恢复为原始内容，返回 [(路径, 结果)]，结果为 'restored'、'unchanged'、
+        'modified'（运行之后又被修改过，未加 force 时跳过）或 'missing'（对象已丢失）
+        """
+        _, files, _ = self.load_run(run_id)
+        results = []
+        for rel, record in files.items():
+            path = self.root / rel
+            source = self.object_path(record['before'])
+            try:
+                current = digest_bytes(_read_bytes(path))
+            except FileNotFoundError:
+                current = None
+            if current == record['before']:
+                results.append((rel, 'unchanged'))
+                continue
+            if current != record['after'] and not force:
+                results.append((rel, 'modified'))
+                continue
+            if not source.exists():
+                results.append((rel, 'missing'))
+                continue
+            # 复制而不是链接：恢复后的文件被原地编辑时不能影响快照库
+            tmp = path.with_name(f'.{path.name}.{os.getpid()}.restore')
+            shutil.copyfile(source, tmp)
+            os.chmod(tmp, record['mode'])
+            os.replace(tmp, path)
+            results.append((rel, 'restored'))
+        # 全部恢复（或本来就是原始内容）才记为已回滚；无论如何都更新日志的修改时间，即 LRU 的最近使用时间
+        if all(outcome in ('restored', 'unchanged') for _, outcome in results):
+            self._append_to(run_id, {'rolled_back': time.time()})
+        else:
+            os.utime(self.run_path(run_id))
+        return results
+
+    def _append_to(self, run_id, record):
+        with open(self.run_path(run_id), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + '\n')
+
+    def object_sizes(self):
+        """{对象哈希: 字节数}"""
+        sizes = {}
+        if self.objects.is_dir():
+            for directory in self.objects.iterdir():
+                for path in directory.iterdir():
+                    if not path.name.endswith('.tmp'):
+                        sizes[directory.name + path.name] = path.stat().st_size
+        return sizes
+
+    def references(self):
+        """{运行 ID: 引用的对象哈希集合}"""
+        refs = {}
+        for run_id in self.list_runs():
+            try:
+                _, files, _ = self.load_run(run_id)
+            except (OSError, ValueError):
+                files = {}
+            refs[run_id] = {record['before'] for record in files.values()}
+        return refs
+
+    def prune(self, limit=None, keep=()):
+        """
+        按最近使用时间淘汰运行，直到对象总大小不超过 limit，并删除不再被引用的对象；
+        keep 中的运行不淘汰。返回 (淘汰的运行 ID 列表, 释放的字节数)
+        """
+        limit = self.limit if limit is None else limit
+        sizes = self.object_sizes()
+        if sum(sizes.values()) <= limit:
+            return [], 0
+        refs = self.references()
+        counts = {}
+        for digests in refs.values():
+            for digest in digests:
+                counts[digest] = counts.get(digest, 0) + 1
+        # 没有运行引用的对象（运行中断或日志已删除）先清掉
+        garbage = [digest for digest in sizes if digest not in counts]
+        total = sum(sizes.values()) - sum(sizes[digest] for digest in garbage)
+        evicted = []
+        for run_id in reversed(self.list_runs()):
+            if total <= limit:
+                break
+            if run_id in keep or run_id == self.run_id:
+                continue
+            evicted.append(run_id)
+            for digest in refs[run_id]:
+                counts[digest] -= 1
+                if not counts[digest] and digest in sizes:
+                    garbage.append(digest)
+                    total -= sizes[digest]
+        for run_id in evicted:
+            self.run_path(run_id).unlink(missing_ok=True)
+        freed = 0
+        for digest in garbage:
+            freed += sizes[digest]
+            self.object_path(digest).unlink(missing_ok=True)
+        return evicted, freed
+
+    def finish(self):
+        """运行结束：关闭日志，报告保存的文件数，超过上限时清理"""
+        self.close()
+        path = self.run_path(self.run_id)
+        if not path.exists():
+            return
+        _, files, _ = self.load_run(self.run_id)
+        print(f"ℹ 快照 {self.run_id}: 已保存 {len(files)} 个被改写文件的原始内容"
+              f"（回滚: python3 rollback.py --root {self.root} restore {self.run_id}）")
+        evicted, freed = self.prune()
+        if evicted:
+            print(f"ℹ 快照库超过上限，淘汰 {len(evicted)} 个最久未用的运行，释放 {freed / 1024 / 1024:.1f} MB")
+
+
+def open_snapshot(args, root, tool):
+    """根据命令行参数返回当前运行的快照库；--no-snapshot 时返回 None"""
+    if getattr(args, 'no_snapshot', False):
+        return None
+    key = os.path.abspath(root)
+    store = _STORES.get(key)
+    if store is None:
+        store = _STORES[key] = SnapshotStore(root, new_run_id(), tool,
+                                             getattr(args, 'snapshot_limit', None) or DEFAULT_LIMIT)
+        # 一次运行可能多次调用 run_files，进程退出时统一收尾
+        atexit.register(store.finish)
+    elif tool not in store.tools:
+        store.tools.append(tool)
+    return store
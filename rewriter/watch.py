@@ -0,0 +1,320 @@
+"""
+监视模式
+
+常驻进程监视语料目录，文件保存后只重写受影响的页面：
+- 修改页面：只对这个页面执行规则链（以及导航栏、样式表引用、关键 CSS 等已启用的阶段）；
+- 修改共享依赖时才处理全部页面，且只写回内容真正变化的页面：
+  规则脚本（重新加载）、rewriter/navigation.py（页面注册表），以及 css/ 下的样式表变化后
+  实际重写了打包文件或指纹文件；
+- 样式表变化但打包文件和指纹都未重写时，只重新计算内联了关键 CSS 的页面。
+Linux 上用 inotify（ctypes 调用 libc，无需第三方库），其他平台退回按 mtime 轮询；
+编辑器保存时的一串事件在安静一段时间后合并为一次处理。
+自己写回的页面按内容哈希识别，不会再次触发处理。
+"""
+
+import ctypes
+import ctypes.util
+import importlib
+import os
+import select
+import struct
+import time
+from time import perf_counter
+
+from . import navigation
+from .assets import HASH_LENGTH, HISTORY_NAME, MANIFEST_NAME, fingerprint_assets, href_rules
+from .critical import CSS_DIR, CriticalInliner, inlined_css
+from .cssbundle import BUNDLE_NAME, build
+from .hashing import digest_text
+from .loader import SCRIPTS_DIR
+from .runner import FAILED, UNCHANGED, UPDATED, read_text, write_text
+
+# 最后一个事件之后安静这么久（秒）才开始处理；持续有事件时最多等待 MAX_WAIT
+DEBOUNCE = 0.2
+MAX_WAIT = 2.0
+POLL_INTERVAL = 0.5
+
+# 事件队列溢出时无法知道哪些文件变了，按全部变化处理
+OVERFLOW = '*'
+
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+# 只关心写完、改名和删除；IN_MODIFY 在写入过程中就会触发，此时文件可能只写了一半
+_MASK = _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_DELETE
+# struct inotify_event { int wd; uint32_t mask, cookie, len; char name[]; }
+_EVENT = struct.Struct('iIII')
+
+
+class InotifyWatcher:
+    """用 inotify 监视若干目录（不递归）"""
+
+    def __init__(self, dirs):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self.dirs = {}
+        for path in dirs:
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(path), _MASK)
+            if wd < 0:
+                errno = ctypes.get_errno()
+                self.close()
+                raise OSError(errno, os.strerror(errno), path)
+            self.dirs[wd] = path
+
+    def read(self, timeout=None):
+        """等待至多 timeout 秒（None 为一直等待），返回这段时间内变化的文件路径集合"""
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return set()
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+                offset += length
+                if mask & _IN_Q_OVERFLOW:
+                    changed.add(OVERFLOW)
+                elif wd in self.dirs and name:
+                    changed.add(os.path.join(self.dirs[wd], name))
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """按 (mtime_ns, 大小) 轮询若干目录（不递归）"""
+
+    def __init__(self, dirs, interval=POLL_INTERVAL):
+        self.dirs = list(dirs)
+        self.interval = interval
+        self.state = self._scan()
+
+    def _scan(self):
+        state = {}
+        for path in self.dirs:
+            try:
+                entries = os.scandir(path)
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    try:
+                        if entry.is_file():
+                            st = entry.stat()
+                            state[entry.path] = (st.st_mtime_ns, st.st_size)
+                    except OSError:
+                        pass
+        return state
+
+    def read(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.interval if deadline is None else min(self.interval, deadline - time.monotonic())
+            if wait > 0:
+                time.sleep(wait)
+            state = self._scan()
+            changed = {path for path in state.keys() | self.state.keys()
+                       if state.get(path) != self.state.get(path)}
+            self.state = state
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self):
+        pass
+
+
+def open_watcher(dirs, poll=False):
+    """优先使用 inotify，不可用（非 Linux、达到监视数上限等）时退回轮询"""
+    if not poll:
+        try:
+            return InotifyWatcher(dirs)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(dirs)
+
+
+def collect(watcher, quiet=DEBOUNCE, limit=MAX_WAIT):
+    """
+    等待第一批变化，再合并随后的事件，直到安静 quiet 秒或总计等待 limit 秒
+    返回 (变化的路径集合, 第一批事件到达的时刻)
+    """
+    changed = set()
+    while not changed:
+        changed = watcher.read(None)
+    first = perf_counter()
+    deadline = first + limit
+    while True:
+        remaining = deadline - perf_counter()
+        if remaining <= 0:
+            break
+        more = watcher.read(min(quiet, remaining))
+        if not more:
+            break
+        changed |= more
+    return changed, first
+
+
+def _is_generated_css(name):
+    """打包、指纹等工具生成的样式表文件，变化时不触发处理"""
+    if name in (BUNDLE_NAME, BUNDLE_NAME + '.map', MANIFEST_NAME, HISTORY_NAME) or name.endswith('.tmp'):
+        return True
+    _, dot, digest = name[:-len('.css')].rpartition('.')
+    return bool(dot) and len(digest) == HASH_LENGTH and all(c in '0123456789abcdef' for c in digest)
+
+
+class WatchSession:
+    """
+    监视模式的状态：规则链、导航栏、样式表相关阶段，以及各页面最近一次处理后的内容哈希
+    chain 为 RuleChain；excluded 中的页面（导航模板等）不处理
+    """
+
+    def __init__(self, root, chain, nav=True, excluded=()):
+        self.root = os.path.realpath(root)
+        self.css_dir = os.path.join(self.root, CSS_DIR)
+        self.chain = chain
+        self.excluded = set(excluded)
+        self.nav_path = os.path.realpath(navigation.__file__)
+        self.nav_cache = os.path.join(self.root, navigation.CACHE_NAME)
+        self.partial = navigation.load_partial(self.nav_cache)[0] if nav else None
+        self.rule_key = chain.refresh()
+        self.asset_rules = None
+        manifest_path = os.path.join(self.css_dir, MANIFEST_NAME)
+        if os.path.exists(manifest_path):
+            self.asset_rules = href_rules(fingerprint_assets(self.css_dir)['assets'])
+        self.inliner = CriticalInliner(self.root)
+        self.seen = {}
+
+    def watch_dirs(self):
+        dirs = [self.root, self.css_dir, os.path.realpath(SCRIPTS_DIR), os.path.dirname(self.nav_path)]
+        return [path for path in dict.fromkeys(dirs) if os.path.isdir(path)]
+
+    def pages(self):
+        return sorted(os.path.join(self.root, name) for name in os.listdir(self.root)
+                      if name.endswith('.html') and name not in self.excluded)
+
+    def _is_page(self, path):
+        name = os.path.basename(path)
+        return (os.path.dirname(path) == self.root and name.endswith('.html')
+                and name not in self.excluded)
+
+    def _is_css(self, path):
+        name = os.path.basename(path)
+        return os.path.dirname(path) == self.css_dir and name.endswith('.css') and not _is_generated_css(name)
+
+    def transform(self, path, content):
+        """页面的完整处理：规则链 -> 导航栏 -> 样式表引用 -> 关键 CSS"""
+        content = self.chain(content)
+        if self.partial is not None:
+            content = navigation.splice_nav(self.partial, os.path.basename(path)[:-len('.html')], content)
+        if self.asset_rules is not None:
+            content = self.asset_rules(content)
+        if inlined_css(content) is not None:
+            content = self.inliner(content) or content
+        return content
+
+    def process(self, path, force=False):
+        """
+        处理单个页面，返回 (状态, 错误)
+        内容与上次处理结果相同（包括自己刚写回的内容）且依赖未变时不处理
+        """
+        try:
+            content = read_text(path)
+        except FileNotFoundError:
+            self.seen.pop(path, None)
+            return None, None
+        except OSError as e:
+            return FAILED, e
+        digest = digest_text(content)
+        if not force and self.seen.get(path) == digest:
+            return None, None
+        try:
+            new_content = self.transform(path, content)
+        except Exception as e:
+            return FAILED, e
+        if new_content == content:
+            self.seen[path] = digest
+            return UNCHANGED, None
+        try:
+            write_text(path, new_content)
+        except OSError as e:
+            return FAILED, e
+        self.seen[path] = digest_text(new_content)
+        return UPDATED, None
+
+    def _critical_pages(self):
+        """内联了关键 CSS 的页面：样式表变化时只有这些页面的输出随之变化"""
+        pages = []
+        for path in self.pages():
+            try:
+                if inlined_css(read_text(path)) is not None:
+                    pages.append(path)
+            except OSError:
+                continue
+        return pages
+
+    def _refresh_dependencies(self, changed):
+        """
+        更新变化了的共享依赖，返回 (依赖说明列表, 是否需要处理全部页面, 样式表是否变化)
+        样式表变化但打包文件和指纹都没有重写时，只有内联关键 CSS 的页面需要重新处理
+        """
+        notes = []
+        everything = OVERFLOW in changed
+        if everything or any(path.endswith('.py') for path in changed):
+            key = self.chain.refresh()
+            if key != self.rule_key:
+                self.rule_key = key
+                notes.append('规则脚本')
+        if self.partial is not None and (everything or self.nav_path in changed):
+            importlib.reload(navigation)
+            partial = navigation.load_partial(self.nav_cache)[0]
+            if (partial.markup, partial.slots) != (self.partial.markup, self.partial.slots):
+                self.partial = partial
+                notes.append('导航栏')
+        css_changed = everything or any(self._is_css(path) for path in changed)
+        if css_changed:
+            bundle = os.path.join(self.css_dir, BUNDLE_NAME)
+            if os.path.exists(bundle):
+                if build(os.path.join(self.css_dir, 'main.css'), bundle)['written']:
+                    notes.append(f'{CSS_DIR}/{BUNDLE_NAME}')
+            if self.asset_rules is not None:
+                stats = fingerprint_assets(self.css_dir)
+                self.asset_rules = href_rules(stats['assets'])
+                if stats['written']:
+                    notes.append('样式表指纹')
+            self.inliner = CriticalInliner(self.root)
+        return notes, everything or bool(notes), css_changed
+
+    def handle(self, changed):
+        """
+        处理一批变化
+        返回 {'dependencies': [...], 'critical': [...], 'pages': [(路径, 状态, 错误, 秒数), ...]}，
+        dependencies 非空时检查了全部页面；critical 为因样式表变化重新计算关键 CSS 的页面；
+        pages 只列出实际处理过的页面
+        """
+        changed = {path if path == OVERFLOW else os.path.realpath(path) for path in changed}
+        notes, everything, css_changed = self._refresh_dependencies(changed)
+        critical = []
+        if everything:
+            targets = self.pages()
+        else:
+            if css_changed:
+                critical = self._critical_pages()
+            targets = sorted(set(critical) | {path for path in changed if self._is_page(path)})
+        forced = set(critical)
+        results = []
+        for path in targets:
+            start = perf_counter()
+            status, error = self.process(path, force=everything or path in forced)
+            if status is not None:
+                results.append((path, status, error, perf_counter() - start))
+        return {'dependencies': notes, 'critical': critical, 'pages': results}
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+回滚批量重写
+各批量脚本写回前会把被改写文件的原始内容存入语料目录下的 .rewrite-snapshots/，
+这里列出保存的运行并按运行回滚，只处理该次运行改写过的文件，例如：
+    python3 rollback.py list
+    python3 rollback.py restore                 # 回滚最近一次尚未回滚的运行
+    python3 rollback.py restore 20260101-120000-4242
+    python3 rollback.py prune --limit 100M
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from rewriter.cli import parse_size
+from rewriter.snapshot import SnapshotStore
+
+# 项目根目录
+PROJECT_DIR = Path("/Users/qingyu/langchain4j-intro")
+
+def show_runs(store):
+    """列出保存的运行，最近使用的在前"""
+    runs = store.list_runs()
+    if not runs:
+        print("ℹ 没有保存的快照")
+        return
+    sizes = store.object_sizes()
+    print(f"{'运行':<24}{'时间':<22}{'文件':>6}  工具")
+    for run_id in runs:
+        header, files, rolled_back = store.load_run(run_id)
+        created = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(header['created']))
+        state = '（已回滚）' if rolled_back else ''
+        print(f"{run_id:<24}{created:<22}{len(files):>6}  {', '.join(header['tools'])}{state}")
+    print(f"快照库共 {len(sizes)} 个对象，{sum(sizes.values()) / 1024 / 1024:.1f} MB")
+
+def restore(store, run_id, force):
+    """回滚一次运行，返回是否有文件因之后又被修改而跳过"""
+    runs = store.list_runs()
+    run_id = run_id or store.latest_run()
+    if run_id is None:
+        raise SystemExit("✗ 没有尚未回滚的快照")
+    if run_id not in runs:
+        raise SystemExit(f"✗ 找不到运行 {run_id}（可用 list 查看）")
+    start = time.perf_counter()
+    results = store.restore(run_id, force)
+    elapsed = time.perf_counter() - start
+    counts = {}
+    for rel, outcome in results:
+        counts[outcome] = counts.get(outcome, 0) + 1
+        if outcome == 'restored':
+            print(f"✓ 已恢复: {rel}")
+        elif outcome == 'modified':
+            print(f"⚠ 运行之后又被修改，跳过: {rel}（加 --force 强制恢复）")
+        elif outcome == 'missing':
+            print(f"✗ 快照对象已丢失: {rel}")
+    print("=" * 60)
+    print(f"运行 {run_id}: 恢复 {counts.get('restored', 0)} 个文件，已是原始内容 {counts.get('unchanged', 0)} 个，"
+          f"跳过 {counts.get('modified', 0)} 个，丢失 {counts.get('missing', 0)} 个（{elapsed * 1000:.1f} ms）")
+    return bool(counts.get('modified') or counts.get('missing'))
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='按运行回滚批量重写')
+    parser.add_argument('--root', type=Path, default=PROJECT_DIR, help=f'语料目录（默认 {PROJECT_DIR}）')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help='列出保存的运行')
+    restore_parser = commands.add_parser('restore', help='把一次运行改写过的文件恢复为原始内容')
+    restore_parser.add_argument('run', nargs='?', help='运行 ID（默认最近一次尚未回滚的运行）')
+    restore_parser.add_argument('--force', action='store_true', help='运行之后又被修改过的文件也恢复')
+    prune_parser = commands.add_parser('prune', help='淘汰最久未用的运行，直到快照库不超过上限')
+    prune_parser.add_argument('--limit', type=parse_size, default='256M', help='大小上限，如 500M、2G（默认 256M）')
+    args = parser.parse_args()
+
+    store = SnapshotStore(args.root)
+    if args.command == 'list':
+        show_runs(store)
+    elif args.command == 'restore':
+        if restore(store, args.run, args.force):
+            raise SystemExit(1)
+    else:
+        evicted, freed = store.prune(args.limit)
+        for run_id in evicted:
+            print(f"✓ 已淘汰: {run_id}")
+        print(f"释放 {freed / 1024 / 1024:.1f} MB")
+
+if __name__ == '__main__':
+    main()
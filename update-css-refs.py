@@ -8,41 +8,54 @@ import os
 import re
 import glob
 
-def update_css_reference(file_path):
-    """更新单个HTML文件的CSS引用"""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # 检查是否已经更新
-    if 'css/main.css' in content:
-        print(f"跳过 (已更新): {file_path}")
-        return False
-    
-    # 替换CSS引用
-    # 匹配 <link rel="stylesheet" href="styles.css">
-    pattern = r'<link rel="stylesheet" href="styles\.css">'
-    replacement = '''<!-- 模块化CSS -->
+from rewriter.cli import make_parser, run_options
+from rewriter.cssbundle import BUNDLE_NAME
+from rewriter.runner import FAILED, SKIPPED, UPDATED, rewrite_file, run_files
+
+# 项目根目录
+PROJECT_DIR = '/Users/qingyu/langchain4j-intro'
+
+# 匹配 <link rel="stylesheet" href="styles.css">
+CSS_LINK_PATTERN = re.compile(r'<link rel="stylesheet" href="styles\.css">')
+CSS_LINK_REPLACEMENT = '''<!-- 模块化CSS -->
     <link rel="stylesheet" href="css/main.css">'''
+
+def update_css_content(content):
+    """替换CSS引用；已更新过的内容返回 None 表示跳过"""
+    # 检查是否已经更新（bundle-css.py 会把引用改为打包文件）
+    if 'css/main.css' in content or 'css/' + BUNDLE_NAME in content:
+        return None
     
-    new_content = re.sub(pattern, replacement, content)
-    
-    if new_content != content:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(new_content)
-        print(f"已更新: {file_path}")
+    return CSS_LINK_PATTERN.sub(CSS_LINK_REPLACEMENT, content)
+
+def print_result(result):
+    """打印单个文件的处理结果，返回是否有更新"""
+    if result.status == UPDATED:
+        print(f"已更新: {result.path}")
         return True
+    if result.status == SKIPPED:
+        print(f"跳过 (已更新): {result.path}")
+    elif result.status == FAILED:
+        print(f"处理失败: {result.path} - {result.error}")
     else:
-        print(f"无需更新: {file_path}")
-        return False
+        print(f"无需更新: {result.path}")
+    return False
+
+def update_css_reference(file_path):
+    """更新单个HTML文件的CSS引用"""
+    return print_result(rewrite_file(file_path, update_css_content))
 
 def main():
     """主函数"""
+    args = make_parser('批量更新HTML文件的CSS引用').parse_args()
+    
     # 获取所有HTML文件
-    html_files = glob.glob('/Users/qingyu/langchain4j-intro/*.html')
+    html_files = glob.glob(os.path.join(PROJECT_DIR, '*.html'))
     
     updated_count = 0
-    for file_path in html_files:
-        if update_css_reference(file_path):
+    options = run_options(args, PROJECT_DIR, 'update-css-refs', update_css_content)
+    for result in run_files(html_files, update_css_content, **options):
+        if print_result(result):
             updated_count += 1
     
     print(f"\n总计更新 {updated_count} 个文件")
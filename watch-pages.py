@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+监视模式
+常驻运行，页面保存后只对这个页面执行规则链并写回；规则脚本、页面注册表或样式表修改后
+才处理全部页面（只写回内容变化的页面）。每批事件打印处理耗时和从事件到写回的延迟
+"""
+
+import argparse
+import os
+import traceback
+from time import perf_counter
+
+from rewriter.chain import DEFAULT_CHAIN, RuleChain, parse_spec
+from rewriter.runner import FAILED, UPDATED
+from rewriter.watch import DEBOUNCE, InotifyWatcher, WatchSession, collect, open_watcher
+
+# 项目根目录
+PROJECT_DIR = '/Users/qingyu/langchain4j-intro'
+
+# 导航模板页面，不参与处理
+EXCLUDED = ["NAVIGATION_FIXED.html", "UNIFIED_NAV_TEMPLATE.html"]
+
+def print_batch(report, first, done):
+    """打印一批事件的处理结果"""
+    if report['dependencies']:
+        print(f"ℹ 依赖变化: {'、'.join(report['dependencies'])}，重新检查全部页面")
+    elif report['critical']:
+        print(f"ℹ 样式表变化，重新计算 {len(report['critical'])} 个内联关键 CSS 的页面")
+    updated = unchanged = 0
+    for path, status, error, elapsed in report['pages']:
+        name = os.path.basename(path)
+        if status == UPDATED:
+            updated += 1
+            print(f"✓ 已更新: {name} ({elapsed * 1000:.1f} ms)")
+        elif status == FAILED:
+            print(f"✗ 处理失败: {name} - {error}")
+            traceback.print_exception(error)
+        else:
+            unchanged += 1
+            if not report['dependencies']:
+                print(f"ℹ 无需更新: {name} ({elapsed * 1000:.1f} ms)")
+    if report['pages'] or report['dependencies']:
+        summary = f"更新 {updated} 个，无需更新 {unchanged} 个" if report['dependencies'] else ''
+        print(f"  {summary}{'，' if summary else ''}事件到完成 {(done - first) * 1000:.0f} ms"
+              f"（含 {DEBOUNCE * 1000:.0f} ms 合并等待）")
+
+def main():
+    """主函数"""
+    default_chain = ' '.join(f'{script}:{name}' for script, name in DEFAULT_CHAIN)
+    parser = argparse.ArgumentParser(description='监视页面和规则，保存后增量重写')
+    parser.add_argument('--root', default=PROJECT_DIR, help=f'站点根目录（默认 {PROJECT_DIR}）')
+    parser.add_argument('--rules', action='append', type=parse_spec, metavar='SCRIPT:NAME',
+                        help=f'规则链中的一项，按给出的顺序执行（可重复；默认 {default_chain}）')
+    parser.add_argument('--no-nav', action='store_true', help='不按页面注册表更新导航栏')
+    parser.add_argument('--poll', action='store_true', help='不使用 inotify，按修改时间轮询')
+    parser.add_argument('--initial', action='store_true', help='启动时先处理一遍全部页面')
+    args = parser.parse_args()
+
+    session = WatchSession(args.root, RuleChain(args.rules or DEFAULT_CHAIN), nav=not args.no_nav, excluded=EXCLUDED)
+    watcher = open_watcher(session.watch_dirs(), poll=args.poll)
+    print(f"规则链: {' -> '.join(f'{script}:{name}' for script, name in session.chain.specs)}")
+    print(f"监视方式: {'inotify' if isinstance(watcher, InotifyWatcher) else '轮询'}")
+    for path in session.watch_dirs():
+        print(f"  {path}")
+    if args.initial:
+        updated = 0
+        for path in session.pages():
+            status, error = session.process(path, force=True)
+            if status == UPDATED:
+                updated += 1
+            elif status == FAILED:
+                print(f"✗ 处理失败: {os.path.basename(path)} - {error}")
+        print(f"✓ 初始处理完成，更新 {updated} 个文件")
+    print("等待文件变化...（Ctrl+C 退出）")
+    print("=" * 60)
+    try:
+        while True:
+            changed, first = collect(watcher)
+            report = session.handle(changed)
+            print_batch(report, first, perf_counter())
+    except KeyboardInterrupt:
+        print("\n已停止")
+    finally:
+        watcher.close()
+
+if __name__ == '__main__':
+    main()